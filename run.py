@@ -1,23 +1,75 @@
 #!/usr/bin/env python3
 import argparse
-import yaml
-from src.orchestrator import Orchestrator
+import sys
+
+# everything heavier than argparse is imported after the arguments are parsed,
+# so --help and startup profiling stay cheap
 
 
 def main():
     print(">>> run.py started")
 
     parser = argparse.ArgumentParser()
-    parser.add_argument("query", type=str)
+    parser.add_argument("query", type=str, nargs="?")
     parser.add_argument("--config", default="config/config.yaml")
+    parser.add_argument("--serve", action="store_true", help="keep state warm and answer queries over HTTP")
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch", metavar="FILE", help="YAML list of {name, query, campaign(s)}: one report per item")
+    parser.add_argument("--per-campaign", action="store_true", help="one report per campaign in the data")
+    parser.add_argument("--batch-workers", type=int, default=None, help="report-rendering processes for batch runs")
+    parser.add_argument("--no-stage-cache", action="store_true", help="recompute every stage instead of reusing cached results")
+    parser.add_argument("--invalidate", metavar="STAGE", nargs="+",
+                        help="drop cached results of these stages ('all' for every stage) before running")
+    parser.add_argument("--profile-startup", action="store_true", help="summarize per-module import time for this run")
     args = parser.parse_args()
+    if not (args.serve or args.batch or args.per_campaign or args.query or args.invalidate):
+        parser.error("a query is required unless --serve, --batch, --per-campaign or --invalidate is given")
 
-    print(f"> Query received: {args.query}")
+    if args.profile_startup:
+        from src.utils.startup_profile import profile_startup
+
+        sys.exit(profile_startup([__file__] + [a for a in sys.argv[1:] if a != "--profile-startup"]))
+
+    import yaml
+    from src.orchestrator import Orchestrator
+    from src.utils.tracing import configure_logging
 
     cfg = yaml.safe_load(open(args.config, "r"))
+    configure_logging(cfg)
     print("> Loaded config")
 
+    if args.serve:
+        from src.service import AnalystService
+
+        svc_cfg = cfg.setdefault("service", {})
+        if args.port is not None:
+            svc_cfg["port"] = args.port
+        if args.workers is not None:
+            svc_cfg["workers"] = args.workers
+        AnalystService(cfg).serve_forever()
+        return
+
+    if args.batch or args.per_campaign:
+        from src.batch import BatchRunner, load_items
+
+        if args.batch_workers is not None:
+            cfg.setdefault("batch", {})["workers"] = args.batch_workers
+        items = load_items(args.batch) if args.batch else None
+        manifest = BatchRunner(cfg).run(items, query=args.query or "Analyze ROAS drop")
+        print(f"> Batch manifest: {manifest['manifest_path']}")
+        sys.exit(1 if manifest["failed"] else 0)
+
+    if args.no_stage_cache:
+        cfg.setdefault("stage_cache", {})["enabled"] = False
     orch = Orchestrator(cfg)
+    if args.invalidate:
+        cleared = orch.invalidate_stage_cache(None if "all" in args.invalidate else args.invalidate)
+        print(f"> Invalidated cached stages: {cleared}")
+        if not args.query:
+            return
+
+    print(f"> Query received: {args.query}")
     print("> Orchestrator initialized")
 
     result = orch.run(args.query)
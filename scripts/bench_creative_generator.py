@@ -0,0 +1,66 @@
+# scripts/bench_creative_generator.py
+# Times CreativeGenerator.generate as the campaign count grows (up to 10k) against the
+# previous per-campaign rescan (df[df.campaign_name == name] + unique() + mode()).
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.agents.creative_generator import CreativeGenerator  # noqa: E402
+
+
+def synthetic_frame(n_campaigns: int, rows_per_campaign: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    n = n_campaigns * rows_per_campaign
+    camp = np.repeat(np.arange(n_campaigns), rows_per_campaign)
+    rng.shuffle(camp)
+    return pd.DataFrame({
+        "campaign_name": pd.Categorical([f"Campaign {c}" for c in camp]),
+        "creative_message": [f"Message {c}-{v}" for c, v in zip(camp, rng.integers(0, 5, n))],
+        "creative_type": pd.Categorical(rng.choice(["Image", "Video", "UGC", "Carousel"], n)),
+        "impressions": rng.integers(1_000, 100_000, n),
+        "clicks": rng.integers(10, 2_000, n).astype(float),
+        "ctr": rng.uniform(0.002, 0.02, n),
+    })
+
+
+def rescan_baseline(df: pd.DataFrame, threshold: float):
+    camp_ctr = df.groupby("campaign_name", observed=True).agg(ctr=("ctr", "mean")).reset_index()
+    out = []
+    for _, row in camp_ctr[camp_ctr["ctr"] < threshold].iterrows():
+        subset = df[df["campaign_name"] == row["campaign_name"]]
+        out.append((subset["creative_message"].dropna().unique().tolist()[:3], subset["creative_type"].mode().iloc[0]))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--campaigns", type=int, nargs="+", default=[100, 1_000, 5_000, 10_000])
+    parser.add_argument("--rows-per-campaign", type=int, default=20)
+    parser.add_argument("--baseline-max", type=int, default=2_000, help="skip the rescan baseline above this many campaigns")
+    args = parser.parse_args()
+
+    cfg = {"thresholds": {"low_ctr": 0.012}}
+    gen = CreativeGenerator(cfg)
+    print(f"{'campaigns':>10} {'rows':>10} {'groupby (s)':>12} {'rescan (s)':>12}")
+    for n_camp in args.campaigns:
+        df = synthetic_frame(n_camp, args.rows_per_campaign)
+        t0 = time.perf_counter()
+        gen.generate(df, {})
+        new_t = time.perf_counter() - t0
+
+        old_t = float("nan")
+        if n_camp <= args.baseline_max:
+            t0 = time.perf_counter()
+            rescan_baseline(df, cfg["thresholds"]["low_ctr"])
+            old_t = time.perf_counter() - t0
+        print(f"{n_camp:>10} {len(df):>10} {new_t:>12.3f} {old_t:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# scripts/bench_incremental.py
+# Replays the ad data as daily appends and compares incremental Simulator updates
+# against a full refit on the cumulative history (wall time + next-day RMSE).
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.agents.simulator import Simulator  # noqa: E402
+
+
+def rmse(sim, day_df):
+    preds = np.array([p["predicted_ctr"] for p in sim.predict(day_df["creative_message"].astype(str).tolist())])
+    return float(np.sqrt(np.mean((preds - day_df["ctr"].values) ** 2)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--config", default="config/config.yaml")
+    parser.add_argument("--data", default=None)
+    parser.add_argument("--warmup-days", type=int, default=30)
+    args = parser.parse_args()
+
+    cfg = yaml.safe_load(open(args.config, "r"))
+    df = pd.read_csv(args.data or cfg["data"]["path"])
+    df["date"] = pd.to_datetime(df["date"])
+    days = sorted(df["date"].unique())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        full_cfg = {**cfg, "simulator": {**cfg.get("simulator", {}), "mode": "full"}}
+        inc_cfg = {**cfg, "simulator": {**cfg.get("simulator", {}), "mode": "incremental", "model_dir": tmp}}
+
+        inc = Simulator(inc_cfg)
+        inc.update_incremental(df[df["date"] <= days[args.warmup_days - 1]])
+
+        full_time = inc_time = 0.0
+        full_err, inc_err = [], []
+        for i in range(args.warmup_days, len(days) - 1):
+            seen = df[df["date"] <= days[i]]
+            next_day = df[df["date"] == days[i + 1]]
+
+            t0 = time.perf_counter()
+            full = Simulator(full_cfg)
+            full.train_from_dataframe(seen)
+            full_time += time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            inc.partial_fit(df[df["date"] == days[i]])
+            inc.model.coef_  # the solve is lazy; time it with the update
+            inc_time += time.perf_counter() - t0
+
+            full_err.append(rmse(full, next_day))
+            inc_err.append(rmse(inc, next_day))
+
+    n_updates = len(full_err)
+    print(f"daily updates: {n_updates} (warmup {args.warmup_days} days, {len(df)} rows)")
+    print(f"full refit : total {full_time:8.2f}s  per day {full_time / max(n_updates, 1) * 1000:8.1f}ms  next-day RMSE {np.mean(full_err):.5f}")
+    print(f"incremental: total {inc_time:8.2f}s  per day {inc_time / max(n_updates, 1) * 1000:8.1f}ms  next-day RMSE {np.mean(inc_err):.5f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# scripts/bench_parallel_scoring.py
+# Scores a large synthetic candidate set with Simulator.simulate_batch at increasing
+# worker counts and reports throughput and speedup over the single-process path.
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.agents.simulator import Simulator  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--config", default="config/config.yaml")
+    parser.add_argument("--candidates", type=int, default=200_000)
+    parser.add_argument("--chunk-size", type=int, default=None)
+    parser.add_argument("--max-jobs", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    cfg = yaml.safe_load(open(args.config, "r"))
+    if args.chunk_size:
+        cfg["simulator"]["chunk_size"] = args.chunk_size
+    df = pd.read_csv(cfg["data"]["path"])
+
+    sim = Simulator(cfg)
+    sim.train_from_dataframe(df)
+
+    msgs = df["creative_message"].astype(str)
+    reps = args.candidates // len(msgs) + 1
+    candidates = pd.DataFrame({
+        "creative_message": [f"New idea {i}: {m}" for i, m in enumerate(pd.concat([msgs] * reps).iloc[:args.candidates])]
+    })
+
+    jobs = sorted({1, *[2 ** k for k in range(1, 8) if 2 ** k <= args.max_jobs], args.max_jobs})
+    base = None
+    print(f"candidates: {len(candidates)}  chunk_size: {sim.chunk_size}  cores: {os.cpu_count()}")
+    for n_jobs in jobs:
+        t0 = time.perf_counter()
+        sim.simulate_batch(candidates, n_jobs=n_jobs)
+        elapsed = time.perf_counter() - t0
+        base = base or elapsed
+        print(f"n_jobs={n_jobs:3d}  {elapsed:8.2f}s  {len(candidates) / elapsed:10.0f} msgs/s  speedup {base / elapsed:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
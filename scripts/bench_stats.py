@@ -0,0 +1,49 @@
+# scripts/bench_stats.py
+# Times two_sample_proportion_test_batch against a Python loop over the scalar
+# two_sample_proportion_test for a growing number of segment pairs.
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.utils.stats import batch_significance, two_sample_proportion_test  # noqa: E402
+
+
+def synthetic_counts(n_pairs: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    n1 = rng.integers(1_000, 50_000, n_pairs)
+    n2 = rng.integers(1_000, 50_000, n_pairs)
+    k1 = (n1 * rng.uniform(0.005, 0.02, n_pairs)).astype(int)
+    k2 = (n2 * rng.uniform(0.005, 0.02, n_pairs)).astype(int)
+    return k1, n1, k2, n2
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pairs", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--loop-max", type=int, default=100_000, help="skip the scalar loop above this many pairs")
+    args = parser.parse_args()
+
+    batch_significance(*synthetic_counts(10))  # warm up the lazy scipy import
+    print(f"{'pairs':>10} {'batch (s)':>10} {'loop (s)':>10} {'speedup':>9}")
+    for n in args.pairs:
+        k1, n1, k2, n2 = synthetic_counts(n)
+        t0 = time.perf_counter()
+        batch_significance(k1, n1, k2, n2)
+        batch_t = time.perf_counter() - t0
+
+        loop_t = float("nan")
+        if n <= args.loop_max:
+            t0 = time.perf_counter()
+            for a, b, c, d in zip(k1.tolist(), n1.tolist(), k2.tolist(), n2.tolist()):
+                two_sample_proportion_test(a, b, c, d)
+            loop_t = time.perf_counter() - t0
+        print(f"{n:>10} {batch_t:>10.4f} {loop_t:>10.3f} {loop_t / batch_t:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+# scripts/bench_suite.py
+# Regression benchmarks on synthetic data: wall time, peak RSS and throughput for the
+# data load, simulator train/predict, creative generator, near-duplicate clustering,
+# insights + evaluator, memory writes and PDF build. Each case runs in a fresh interpreter so peak RSS is per case.
+#
+#   python scripts/bench_suite.py --rows 10000 100000 1000000
+#   python scripts/bench_suite.py --rows 100000 --compare reports/benchmarks/bench_<old>.json
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+CASES = [
+    "data_load", "data_load_cached", "simulator_train", "simulator_predict",
+    "creative_generator", "insights", "evaluator", "memory_json", "memory_sqlite",
+    "memory_jsonl", "pdf_build", "near_duplicates",
+]
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 / (1024 * 1024) if sys.platform == "darwin" else 1 / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def _cfg(data_path, tmp):
+    import yaml
+
+    cfg = yaml.safe_load(open(ROOT / "config" / "config.yaml", "r"))
+    cfg["data"] = {**cfg["data"], "path": data_path, "cache_dir": None, "sample_mode": False}
+    cfg["simulator"] = {**cfg.get("simulator", {}), "model_dir": os.path.join(tmp, "models"), "prediction_cache_size": 0}
+    return cfg
+
+
+def run_case(name, data_path, n_predict, n_events):
+    """Runs one case in this process; returns (seconds, items processed)."""
+    from src.agents.data_agent import DataAgent
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cfg = _cfg(data_path, tmp)
+
+        if name == "data_load":
+            t0 = time.perf_counter()
+            df, _ = DataAgent(cfg).load_and_summarize()
+            return time.perf_counter() - t0, len(df)
+
+        if name == "data_load_cached":
+            cfg["data"]["cache_dir"] = os.path.join(tmp, "cache")
+            DataAgent(cfg).load()
+            t0 = time.perf_counter()
+            df, _ = DataAgent(cfg).load_and_summarize()
+            return time.perf_counter() - t0, len(df)
+
+        if name.startswith("memory_"):
+            from src.memory.memory import Memory
+
+            backend = name.split("_", 1)[1]
+            mem = Memory(os.path.join(tmp, f"memory.{backend}"), max_events=500, backend=backend)
+            t0 = time.perf_counter()
+            for i in range(n_events):
+                mem.append_event({"type": "bench", "i": i, "run_id": f"run_{i % 10}"})
+            return time.perf_counter() - t0, n_events
+
+        if name == "pdf_build":
+            from src.utils.report_pdf import PdfReport
+
+            hypotheses = [{"id": f"H{i}", "text": "CTR decline may be causing ROAS drop " * 3, "confidence": 0.8} for i in range(50)]
+            creatives = [{"campaign_name": f"C{i}", "message": "Limited offer — 20% off today", "predicted_ctr": 0.015} for i in range(200)]
+            t0 = time.perf_counter()
+            PdfReport(tmp).build("bench", "Benchmark", "Summary " * 100, hypotheses, creatives, ["Action"] * 5)
+            return time.perf_counter() - t0, len(hypotheses) + len(creatives)
+
+        agent = DataAgent(cfg)
+        df, summary = agent.load_and_summarize()
+
+        if name == "simulator_train":
+            from src.agents.simulator import Simulator
+
+            t0 = time.perf_counter()
+            Simulator(cfg).train_from_dataframe(df)
+            return time.perf_counter() - t0, len(df)
+
+        if name == "simulator_predict":
+            from src.agents.simulator import Simulator
+
+            sim = Simulator(cfg)
+            sim.train_from_dataframe(df)
+            base = df["creative_message"].astype(str).unique()
+            messages = [f"{base[i % len(base)]} v{i}" for i in range(n_predict)]
+            t0 = time.perf_counter()
+            sim.predict(messages)
+            return time.perf_counter() - t0, n_predict
+
+        if name == "near_duplicates":
+            from src.utils.near_duplicates import NearDuplicateIndex
+
+            t0 = time.perf_counter()
+            NearDuplicateIndex.from_config(cfg).fit(df["creative_message"].astype(str))
+            return time.perf_counter() - t0, len(df)
+
+        if name == "creative_generator":
+            from src.agents.creative_generator import CreativeGenerator
+
+            t0 = time.perf_counter()
+            CreativeGenerator(cfg).generate(df, summary)
+            return time.perf_counter() - t0, len(df)
+
+        from src.agents.insight_agent import InsightAgent
+
+        if name == "insights":
+            t0 = time.perf_counter()
+            cube = agent.build_cube(df)
+            InsightAgent(cfg).generate(summary, cube)
+            return time.perf_counter() - t0, len(df)
+
+        if name == "evaluator":
+            from src.agents.evaluator_agent import EvaluatorAgent
+
+            insights = InsightAgent(cfg).generate(summary, agent.build_cube(df))
+            t0 = time.perf_counter()
+            EvaluatorAgent(cfg).validate(insights, df)
+            return time.perf_counter() - t0, len(insights["hypotheses"])
+
+        raise ValueError(f"Unknown benchmark case '{name}'")
+
+
+def _child(args):
+    seconds, items = run_case(args.case, args.data, args.predict, args.events)
+    print(json.dumps({"seconds": seconds, "items": items, "peak_rss_mb": peak_rss_mb()}))
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(current, baseline_path):
+    baseline = json.load(open(baseline_path, "r"))
+    old = {(r["case"], r["rows"]): r for r in baseline["results"]}
+    print(f"\nvs {baseline_path} ({baseline.get('commit')})")
+    print(f"{'case':<20} {'rows':>10} {'time x':>8} {'rss x':>8}")
+    for r in current["results"]:
+        o = old.get((r["case"], r["rows"]))
+        if not o or "error" in r or "error" in o:
+            continue
+        rss = r["peak_rss_mb"] / o["peak_rss_mb"] if r["peak_rss_mb"] and o["peak_rss_mb"] else float("nan")
+        print(f"{r['case']:<20} {r['rows']:>10} {r['seconds'] / max(o['seconds'], 1e-9):>8.2f} {rss:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--campaigns", type=int, default=200)
+    parser.add_argument("--cases", nargs="+", default=CASES, choices=CASES)
+    parser.add_argument("--predict", type=int, default=10_000, help="messages scored by simulator_predict")
+    parser.add_argument("--events", type=int, default=1_000, help="events appended by the memory cases")
+    parser.add_argument("--data-dir", default=None, help="reuse generated CSVs here (default: temp dir)")
+    parser.add_argument("--output", default=None, help="JSON results path (default: reports/benchmarks/bench_<commit>_<time>.json)")
+    parser.add_argument("--compare", default=None, help="earlier results JSON to print ratios against")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    parser.add_argument("--data", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        return _child(args)
+
+    from src.utils.synthetic_data import write_csv
+
+    commit = _git_commit()
+    report = {
+        "commit": commit,
+        "created": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": [],
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir or tmp
+        for rows in args.rows:
+            data = os.path.join(data_dir, f"synthetic_{rows}_{args.campaigns}.csv")
+            if not os.path.exists(data):
+                print(f"> generating {rows} rows -> {data}")
+                write_csv(data, rows, n_campaigns=args.campaigns)
+
+            for case in args.cases:
+                cmd = [sys.executable, __file__, "--case", case, "--data", data,
+                       "--predict", str(args.predict), "--events", str(args.events)]
+                proc = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+                entry = {"case": case, "rows": rows}
+                if proc.returncode != 0:
+                    entry["error"] = proc.stderr.strip().splitlines()[-1:] or ["failed"]
+                    print(f"{case:<20} {rows:>10}  FAILED: {entry['error'][0]}")
+                else:
+                    res = json.loads(proc.stdout.strip().splitlines()[-1])
+                    entry.update(res, throughput=res["items"] / max(res["seconds"], 1e-9))
+                    rss = f"{res['peak_rss_mb']:.0f} MB" if res["peak_rss_mb"] else "n/a"
+                    print(f"{case:<20} {rows:>10} {res['seconds']:>9.3f}s {rss:>9} {entry['throughput']:>14,.0f}/s")
+                report["results"].append(entry)
+
+    out = args.output or str(ROOT / "reports" / "benchmarks" / f"bench_{commit or 'nogit'}_{datetime.utcnow():%Y%m%dT%H%M%S}.json")
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {out}")
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+# scripts/generate_synthetic_data.py
+# Writes synthetic ad rows with the facebook_ads.csv schema, e.g. for load tests:
+#   python scripts/generate_synthetic_data.py data/synthetic_1m.csv --rows 1000000 --campaigns 500
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.utils.synthetic_data import write_csv  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--campaigns", type=int, default=50)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--messages", type=int, default=500, help="distinct creative messages")
+    parser.add_argument("--missing-rate", type=float, default=0.0, help="share of blank spend/clicks/revenue/roas cells")
+    parser.add_argument("--chunk-rows", type=int, default=500_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    write_csv(
+        args.path, args.rows, chunk_rows=args.chunk_rows, seed=args.seed, n_campaigns=args.campaigns,
+        n_days=args.days, n_messages=args.messages, missing_rate=args.missing_rate,
+    )
+    print(f"Wrote {args.rows:,} rows to {args.path} in {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
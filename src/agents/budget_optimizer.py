@@ -0,0 +1,195 @@
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.utils.segment_cube import RECENT, period_labels
+
+MEMORY_KEY = "budget_optimizer_state"
+
+
+class BudgetOptimizer:
+    """Revenue-maximizing daily spend per adset/platform under a fixed total budget.
+
+    Each unit (``budget.unit_dims``) gets a diminishing-returns curve
+    ``revenue = a * spend ** beta`` fitted on its daily spend/revenue with a log-log
+    regression; per-unit slopes are shrunk toward the pooled within-unit slope and kept
+    in (0, 1). With concave curves the optimum sets every unconstrained unit's marginal
+    ROAS ``a * beta * spend ** (beta - 1)`` to one common value ``lam``, so the solve is a
+    vectorized closed form per unit plus a 1-D root search for ``lam``. That root is
+    bracketed from the previous run's ``lam`` in Memory when there is one.
+    """
+
+    def __init__(self, cfg: Dict[str, Any]):
+        budget_cfg = cfg.get("budget", {})
+        self.unit_dims = list(budget_cfg.get("unit_dims", ["campaign_name", "adset_name", "platform"]))
+        self.max_change = budget_cfg.get("max_change", 0.5)
+        self.shrinkage = budget_cfg.get("shrinkage", 1.0)
+        self.min_days = budget_cfg.get("min_days", 3)
+        self.total_daily = budget_cfg.get("total_daily")
+        self.window_days = cfg.get("evaluation", {}).get("window_days", 14)
+        self.beta_range = (0.05, 0.95)
+
+    # -----------------------------
+    # Response curves
+    # -----------------------------
+    def daily(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Spend, revenue and purchases per unit and day; missing revenue is spend * roas."""
+        revenue = df["revenue"]
+        if "roas" in df.columns:
+            revenue = revenue.fillna(df["spend"] * df["roas"])
+        frame = pd.DataFrame({
+            **{d: df[d] for d in self.unit_dims},
+            "date": pd.to_datetime(df["date"]),
+            "spend": df["spend"],
+            "revenue": revenue,
+            "purchases": df["purchases"] if "purchases" in df.columns else np.nan,
+        })
+        return frame.groupby(self.unit_dims + ["date"], observed=True, dropna=True).sum(min_count=1).reset_index()
+
+    def fit_curves(self, daily: pd.DataFrame) -> pd.DataFrame:
+        """Per-unit ``a``, ``beta``, current daily spend and revenue per purchase."""
+        keys = [daily[d] for d in self.unit_dims]
+        ok = (daily["spend"] > 0) & (daily["revenue"] > 0)
+        pts = daily[ok]
+        x, y = np.log(pts["spend"].to_numpy()), np.log(pts["revenue"].to_numpy())
+        g = pd.DataFrame({"x": x, "y": y, "xx": x * x, "xy": x * y}, index=pts.index).groupby([k[ok] for k in keys], observed=True)
+        s = g.sum()
+        n = g.size()
+        mx, my = s["x"] / n, s["y"] / n
+        sxx = s["xx"] - n * mx * mx
+        sxy = s["xy"] - n * mx * my
+        # pooled within-unit slope, the prior each unit's slope is shrunk toward
+        pooled = float(sxy.sum() / sxx.sum()) if sxx.sum() > 1e-12 else 0.5
+        pooled = float(np.clip(pooled, *self.beta_range))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            beta = (sxy + self.shrinkage * pooled) / (sxx + self.shrinkage)
+        beta = beta.fillna(pooled).clip(*self.beta_range)
+
+        curves = pd.DataFrame({"days": n, "beta": beta, "log_a": my - beta * mx})
+        curves = curves[curves["days"] >= self.min_days]
+
+        # current daily spend: mean over the most recent window
+        recent = daily[period_labels(daily["date"], self.window_days) == RECENT]
+        per_unit = recent.groupby(self.unit_dims, observed=True).agg(
+            spend=("spend", "sum"), revenue=("revenue", "sum"), purchases=("purchases", "sum")
+        )
+        per_unit["current_spend"] = per_unit["spend"] / self.window_days
+        per_unit["revenue_per_purchase"] = per_unit["revenue"] / per_unit["purchases"].where(per_unit["purchases"] > 0)
+        curves = curves.join(per_unit[["current_spend", "revenue_per_purchase"]], how="inner")
+        curves = curves[curves["current_spend"] > 0]
+        curves.attrs["pooled_beta"] = pooled
+        return curves
+
+    # -----------------------------
+    # Allocation
+    # -----------------------------
+    @staticmethod
+    def _spend_at(lam: float, log_ab: np.ndarray, beta: np.ndarray, log_lo: np.ndarray, log_hi: np.ndarray) -> np.ndarray:
+        # marginal ROAS a*b*s^(b-1) = lam  =>  log s = (log(a*b) - log lam) / (1 - b), then box-clip
+        return np.exp(np.clip((log_ab - np.log(lam)) / (1 - beta), log_lo, log_hi))
+
+    def solve(self, curves: pd.DataFrame, budget: Optional[float] = None, warm_lam: Optional[float] = None) -> Dict[str, Any]:
+        from scipy.optimize import brentq
+
+        beta = curves["beta"].to_numpy()
+        log_ab = curves["log_a"].to_numpy() + np.log(beta)
+        current = curves["current_spend"].to_numpy()
+        lo, hi = current * (1 - self.max_change), current * (1 + self.max_change)
+        log_lo, log_hi = np.log(np.maximum(lo, 1e-9)), np.log(hi)
+        budget = float(current.sum() if budget is None else budget)
+
+        if budget <= lo.sum() or budget >= hi.sum():
+            spend = lo if budget <= lo.sum() else hi
+            return {"spend": spend, "lam": None, "iterations": 0, "budget": budget, "bounded": True, "warm_start": False}
+
+        def excess(log_lam):
+            return self._spend_at(np.exp(log_lam), log_ab, beta, log_lo, log_hi).sum() - budget
+
+        # bracket the root around the warm start (or the median current marginal ROAS)
+        if warm_lam:
+            center = np.log(warm_lam)
+        else:
+            center = float(np.median(log_ab + (beta - 1) * np.log(current)))
+        width, evals = 0.05 if warm_lam else 1.0, 0
+        a, b = center - width, center + width
+        while excess(a) < 0:
+            a -= width
+            width *= 2
+            evals += 1
+        while excess(b) > 0:
+            b += width
+            width *= 2
+            evals += 1
+        log_lam, res = brentq(excess, a, b, xtol=1e-12, full_output=True)
+        lam = float(np.exp(log_lam))
+        return {
+            "spend": self._spend_at(lam, log_ab, beta, log_lo, log_hi),
+            "lam": lam,
+            "iterations": int(res.iterations + evals),
+            "budget": budget,
+            "bounded": False,
+            "warm_start": bool(warm_lam),
+        }
+
+    def warm_lam(self, memory) -> Optional[float]:
+        """The previous run's marginal ROAS from Memory, when it was solved over the same units."""
+        state = memory.recall(MEMORY_KEY) if memory is not None else None
+        return state.get("lam") if isinstance(state, dict) and state.get("unit_dims") == self.unit_dims else None
+
+    def remember(self, memory, result: Dict[str, Any]):
+        summary = result["summary"]
+        if memory is not None and summary.get("marginal_roas") is not None:
+            memory.remember(MEMORY_KEY, {"lam": summary["marginal_roas"], "unit_dims": self.unit_dims, "summary": summary})
+
+    def optimize(self, df: pd.DataFrame, memory=None, warm_lam: Optional[float] = None) -> Dict[str, Any]:
+        """Allocation for ``df``; with ``memory`` the solve is warm-started from and stored back to it."""
+        curves = self.fit_curves(self.daily(df))
+        if curves.empty:
+            return {"units": pd.DataFrame(), "summary": {"units": 0}, "actions": []}
+
+        if memory is not None:
+            warm_lam = self.warm_lam(memory)
+        sol = self.solve(curves, self.total_daily, warm_lam)
+
+        units = curves.copy()
+        units["recommended_spend"] = sol["spend"]
+        a = np.exp(units["log_a"])
+        units["current_revenue"] = a * units["current_spend"] ** units["beta"]
+        units["predicted_revenue"] = a * units["recommended_spend"] ** units["beta"]
+        units["change"] = units["recommended_spend"] - units["current_spend"]
+        units["marginal_roas"] = units["beta"] * units["predicted_revenue"] / units["recommended_spend"]
+        units["predicted_purchases"] = units["predicted_revenue"] / units["revenue_per_purchase"]
+        units = units.reset_index().sort_values("change", ascending=False, kind="stable")
+
+        current_rev = float(units["current_revenue"].sum())
+        predicted_rev = float(units["predicted_revenue"].sum())
+        summary = {
+            "units": int(len(units)),
+            "daily_budget": sol["budget"],
+            "current_revenue": current_rev,
+            "predicted_revenue": predicted_rev,
+            "revenue_uplift_pct": 100.0 * (predicted_rev / current_rev - 1) if current_rev else 0.0,
+            "shifted_spend": float(units["change"].clip(lower=0).sum()),
+            "marginal_roas": sol["lam"],
+            "iterations": sol["iterations"],
+            "warm_start": sol["warm_start"],
+            "pooled_beta": curves.attrs.get("pooled_beta"),
+        }
+        result = {"units": units, "summary": summary, "actions": self.actions(units, summary)}
+        self.remember(memory, result)
+        return result
+
+    def actions(self, units: pd.DataFrame, summary: Dict[str, Any], top: int = 3) -> List[str]:
+        def label(row):
+            return " / ".join(str(getattr(row, d)) for d in self.unit_dims)
+
+        gain, cut = units[units["change"] > 0], units[units["change"] < 0].iloc[::-1]
+        if gain.empty or cut.empty:
+            return []
+        return [
+            f"Shift ${summary['shifted_spend']:,.0f}/day from {len(cut)} to {len(gain)} adset placements for a predicted "
+            f"{summary['revenue_uplift_pct']:+.1f}% revenue at the same ${summary['daily_budget']:,.0f}/day budget",
+            "Increase: " + "; ".join(f"{label(r)} (+${r.change:,.0f}/day)" for r in gain.head(top).itertuples()),
+            "Reduce: " + "; ".join(f"{label(r)} (-${-r.change:,.0f}/day)" for r in cut.head(top).itertuples()),
+        ]
@@ -1,13 +1,20 @@
 from typing import Dict, Any, List
 import pandas as pd
 
+from src.utils.near_duplicates import NearDuplicateIndex, dedupe
+
 
 class CreativeAgent:
     def __init__(self, cfg):
         self.cfg = cfg
+        self.dedupe = cfg.get("near_duplicates", {}).get("enabled", True)
 
     def generate(self, df):
         low_ctr_df = df[df["ctr"] < df["ctr"].mean()]
+        if self.dedupe:
+            # one source row per near-duplicate message, so the 10 ideas are not rewordings of one ad
+            pool = low_ctr_df.dropna(subset=["creative_message"]).drop_duplicates("creative_message").head(100)
+            low_ctr_df = dedupe(pool, "creative_message", NearDuplicateIndex.from_config(self.cfg))
 
         candidates = []
         for _, row in low_ctr_df.head(10).iterrows():
@@ -24,30 +31,53 @@ class CreativeAgent:
 class CreativeGenerator:
     def __init__(self, cfg: Dict[str, Any]):
         self.cfg = cfg
+        self.dedupe = cfg.get("near_duplicates", {}).get("enabled", True)
 
     def generate(self, df: pd.DataFrame, data_summary: Dict[str, Any]) -> Dict[str, Any]:
-        df = df.copy()
         low_ctr_threshold = self.cfg["thresholds"]["low_ctr"]
 
         # compute campaign-level CTR
         camp_ctr = (
-            df.groupby("campaign_name")
+            df.groupby("campaign_name", observed=True)
             .agg(
                 impressions=("impressions", "sum"),
                 clicks=("clicks", "sum"),
                 ctr=("ctr", "mean")
             )
-            .reset_index()
         )
         low_ctr_camps = camp_ctr[camp_ctr["ctr"] < low_ctr_threshold]
 
+        # one scan over the low-CTR rows gives every campaign's first 3 distinct messages
+        # and creative_type mode, instead of re-filtering the frame per campaign
+        low_rows = df.loc[df["campaign_name"].isin(low_ctr_camps.index), ["campaign_name", "creative_message", "creative_type"]]
+        distinct = low_rows[["campaign_name", "creative_message"]].dropna().drop_duplicates()
+        if self.dedupe and not distinct.empty:
+            # near-copies of a message already listed for the campaign do not count as distinct
+            distinct = dedupe(distinct, "creative_message", NearDuplicateIndex.from_config(self.cfg), by="campaign_name")
+        top_msgs = (
+            distinct
+            .groupby("campaign_name", observed=True, sort=False)
+            .head(3)
+            .groupby("campaign_name", observed=True)["creative_message"]
+            .agg(list)
+        )
+        type_counts = (
+            low_rows.groupby(["campaign_name", "creative_type"], observed=True)
+            .size()
+            .reset_index(name="n")
+        )
+        # mode with ties broken by the smallest value, as Series.mode().iloc[0] does
+        type_mode = (
+            type_counts.sort_values(["campaign_name", "n", "creative_type"], ascending=[True, False, True])
+            .drop_duplicates("campaign_name")
+            .set_index("campaign_name")["creative_type"]
+        )
+
         recommendations = []
         candidates_rows = []
 
-        for _, row in low_ctr_camps.iterrows():
-            camp_name = row["campaign_name"]
-            subset = df[df["campaign_name"] == camp_name]
-            original_msgs = subset["creative_message"].dropna().unique().tolist()[:3]
+        for camp_name, stats in low_ctr_camps.iterrows():
+            original_msgs = top_msgs.get(camp_name, [])
 
             recs = []
             for msg in original_msgs:
@@ -74,7 +104,8 @@ class CreativeGenerator:
 
             recommendations.append({
                 "campaign_name": camp_name,
-                "creative_type": subset["creative_type"].mode().iloc[0] if not subset["creative_type"].isna().all() else "unknown",
+                "creative_type": type_mode.get(camp_name, "unknown"),
+                "avg_ctr": float(stats["ctr"]),
                 "original_messages": original_msgs,
                 "recommendations": recs
             })
@@ -84,6 +115,12 @@ class CreativeGenerator:
         candidates_df = pd.DataFrame(candidates_rows) if candidates_rows else pd.DataFrame(
             [{"campaign_name": "dummy", "creative_message": "Limited time offer. Shop now."}]
         )
+        if self.dedupe:
+            # near-identical candidates of one campaign would be scored (and reported) more than
+            # once; candidates share templated text across campaigns, so each campaign keeps its own
+            candidates_df = dedupe(
+                candidates_df, "creative_message", NearDuplicateIndex.from_config(self.cfg), by="campaign_name"
+            ).reset_index(drop=True)
 
         return {
             "campaign_recommendations": recommendations,
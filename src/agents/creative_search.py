@@ -0,0 +1,223 @@
+import heapq
+import re
+from itertools import product
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.utils.text_features import (
+    clean_batch,
+    contains_discount_batch,
+    contains_urgency_words_batch,
+    count_exclamations_batch,
+    count_words_batch,
+)
+from src.utils.tracing import span
+
+# each non-empty urgency phrase contains one of text_features.URGENCY_WORDS and each
+# discount phrase matches one of DISCOUNT_PATTERNS; "" lets a variant leave the slot out
+TEMPLATES = [
+    "{campaign}: comfort you can feel all day.",
+    "New from {campaign} - breathable, seamless, made to move.",
+    "Meet {campaign}, the everyday essential customers rate 5 stars.",
+    "Upgrade your drawer with {campaign}.",
+    "{campaign} - soft fabric, no ride-up, free returns.",
+    "Why shoppers switch to {campaign}.",
+]
+URGENCY_PHRASES = ["", "Only today.", "Limited stock.", "Hurry, last sizes left.", "Ends soon.", "Ending tonight.", "Now back in stock."]
+DISCOUNT_PHRASES = ["", "10% off.", "20% off.", "30% off your first order.", "Bundle deal.", "Extra discount at checkout.", "Sale prices."]
+CTAS = ["Shop now!", "Buy now.", "Get yours.", "See the range.", "Order today!", "Discover more."]
+
+_SPACES = re.compile(r"\s+")
+
+
+def _join(*parts: str) -> str:
+    return " ".join(p for p in parts if p)
+
+
+class CreativeSearch:
+    """Top-k search over template x urgency x discount x CTA variants per campaign.
+
+    Variants are never materialized as a whole: prefixes are expanded slot by slot and a
+    prefix is dropped when an upper bound on the Ridge prediction of every completion
+    cannot beat the current k-th best score. The bound splits the linear model into
+    (a) the TF-IDF part, at most the norm of the positive coefficients the message can
+    activate (the row is L2-normalized and non-negative), using the prefix's own features
+    plus, per remaining slot, its best option and one boundary bigram; and (b) the extra
+    features (length, words, "!", urgency/discount flags, mean TF-IDF), which add up per
+    slot. Surviving complete variants are scored exactly in batches and kept in a size-k heap.
+    """
+
+    def __init__(self, simulator, cfg: Dict[str, Any]):
+        search_cfg = cfg.get("creative_search", {})
+        self.sim = simulator
+        self.top_k = search_cfg.get("top_k", 20)
+        self.templates = search_cfg.get("templates") or TEMPLATES
+        self.slots = [
+            [_SPACES.sub(" ", o).strip() for o in search_cfg.get(name) or default]
+            for name, default in (("urgency", URGENCY_PHRASES), ("discount", DISCOUNT_PHRASES), ("cta", CTAS))
+        ]
+        self.stats: Dict[str, Any] = {}
+
+    def variant_count(self, campaigns: Sequence[str]) -> int:
+        return len(campaigns) * len(self.templates) * int(np.prod([len(s) for s in self.slots]))
+
+    def iter_variants(self, campaigns: Sequence[str]) -> Iterator[Tuple[str, str]]:
+        """Every (campaign, message) in enumeration order, generated lazily."""
+        for campaign in campaigns:
+            for template in self.templates:
+                head = template.format(campaign=campaign)
+                for parts in product(*self.slots):
+                    yield campaign, _join(head, *parts)
+
+    # -----------------------------
+    # Scoring
+    # -----------------------------
+    @property
+    def _linear(self) -> bool:
+        return self.sim.model is not None and self.sim.vectorizer_fitted
+
+    def score(self, messages: List[str]) -> np.ndarray:
+        """Exactly what ``Simulator.predict`` returns as predicted_ctr, without the per-row dicts."""
+        if not self._linear:
+            return self.sim._heuristic_scores(messages)
+        cleaned = clean_batch(messages).tolist()
+        X = self.sim.vectorizer.transform(cleaned)
+        extra = self.sim._extra_features(cleaned, X)
+        return np.clip(self.sim.model.predict(self.sim._stack(X, extra)), 0.0, 1.0)
+
+    def _prepare_bounds(self, heads: List[str]):
+        model, vec = self.sim.model, self.sim.vectorizer
+        coef = np.asarray(model.coef_, dtype=np.float64).ravel()
+        # the design matrix is [text features | 6 extra columns] (Simulator._stack)
+        n_tf = coef.shape[0] - 6
+        self._wpos2 = np.square(np.maximum(coef[:n_tf], 0.0))
+        self._w_len, self._w_words, self._w_excl, self._w_urg, self._w_disc, self._w_avg = coef[n_tf:]
+        self._n_tf = n_tf
+        self._intercept = float(model.intercept_)
+
+        analyzer = vec.build_analyzer()
+
+        def tokens(text):
+            return [g for g in analyzer(text.lower()) if " " not in g]
+
+        # every token that can end a prefix, for the bigram formed at each slot boundary
+        tails = {t for text in set(heads) | {o for s in self.slots for o in s} for t in tokens(text)[-1:]}
+
+        rem_tf, rem_lin, rem_nnz, rem_urg, rem_disc = [], [], [], [], []
+        for options in self.slots:
+            opts = [o for o in options if o]
+            X = vec.transform(clean_batch(opts).tolist())
+            tf = (X > 0).astype(np.float64) @ self._wpos2
+            lin = self._lin(opts)
+            firsts = {t for o in opts for t in tokens(o)[:1]}
+            pairs = [f"{t} {f}" for t in tails for f in firsts]
+            boundary = float(((vec.transform(pairs) > 0).astype(np.float64) @ self._wpos2).max()) if pairs else 0.0
+            has_empty = len(opts) < len(options)
+            rem_tf.append(max(tf.max(initial=0.0), 0.0) + boundary)
+            rem_lin.append(max(lin.max(initial=-np.inf), 0.0 if has_empty else -np.inf))
+            rem_nnz.append(int(X.getnnz(axis=1).max(initial=0)) + 1)
+            rem_urg.append(bool(contains_urgency_words_batch(opts).any()))
+            rem_disc.append(bool(contains_discount_batch(opts).any()))
+        # suffix sums: what slots i.. can still add
+        self._rem_tf = np.cumsum(rem_tf[::-1])[::-1].tolist() + [0.0]
+        self._rem_lin = np.cumsum(rem_lin[::-1])[::-1].tolist() + [0.0]
+        self._rem_nnz = np.cumsum(rem_nnz[::-1])[::-1].tolist() + [0]
+        self._rem_urg = [any(rem_urg[i:]) for i in range(len(self.slots))] + [False]
+        self._rem_disc = [any(rem_disc[i:]) for i in range(len(self.slots))] + [False]
+
+    def _lin(self, texts: List[str]) -> np.ndarray:
+        # length / word / "!" terms; a joined part also adds its separating space
+        t = pd.Series(texts, dtype=object)
+        return (self._w_len * (t.str.len().to_numpy() + 1) + self._w_words * count_words_batch(t)
+                + self._w_excl * count_exclamations_batch(t))
+
+    def _upper_bounds(self, prefixes: List[str], level: int) -> np.ndarray:
+        """Upper bound on the prediction of any completion of each prefix (slots ``level``.. open)."""
+        cleaned = clean_batch(prefixes)
+        X = self.sim.vectorizer.transform(cleaned.tolist())
+        tf = np.sqrt((X > 0).astype(np.float64) @ self._wpos2 + self._rem_tf[level])
+        lin = self._lin(cleaned.tolist()) - self._w_len + self._rem_lin[level]
+
+        urg = contains_urgency_words_batch(cleaned)
+        disc = contains_discount_batch(cleaned)
+        urg_term = np.where(urg, self._w_urg, max(self._w_urg, 0.0) if self._rem_urg[level] else 0.0)
+        disc_term = np.where(disc, self._w_disc, max(self._w_disc, 0.0) if self._rem_disc[level] else 0.0)
+        # the mean of an L2-normalized non-negative row lies in [1, sqrt(nnz)] / n_features
+        nnz = X.getnnz(axis=1) + self._rem_nnz[level]
+        avg = self._w_avg * (np.sqrt(nnz) if self._w_avg > 0 else 1.0) / self._n_tf
+        return np.clip(self._intercept + tf + lin + urg_term + disc_term + avg, 0.0, 1.0)
+
+    # -----------------------------
+    # Search
+    # -----------------------------
+    def search(self, campaigns: Sequence[str], k: Optional[int] = None, prune: bool = True) -> pd.DataFrame:
+        """Top-k variants by predicted CTR, best first, with the Simulator's prediction fields."""
+        k = k or self.top_k
+        campaigns = [str(c) for c in campaigns]
+        heap: List[Tuple[float, str, str]] = []
+        self.stats = {"variants": self.variant_count(campaigns), "scored": 0, "pruned_prefixes": 0}
+
+        def push(campaign_names, messages, scores):
+            self.stats["scored"] += len(messages)
+            for c, m, s in zip(campaign_names, messages, scores):
+                item = (float(s), m, c)
+                if len(heap) < k:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+
+        def floor() -> float:
+            # a bound below the k-th best cannot place; ties may still win on message order
+            return heap[0][0] if len(heap) >= k else -np.inf
+
+        with span("CreativeSearch.search", variants=self.stats["variants"], prune=prune and self._linear) as sp:
+            if prune and self._linear:
+                self._search_pruned(campaigns, push, floor)
+            else:
+                self._search_exhaustive(campaigns, push)
+            sp.update(scored=self.stats["scored"], pruned_prefixes=self.stats["pruned_prefixes"])
+
+        best = sorted(heap, key=lambda x: (-x[0], x[1]))
+        if not best:
+            return pd.DataFrame(columns=["campaign_name", "creative_message", "predicted_ctr"])
+        preds = pd.DataFrame(self.sim.predict([m for _, m, _ in best]))
+        out = pd.DataFrame({"campaign_name": [c for _, _, c in best], "creative_message": [m for _, m, _ in best]})
+        return out.join(preds.drop(columns=["message"]))
+
+    def _search_exhaustive(self, campaigns, push, chunk: int = 50_000):
+        names, msgs = [], []
+        for campaign, message in self.iter_variants(campaigns):
+            names.append(campaign)
+            msgs.append(message)
+            if len(msgs) >= chunk:
+                push(names, msgs, self.score(msgs))
+                names, msgs = [], []
+        if msgs:
+            push(names, msgs, self.score(msgs))
+
+    def _search_pruned(self, campaigns, push, floor, eps: float = 1e-9):
+        heads = [(c, t.format(campaign=c)) for c in campaigns for t in self.templates]
+        self._prepare_bounds([h for _, h in heads])
+        bounds = self._upper_bounds([h for _, h in heads], 0)
+        last = len(self.slots) - 1
+
+        # most promising heads first, so the k-th best rises quickly and later heads prune
+        for i in np.argsort(-bounds, kind="stable"):
+            if bounds[i] + eps < floor():
+                self.stats["pruned_prefixes"] += int(np.sum(bounds + eps < floor()))
+                break
+            campaign, head = heads[i]
+            frontier = [head]
+            for level, options in enumerate(self.slots):
+                children = [_join(p, o) for p in frontier for o in options]
+                if level == last:
+                    push([campaign] * len(children), children, self.score(children))
+                    break
+                ub = self._upper_bounds(children, level + 1)
+                keep = ub + eps >= floor()
+                self.stats["pruned_prefixes"] += int((~keep).sum())
+                frontier = [c for c, ok in zip(children, keep) if ok]
+                if not frontier:
+                    break
@@ -1,19 +1,251 @@
+import hashlib
+import importlib.util
+import json
+import os
+import threading
+
+import numpy as np
 import pandas as pd
 
+from src.utils.segment_cube import SegmentCube
+
+# low-cardinality string columns in the ad export; stored as pandas categoricals
+CATEGORICAL_COLUMNS = ["campaign_name", "adset_name", "creative_type", "audience_type", "platform", "country"]
+DATE_COLUMNS = ["date"]
+
+
+def file_sha256(path: str, block_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+# checked once; pandas imports pyarrow itself when the parquet cache or engine uses it
+_HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+
+def _tmp_path(path: str) -> str:
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def _write_json_atomic(path: str, obj):
+    # readers (and concurrent loads) never see a half-written metadata file
+    tmp = _tmp_path(path)
+    with open(tmp, "w") as f:
+        json.dump(obj, f)
+    os.replace(tmp, path)
+
+
 class DataAgent:
     def __init__(self, cfg):
         self.cfg = cfg
-        self.path = cfg["data"]["path"]
+        data_cfg = cfg["data"]
+        self.path = data_cfg["path"]
+        self.engine = data_cfg.get("engine", "c")
+        self.downcast = data_cfg.get("downcast", True)
+        self.float32 = data_cfg.get("float32", False)
+        self.cache_dir = data_cfg.get("cache_dir")
+        self.sample_mode = data_cfg.get("sample_mode", False)
+        self.sample_rows = data_cfg.get("sample_rows", 2000)
+        self.sample_strategy = data_cfg.get("sample_strategy", "stratified")
+        self.stratify_by = data_cfg.get("stratify_by", "campaign_name")
+        self.chunksize = data_cfg.get("chunksize", 200_000)
+        self.seed = cfg.get("seed", 42)
+        self.window_days = cfg.get("evaluation", {}).get("window_days", 14)
 
-    def load_and_summarize(self):
-        df = pd.read_csv(self.path)
+    def _read_csv(self) -> pd.DataFrame:
+        header = pd.read_csv(self.path, nrows=0).columns
+        dtype = {c: "category" for c in CATEGORICAL_COLUMNS if c in header}
+        engine = self.engine if self.engine != "pyarrow" or _HAS_PYARROW else "c"
+        df = pd.read_csv(
+            self.path,
+            dtype=dtype,
+            parse_dates=[c for c in DATE_COLUMNS if c in header],
+            engine=engine,
+        )
+        return self._apply_dtypes(df)
+
+    def _apply_dtypes(self, df: pd.DataFrame) -> pd.DataFrame:
+        if self.downcast:
+            for col in df.select_dtypes(include="integer").columns:
+                df[col] = pd.to_numeric(df[col], downcast="integer")
+        if self.float32:
+            for col in df.select_dtypes(include="floating").columns:
+                df[col] = pd.to_numeric(df[col], downcast="float")
+        return df
+
+    # -----------------------------
+    # Local columnar cache
+    # -----------------------------
+    def _cache_paths(self):
+        stem = os.path.splitext(os.path.basename(self.path))[0]
+        tag = hashlib.sha1(os.path.abspath(self.path).encode("utf-8")).hexdigest()[:8]
+        # parquet keeps categoricals/datetimes natively; pickle is the fallback without pyarrow
+        ext = "parquet" if _HAS_PYARROW else "pkl"
+        base = os.path.join(self.cache_dir, f"{stem}_{tag}")
+        return f"{base}.{ext}", f"{base}.meta.json"
+
+    def _source_meta(self) -> dict:
+        st = os.stat(self.path)
+        return {"mtime": st.st_mtime, "size": st.st_size, "dtypes": [self.downcast, self.float32]}
+
+    def _load_cached(self):
+        data_path, meta_path = self._cache_paths()
+        if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+            return None
+        with open(meta_path, "r") as f:
+            cached = json.load(f)
+        current = self._source_meta()
+        if cached.get("size") != current["size"] or cached.get("dtypes") != current["dtypes"]:
+            return None
+        if cached.get("mtime") != current["mtime"]:
+            # touched but possibly unchanged: fall back to the content hash
+            if cached.get("sha256") != file_sha256(self.path):
+                return None
+            cached["mtime"] = current["mtime"]
+            _write_json_atomic(meta_path, cached)
+        if data_path.endswith(".parquet"):
+            return pd.read_parquet(data_path)
+        return pd.read_pickle(data_path)
+
+    def _write_cache(self, df: pd.DataFrame):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        data_path, meta_path = self._cache_paths()
+        tmp = _tmp_path(data_path)
+        if data_path.endswith(".parquet"):
+            df.to_parquet(tmp, index=False)
+        else:
+            df.to_pickle(tmp)
+        os.replace(tmp, data_path)
+        _write_json_atomic(meta_path, dict(self._source_meta(), sha256=file_sha256(self.path)))
+
+    def source_fingerprint(self) -> str:
+        """Content hash of the CSV, taken from the columnar cache's metadata while it is current."""
+        if self.cache_dir:
+            try:
+                with open(self._cache_paths()[1], "r") as f:
+                    cached = json.load(f)
+            except (OSError, ValueError):
+                cached = {}
+            current = self._source_meta()
+            if cached.get("sha256") and (cached.get("size"), cached.get("mtime")) == (current["size"], current["mtime"]):
+                return cached["sha256"]
+        return file_sha256(self.path)
+
+    def load(self) -> pd.DataFrame:
+        if not self.cache_dir:
+            return self._read_csv()
+        df = self._load_cached()
+        if df is None:
+            df = self._read_csv()
+            self._write_cache(df)
+        return df
+
+    # -----------------------------
+    # Streaming mode (data.sample_mode)
+    # -----------------------------
+    def _stratum_priority(self, values: pd.Series) -> np.ndarray:
+        # fixed per stratum value (seeded), so the strata kept under the cap never depend on
+        # which rows have been seen so far
+        return pd.util.hash_array(values.astype(str).to_numpy(dtype=object), hash_key=f"{self.seed:016d}"[-16:])
+
+    def _sample_chunk(self, reservoir: pd.DataFrame, chunk: pd.DataFrame, rng, n_strata: int) -> pd.DataFrame:
+        # bottom-k on a uniform random key is a reservoir sample that can be merged chunk by chunk
+        chunk = chunk.assign(_sample_key=rng.random(len(chunk)))
+        combined = pd.concat([reservoir, chunk]) if len(reservoir) else chunk
+        if self.sample_strategy == "stratified" and self.stratify_by in combined.columns:
+            # equal allocation per stratum: each keeps the rows with its smallest keys. Caps only
+            # shrink as strata appear, so every kept stratum still holds its true bottom-k
+            per_stratum = max(1, self.sample_rows // max(n_strata, 1))
+            key_rank = combined.groupby(self.stratify_by, sort=False, dropna=False)["_sample_key"].rank(method="first")
+            kept = combined[(key_rank <= per_stratum).to_numpy()]
+            if len(kept) > self.sample_rows:
+                # more strata than sample_rows: one row from each of the sample_rows strata with
+                # the smallest priority, a bottom-k over strata that every stratum enters equally
+                # (by smallest key it would favour strata with many rows)
+                order = np.argsort(self._stratum_priority(kept[self.stratify_by]), kind="stable")
+                kept = kept.iloc[order[: self.sample_rows]]
+            return kept
+        return combined.sort_values("_sample_key", kind="stable").head(self.sample_rows)
+
+    def stream_summary_and_sample(self):
+        sample, summary, _ = self._stream()
+        return sample, summary
+
+    def _stream(self):
+        header = pd.read_csv(self.path, nrows=0).columns
+        rng = np.random.default_rng(self.seed)
+        rows = 0
+        ctr_sum = roas_sum = 0.0
+        ctr_n = roas_n = 0
+        campaigns = set()
+        strata = set()
+        reservoir = pd.DataFrame()
+        daily = None
+
+        reader = pd.read_csv(
+            self.path,
+            parse_dates=[c for c in DATE_COLUMNS if c in header],
+            chunksize=self.chunksize,
+        )
+        for chunk in reader:
+            rows += len(chunk)
+            ctr_sum += float(chunk["ctr"].sum())
+            ctr_n += int(chunk["ctr"].count())
+            roas_sum += float(chunk["roas"].sum())
+            roas_n += int(chunk["roas"].count())
+            campaigns.update(chunk["campaign_name"].dropna().unique())
+            # past sample_rows distinct values every stratum keeps one row, so the exact count
+            # is not needed and the set stays bounded on high-cardinality columns
+            if self.stratify_by in chunk.columns and len(strata) <= self.sample_rows:
+                strata.update(chunk[self.stratify_by].unique())
+            reservoir = self._sample_chunk(reservoir, chunk, rng, len(strata))
+            # the segment cube covers every row, not just the sample; folding each chunk into
+            # the running totals keeps it at one row per segment and day within the windows
+            daily = SegmentCube.fold(daily, SegmentCube.aggregate(chunk), self.window_days)
+
+        sample = reservoir.drop(columns="_sample_key", errors="ignore").sort_index().reset_index(drop=True)
+        for col in CATEGORICAL_COLUMNS:
+            if col in sample.columns:
+                sample[col] = sample[col].astype("category")
+        sample = self._apply_dtypes(sample)
 
         summary = {
+            "rows": rows,
+            "columns": list(header),
+            "avg_ctr": ctr_sum / ctr_n if ctr_n else float("nan"),
+            "avg_roas": roas_sum / roas_n if roas_n else float("nan"),
+            "campaigns": len(campaigns),
+            "sampled_rows": len(sample),
+            "sample_strategy": self.sample_strategy,
+        }
+        return sample, summary, SegmentCube.from_partials([daily] if daily is not None else [], self.window_days)
+
+    def summarize(self, df: pd.DataFrame) -> dict:
+        return {
             "rows": len(df),
             "columns": list(df.columns),
-            "avg_ctr": df["ctr"].mean(),
-            "avg_roas": df["roas"].mean(),
-            "campaigns": df["campaign_name"].nunique()
+            "avg_ctr": float(df["ctr"].mean()),
+            "avg_roas": float(df["roas"].mean()),
+            "campaigns": int(df["campaign_name"].nunique())
         }
 
+    def load_and_summarize(self):
+        if self.sample_mode:
+            return self.stream_summary_and_sample()
+        df = self.load()
+        summary = self.summarize(df)
+
         return df, summary
+
+    def build_cube(self, df: pd.DataFrame) -> SegmentCube:
+        return SegmentCube.from_frame(df, self.window_days)
+
+    def load_for_analysis(self):
+        # frame + summary + the segment cube the insight stage mines
+        if self.sample_mode:
+            return self._stream()
+        df, summary = self.load_and_summarize()
+        return df, summary, self.build_cube(df)
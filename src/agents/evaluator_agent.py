@@ -1,25 +1,279 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from src.utils.near_duplicates import NearDuplicateIndex
+from src.utils.segment_cube import PREVIOUS, RECENT, period_labels
+from src.utils.stats import batch_significance_from_config
+
+
+class HypothesisEngine:
+    """Tests hypotheses against the ad data with shared, cached aggregates.
+
+    Per-row derived columns (period label, days active) and grouped clicks/impressions/
+    spend/revenue totals are computed once per set of segment dimensions and reused by
+    every hypothesis, so validating many hypotheses costs roughly one scan per dimension set.
+    Each test only collects its two (successes, trials) counts; ``evaluate_many`` runs the
+    proportion tests and the multiple-comparison correction for all of them in one batch.
+    """
+
+    def __init__(self, df: pd.DataFrame, cfg: Dict[str, Any]):
+        eval_cfg = cfg.get("evaluation", {})
+        self.df = df
+        self.cfg = cfg
+        self.window_days = eval_cfg.get("window_days", 14)
+        self.fatigue_days = eval_cfg.get("fatigue_days", 7)
+        self.cluster_creatives = cfg.get("near_duplicates", {}).get("enabled", True)
+        self._near_dup = NearDuplicateIndex.from_config(cfg)
+        self._cache: Dict[Any, Any] = {}
+
+    # -----------------------------
+    # Shared aggregates
+    # -----------------------------
+    def _cached(self, key, fn):
+        if key not in self._cache:
+            self._cache[key] = fn()
+        return self._cache[key]
+
+    def _dates(self) -> pd.Series:
+        return self._cached("dates", lambda: pd.to_datetime(self.df["date"]))
+
+    def period(self) -> pd.Series:
+        # last `window_days` days vs the window before it; rows outside both are -1
+        def build():
+            return pd.Series(period_labels(self._dates(), self.window_days), index=self.df.index, name="_period")
+        return self._cached("period", build)
+
+    def creative_clusters(self) -> pd.Series:
+        """Near-duplicate cluster per row; exact message identity when clustering is off."""
+        def build():
+            messages = self.df["creative_message"]
+            if self.cluster_creatives:
+                ids = self._near_dup.fit(messages).cluster_ids()
+            else:
+                ids = pd.factorize(messages)[0]
+            return pd.Series(ids, index=self.df.index, name="_cluster")
+        return self._cached("creative_clusters", build)
+
+    def days_active(self) -> pd.Series:
+        # a reworded copy of a running creative is as fatigued as the original
+        def build():
+            dates = self._dates()
+            first_seen = dates.groupby(self.creative_clusters()).transform("min")
+            return (dates - first_seen).dt.days.rename("_days_active")
+        return self._cached("days_active", build)
+
+    def cluster_exposure(self, dims: Tuple[str, ...]) -> pd.DataFrame:
+        """Impressions and rows per (segment, creative cluster)."""
+        def build():
+            keys = [self.df[d] for d in dims] + [self.creative_clusters()]
+            return self.df.groupby(keys, observed=True)["impressions"].agg(["sum", "size"])
+        return self._cached(("cluster_exposure", dims), build)
+
+    def _exposure_evidence(self, dims: Tuple[str, ...], segment: Dict[str, Any]) -> Dict[str, Any]:
+        t = self.cluster_exposure(dims)
+        if dims:
+            key = tuple(segment[d] for d in dims)
+            try:
+                t = t.loc[key if len(key) > 1 else key[0]]
+            except KeyError:
+                return {}
+        impressions = t["sum"].sum()
+        return {
+            "creative_clusters": int(len(t)),
+            "top_cluster_impression_share": _rate(t["sum"].max(), impressions),
+            "impressions_per_cluster": _rate(impressions, len(t)),
+            "rows_per_cluster": _rate(t["size"].sum(), len(t)),
+        }
+
+    def totals(self, dims: Tuple[str, ...], by: str = "period") -> pd.DataFrame:
+        """Grouped sums keyed by the segment dims plus a split column (period or fatigue stage)."""
+        def build():
+            split = self.period() if by == "period" else (self.days_active() >= self.fatigue_days).astype(int).rename("_stage")
+            keys = [self.df[d] for d in dims] + [split]
+            cols = [c for c in ("clicks", "impressions", "spend", "revenue") if c in self.df.columns]
+            return self.df[cols].groupby(keys, observed=True).sum()
+        return self._cached(("totals", dims, by), build)
+
+    def _pair(self, dims: Tuple[str, ...], segment: Dict[str, Any], by: str):
+        t = self.totals(dims, by)
+        if dims:
+            key = tuple(segment[d] for d in dims)
+            try:
+                t = t.loc[key if len(key) > 1 else key[0]]
+            except KeyError:
+                return None
+        t = t.groupby(level=-1).sum()
+        if 0 not in t.index or 1 not in t.index:
+            return None
+        return t.loc[0], t.loc[1]
+
+    # -----------------------------
+    # Tests
+    # -----------------------------
+    @staticmethod
+    def _result(name: str, counts: Optional[Tuple[int, int, int, int]], expect_negative: bool, evidence: Dict) -> Dict:
+        # pending result: the test itself runs in evaluate_many, batched with the others
+        return {"test": name, "counts": counts, "expect_negative": expect_negative, "evidence": evidence}
+
+    @staticmethod
+    def _finish(pending: Dict, p_value: float, p_adjusted: float, effect: float, z: float, significant: bool) -> Dict:
+        matches = (effect < 0) if pending["expect_negative"] else (effect > 0)
+        # confidence = 1 - one-sided p-value in the hypothesised direction
+        p_one = p_value / 2 if matches else 1 - p_value / 2
+        return {
+            "test": pending["test"],
+            "effect": effect,
+            "z": z,
+            "p_value": p_value,
+            "p_adjusted": p_adjusted,
+            "supported": bool(matches and significant),
+            "confidence": float(1 - p_one),
+            "evidence": pending["evidence"],
+        }
+
+    def _ctr_roas_corr(self) -> Optional[float]:
+        # a correlation over fewer than three rows is undefined or trivially +-1
+        pairs = self.df[["ctr", "roas"]].dropna()
+        if len(pairs) < 3 or pairs["ctr"].nunique() < 2 or pairs["roas"].nunique() < 2:
+            return None
+        return float(pairs["ctr"].corr(pairs["roas"]))
+
+    def ctr_change(self, segment: Dict[str, Any]) -> Dict:
+        dims = tuple(sorted(segment))
+        pair = self._pair(dims, segment, "period")
+        evidence = {"window_days": self.window_days}
+        if "roas" in self.df.columns:
+            evidence["ctr_roas_corr"] = self._cached("ctr_roas_corr", self._ctr_roas_corr)
+        if pair is None:
+            return self._result("ctr_change", None, True, evidence)
+        prev, recent = pair
+        evidence.update(previous_ctr=_rate(prev["clicks"], prev["impressions"]), recent_ctr=_rate(recent["clicks"], recent["impressions"]))
+        counts = (int(prev["clicks"]), int(prev["impressions"]), int(recent["clicks"]), int(recent["impressions"]))
+        return self._result("ctr_change", counts, True, evidence)
+
+    def creative_fatigue(self, segment: Dict[str, Any]) -> Dict:
+        dims = tuple(sorted(segment))
+        pair = self._pair(dims, segment, "fatigue")
+        evidence = {"fatigue_days": self.fatigue_days, **self._exposure_evidence(dims, segment)}
+        if pair is None:
+            return self._result("creative_fatigue", None, True, evidence)
+        fresh, fatigued = pair
+        evidence.update(fresh_ctr=_rate(fresh["clicks"], fresh["impressions"]), fatigued_ctr=_rate(fatigued["clicks"], fatigued["impressions"]))
+        counts = (int(fresh["clicks"]), int(fresh["impressions"]), int(fatigued["clicks"]), int(fatigued["impressions"]))
+        return self._result("creative_fatigue", counts, True, evidence)
+
+    def spend_shift(self, segment: Dict[str, Any]) -> Dict:
+        # share of impressions and spend going to adsets whose previous-period ROAS was below
+        # the segment's. Descriptive only: budget moves per adset, not per impression, so an
+        # impression-level proportion test would call almost any reallocation significant, and
+        # the low-ROAS adsets are picked from the same previous-period data
+        dims = tuple(sorted(segment))
+        # adset names repeat across campaigns, so an adset is identified within its campaign
+        adset = ("adset_name",) if "campaign_name" in dims else ("campaign_name", "adset_name")
+        t = self.totals(dims + adset, "period")
+        if dims:
+            key = tuple(segment[d] for d in dims)
+            try:
+                t = t.loc[key if len(key) > 1 else key[0]]
+            except KeyError:
+                return self._result("spend_shift", None, False, {})
+        by_period = t.unstack(level=-1, fill_value=0)
+        if PREVIOUS not in by_period["impressions"].columns or RECENT not in by_period["impressions"].columns:
+            return self._result("spend_shift", None, False, {})
+        prev_spend = by_period["spend"][PREVIOUS]
+        prev_roas = by_period["revenue"][PREVIOUS] / prev_spend.where(prev_spend > 0)
+        overall = by_period["revenue"][PREVIOUS].sum() / max(prev_spend.sum(), 1e-9)
+        low = (prev_roas < overall).to_numpy()
+
+        impr, spend = by_period["impressions"], by_period["spend"]
+        previous_share = _rate(float(impr[PREVIOUS][low].sum()), float(impr[PREVIOUS].sum()))
+        recent_share = _rate(float(impr[RECENT][low].sum()), float(impr[RECENT].sum()))
+        previous_spend_share = _rate(float(spend[PREVIOUS][low].sum()), float(prev_spend.sum()))
+        recent_spend_share = _rate(float(spend[RECENT][low].sum()), float(spend[RECENT].sum()))
+        evidence = {
+            "adsets": int(len(low)),
+            "low_roas_adsets": int(low.sum()),
+            "previous_share": previous_share,
+            "recent_share": recent_share,
+            "previous_spend_share": previous_spend_share,
+            "recent_spend_share": recent_spend_share,
+            "spend_share_shift": recent_spend_share - previous_spend_share,
+        }
+        return self._result("spend_shift", None, False, evidence)
+
+    TESTS = {
+        "ctr_change": ctr_change,
+        "creative_fatigue": creative_fatigue,
+        "spend_shift": spend_shift,
+    }
+
+    def _pending(self, hypothesis: Dict) -> Dict:
+        name = hypothesis.get("test") or infer_test(hypothesis.get("text", ""))
+        if name not in self.TESTS:
+            return {"test": None, "counts": None, "evidence": {}}
+        return self.TESTS[name](self, hypothesis.get("segment") or {})
+
+    def evaluate_many(self, hypotheses: List[Dict]) -> List[Dict]:
+        """Results in input order; p-values are corrected across every testable hypothesis."""
+        pending = [self._pending(h) for h in hypotheses]
+        tested = [i for i, p in enumerate(pending) if p["counts"] is not None]
+        out = [{"test": p["test"], "supported": None, "evidence": p["evidence"]} for p in pending]
+        if tested:
+            k1, n1, k2, n2 = zip(*(pending[i]["counts"] for i in tested))
+            res = batch_significance_from_config(self.cfg, k1, n1, k2, n2)
+            for j, i in enumerate(tested):
+                out[i] = self._finish(
+                    pending[i], float(res["p_value"][j]), float(res["p_adjusted"][j]),
+                    float(res["effect"][j]), float(res["z"][j]), bool(res["significant"][j]),
+                )
+        return out
+
+    def evaluate(self, hypothesis: Dict) -> Dict:
+        return self.evaluate_many([hypothesis])[0]
+
+
+def infer_test(text: str) -> Optional[str]:
+    t = text.lower()
+    if "fatigue" in t or "repetitive" in t:
+        return "creative_fatigue"
+    if "spend" in t or "adset" in t or "budget" in t:
+        return "spend_shift"
+    if "ctr" in t:
+        return "ctr_change"
+    return None
+
+
+def _rate(k, n) -> float:
+    return float(k / n) if n else 0.0
+
+
 class EvaluatorAgent:
     def __init__(self, cfg):
         self.cfg = cfg
 
     def validate(self, insights, df):
+        engine = HypothesisEngine(df, self.cfg)
         validated = []
 
-        for h in insights["hypotheses"]:
-            # If hypothesis mentions CTR, use CTR↔ROAS correlation
-            if "CTR" in h["text"]:
-                conf = abs(df["ctr"].corr(df["roas"]))
-            else:
-                # Default moderate confidence
-                conf = 0.6
+        # many hypotheses are tested at once: one batch of proportion tests, corrected together
+        results = engine.evaluate_many(insights["hypotheses"])
+        for h, res in zip(insights["hypotheses"], results):
+            # untestable hypotheses keep the confidence the insight stage gave them
+            conf = res.get("confidence", h.get("confidence", 0.5))
 
             validated.append({
                 "id": h["id"],
                 "text": h["text"],
-                "confidence": round(conf, 3)
+                "confidence": round(conf, 3),
+                **{k: h[k] for k in ("segment", "impact") if k in h},
+                **{k: v for k, v in res.items() if k != "confidence"}
             })
 
-        return {
+        out = {
             "summary": insights["summary"],
             "hypotheses": validated
         }
+        if "segments" in insights:
+            out["segments"] = insights["segments"]
+        return out
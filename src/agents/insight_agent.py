@@ -1,15 +1,206 @@
+from collections import defaultdict
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+GENERIC_HYPOTHESES = [
+    {"id": "H1", "text": "CTR decline may be causing ROAS drop", "confidence": 0.5},
+    {"id": "H2", "text": "Audience fatigue due to repetitive creatives", "confidence": 0.5},
+    {"id": "H3", "text": "Spend shifted into low-performing adsets", "confidence": 0.5}
+]
+
+
 class InsightAgent:
+    """Mines the data stage's SegmentCube for ROAS drops and low-CTR segments.
+
+    Every dim combination up to ``insights.max_depth`` is rolled up from the cube and
+    screened with vectorized thresholds. Findings are ranked by estimated revenue impact
+    and turned into hypotheses carrying the ``test`` / ``segment`` the evaluator runs.
+    Without a cube (or with nothing flagged) the generic hypotheses are returned.
+    """
+
     def __init__(self, cfg):
         self.cfg = cfg
+        thresholds = cfg.get("thresholds", {})
+        insight_cfg = cfg.get("insights", {})
+        self.roas_drop_pct = thresholds.get("roas_drop_pct", 0.15)
+        self.low_ctr = thresholds.get("low_ctr", 0.01)
+        self.min_impressions = thresholds.get("min_impressions", 1000)
+        self.max_depth = insight_cfg.get("max_depth", 2)
+        self.max_hypotheses = insight_cfg.get("max_hypotheses", 8)
+        self.drill_down_share = insight_cfg.get("drill_down_share", 0.8)
+        self.report_segments = insight_cfg.get("report_segments", 1000)
+
+    # -----------------------------
+    # Mining
+    # -----------------------------
+    def find_anomalies(self, cube) -> pd.DataFrame:
+        overall = cube.rollup(())
+        rev_per_click = float(overall["revenue_recent"].sum() / max(overall["clicks_recent"].sum(), 1))
+
+        found = []
+        for dims in cube.dim_combinations(self.max_depth):
+            seg = cube.rollup(dims)
+            seg = seg[(seg["impressions_prev"] >= self.min_impressions) & (seg["impressions_recent"] >= self.min_impressions)]
+            if seg.empty:
+                continue
+            with np.errstate(divide="ignore", invalid="ignore"):
+                roas_prev = seg["revenue_prev"] / seg["spend_prev"]
+                roas_recent = seg["revenue_recent"] / seg["spend_recent"]
+                drop = 1 - roas_recent / roas_prev
+                ctr_prev = seg["clicks_prev"] / seg["impressions_prev"]
+                ctr_recent = seg["clicks_recent"] / seg["impressions_recent"]
+
+            # ROAS drop: revenue the recent spend would have earned at the previous ROAS
+            hit = (drop > self.roas_drop_pct) & (seg["spend_prev"] > 0) & (seg["spend_recent"] > 0)
+            if hit.any():
+                found.append(pd.DataFrame({
+                    "kind": "roas_drop",
+                    "dims": [dims] * int(hit.sum()),
+                    "key": seg.index[hit],
+                    "before": roas_prev[hit].to_numpy(),
+                    "after": roas_recent[hit].to_numpy(),
+                    "change": -drop[hit].to_numpy(),
+                    "ctr_change": (ctr_recent[hit] / ctr_prev[hit] - 1).to_numpy(),
+                    "impact": ((roas_prev - roas_recent) * seg["spend_recent"])[hit].to_numpy(),
+                }))
+
+            # low CTR: clicks missing to reach the threshold, valued at the account revenue per click
+            hit = ctr_recent < self.low_ctr
+            if hit.any():
+                found.append(pd.DataFrame({
+                    "kind": "low_ctr",
+                    "dims": [dims] * int(hit.sum()),
+                    "key": seg.index[hit],
+                    "before": ctr_prev[hit].to_numpy(),
+                    "after": ctr_recent[hit].to_numpy(),
+                    "change": (ctr_recent[hit] / ctr_prev[hit] - 1).to_numpy(),
+                    "ctr_change": (ctr_recent[hit] / ctr_prev[hit] - 1).to_numpy(),
+                    "impact": ((self.low_ctr - ctr_recent) * seg["impressions_recent"] * rev_per_click)[hit].to_numpy(),
+                }))
+
+        if not found:
+            return pd.DataFrame(columns=["kind", "dims", "key", "before", "after", "change", "ctr_change", "impact"])
+        return pd.concat(found, ignore_index=True).sort_values("impact", ascending=False, kind="stable")
 
-    def generate(self, summary):
-        hypotheses = [
-            {"id": "H1", "text": "CTR decline may be causing ROAS drop", "confidence": 0.5},
-            {"id": "H2", "text": "Audience fatigue due to repetitive creatives", "confidence": 0.5},
-            {"id": "H3", "text": "Spend shifted into low-performing adsets", "confidence": 0.5}
+    @staticmethod
+    def _ancestors(items: frozenset):
+        """Every proper subset of a segment's (dim, value) items: its coarser parents."""
+        for k in range(len(items)):
+            for sub in combinations(sorted(items), k):
+                yield frozenset(sub)
+
+    def _select(self, anomalies: pd.DataFrame, cube):
+        # parents carry the sum of their children's impact, so a finding is drilled down to
+        # the most specific segment that still holds `drill_down_share` of it; segments
+        # nested in (or containing) an already chosen finding of the same kind are skipped.
+        # Rows are indexed under each of their parents, so drilling down and the nesting
+        # checks look at one segment's relatives, not every row (depth <= max_depth).
+        rows = [
+            {**row._asdict(), "segment": cube.segment_of(row.dims, row.key)}
+            for row in anomalies.itertuples(index=False)
         ]
+        descendants = defaultdict(list)
+        for r in rows:
+            r["items"] = frozenset(r["segment"].items())
+            for parent in self._ancestors(r["items"]):
+                descendants[(r["kind"], parent)].append(r)
+
+        chosen = []
+        chosen_keys = set()
+        # segments that contain a chosen finding
+        covering = set()
+
+        def nests_chosen(row):
+            return (row["kind"], row["items"]) in chosen_keys or any(
+                (row["kind"], parent) in chosen_keys for parent in self._ancestors(row["items"])
+            )
+
+        for row in rows:
+            if (row["kind"], row["items"]) in covering or nests_chosen(row):
+                continue
+            best = row
+            for other in descendants[(row["kind"], row["items"])]:
+                if best["items"] < other["items"] and other["impact"] >= self.drill_down_share * row["impact"]:
+                    best = other
+            if nests_chosen(best):
+                continue
+            chosen.append(best)
+            chosen_keys.add((best["kind"], best["items"]))
+            covering.update((best["kind"], parent) for parent in self._ancestors(best["items"]))
+            if len(chosen) >= self.max_hypotheses:
+                break
+        return chosen
+
+    # -----------------------------
+    # Hypotheses
+    # -----------------------------
+    @staticmethod
+    def _label(segment):
+        return ", ".join(f"{k}={v}" for k, v in segment.items())
+
+    def _hypotheses_for(self, finding):
+        label = self._label(finding["segment"])
+        base = {"segment": finding["segment"], "impact": round(float(finding["impact"]), 2), "confidence": 0.5}
+        if finding["kind"] == "roas_drop":
+            out = [dict(base, test="ctr_change", text=(
+                f"ROAS fell {-finding['change']:.0%} ({finding['before']:.2f} -> {finding['after']:.2f}) "
+                f"for {label}; CTR decline may be the cause"
+            ))]
+            # spend_shift identifies adsets itself, so it is not run inside a single adset
+            if "adset_name" not in finding["segment"]:
+                out.append(dict(base, test="spend_shift", text=f"Spend shifted into low-ROAS adsets within {label}"))
+            return out
+        return [dict(base, test="creative_fatigue", text=(
+            f"CTR is {finding['after']:.2%} (below {self.low_ctr:.2%}) for {label}; "
+            f"audience fatigue from repetitive creatives"
+        ))]
 
+    def generate(self, summary, cube=None):
+        if cube is None or len(cube) == 0:
+            return {
+                "summary": "Preliminary performance issues observed based on dataset.",
+                "hypotheses": [dict(h) for h in GENERIC_HYPOTHESES]
+            }
+
+        anomalies = self.find_anomalies(cube)
+        findings = self._select(anomalies, cube)
+        if not findings:
+            return {
+                "summary": f"No segment with at least {self.min_impressions} impressions crossed the ROAS-drop or low-CTR thresholds.",
+                "hypotheses": [dict(h) for h in GENERIC_HYPOTHESES]
+            }
+
+        hypotheses = []
+        for finding in findings:
+            hypotheses.extend(self._hypotheses_for(finding))
+        hypotheses = hypotheses[:self.max_hypotheses]
+        for i, h in enumerate(hypotheses, 1):
+            h["id"] = f"H{i}"
+
+        counts = anomalies["kind"].value_counts()
+        top = findings[0]
         return {
-            "summary": "Preliminary performance issues observed based on dataset.",
-            "hypotheses": hypotheses
+            "summary": (
+                f"{int(counts.get('roas_drop', 0))} segments with a ROAS drop above {self.roas_drop_pct:.0%} and "
+                f"{int(counts.get('low_ctr', 0))} below {self.low_ctr:.2%} CTR over the last {cube.window_days} days "
+                f"(of {summary.get('rows', 'n/a')} rows). Largest: {self._label(top['segment'])} "
+                f"(est. impact {top['impact']:,.0f})."
+            ),
+            "hypotheses": [{"id": h.pop("id"), **h} for h in hypotheses],
+            "segments": self._segment_rows(anomalies, cube)
         }
+
+    def _segment_rows(self, anomalies: pd.DataFrame, cube):
+        # every flagged segment (ranked by impact) for the report's segment table
+        return [
+            {
+                "issue": row.kind,
+                "segment": self._label(cube.segment_of(row.dims, row.key)),
+                "before": round(float(row.before), 4),
+                "after": round(float(row.after), 4),
+                "impact": round(float(row.impact), 2),
+            }
+            for row in anomalies.head(self.report_segments).itertuples(index=False)
+        ]
@@ -0,0 +1,250 @@
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.utils.text_features import as_text_series, clean_batch
+from src.utils.tracing import span
+
+
+def regression_metrics(y_true, y_pred) -> Dict[str, Any]:
+    """RMSE, MAE and R^2 (None when the targets are constant)."""
+    y_true = np.asarray(y_true, dtype=np.float64)
+    err = np.asarray(y_pred, dtype=np.float64) - y_true
+    sst = float(np.square(y_true - y_true.mean()).sum()) if len(y_true) else 0.0
+    return {
+        "n": int(len(y_true)),
+        "rmse": float(np.sqrt(np.mean(np.square(err)))) if len(err) else None,
+        "mae": float(np.mean(np.abs(err))) if len(err) else None,
+        "r2": 1.0 - float(np.square(err).sum()) / sst if sst > 0 else None,
+    }
+
+
+class RidgeGridSearch:
+    """k-fold cross-validation of the Simulator's TF-IDF + Ridge model over alpha,
+    tfidf_max_features and ngram_range.
+
+    Featurization is shared across the grid: each ngram_range is counted once, and every
+    tfidf_max_features candidate keeps that count matrix's most frequent columns (what
+    TfidfVectorizer's max_features selects) before IDF weighting. Vocabulary and IDF use
+    all rows, since they never see the target; folds only split the regression, and split
+    it by distinct message so no held-out message is also in training. Per fold
+    one eigendecomposition gives the Ridge solution for every alpha, w = V diag(1 / (s +
+    alpha)) V' X'y, taken over whichever of the feature space and the distinct training
+    messages is smaller (see ``_evaluate``).
+
+    Featurization candidates run in a thread pool (the linear algebra releases the GIL)
+    and stop being started once ``time_budget_s`` has elapsed (the first, the configured
+    featurization, always runs); a candidate only counts if all of its folds finished.
+    """
+
+    def __init__(self, simulator, alphas: Sequence[float], max_features: Sequence[int],
+                 ngram_ranges: Sequence[Tuple[int, int]], folds: int = 5,
+                 time_budget_s: Optional[float] = None, n_jobs: int = -1, seed: int = 42):
+        self.sim = simulator
+        self.alphas = sorted({float(a) for a in alphas})
+        self.max_features = list(dict.fromkeys(int(m) for m in max_features))
+        self.ngram_ranges = list(dict.fromkeys(tuple(int(v) for v in r) for r in ngram_ranges))
+        self.folds = folds
+        self.time_budget_s = time_budget_s
+        self.n_jobs = n_jobs
+        self.seed = seed
+
+    @classmethod
+    def from_config(cls, simulator) -> "RidgeGridSearch":
+        sel_cfg = simulator.model_selection
+        return cls(
+            simulator,
+            alphas=sel_cfg.get("alphas") or [simulator.alpha],
+            max_features=sel_cfg.get("tfidf_max_features") or [simulator.tfidf_max],
+            ngram_ranges=sel_cfg.get("ngram_ranges") or [simulator.ngram_range],
+            folds=sel_cfg.get("folds", 5),
+            time_budget_s=sel_cfg.get("time_budget_s"),
+            n_jobs=sel_cfg.get("n_jobs", -1),
+            seed=simulator.seed,
+        )
+
+    def grid(self) -> Dict[str, Any]:
+        return {
+            "alphas": self.alphas,
+            "tfidf_max_features": self.max_features,
+            "ngram_ranges": [list(r) for r in self.ngram_ranges],
+            "folds": self.folds,
+            "fold_groups": "message",
+        }
+
+    # -----------------------------
+    # Featurization
+    # -----------------------------
+    def _counts(self, cleaned: List[str], weights: np.ndarray, ngram_range: Tuple[int, int]):
+        from sklearn.feature_extraction.text import CountVectorizer
+
+        counts = CountVectorizer(ngram_range=ngram_range, stop_words="english").fit_transform(cleaned)
+        # column order by corpus frequency (rows per message as weights), so any max_features is a prefix
+        order = np.argsort(-(counts.T @ weights), kind="stable")
+        return counts.tocsc()[:, order]
+
+    def _design(self, msgs: pd.Series, codes: np.ndarray, counts, max_features: int):
+        """Design matrix with one row per distinct message; row i of the data is row codes[i]."""
+        from sklearn.feature_extraction.text import TfidfTransformer
+
+        # IDF weights every row, so repeated messages count once per row
+        idf = TfidfTransformer().fit(counts[:, :max_features][codes])
+        X_tfidf = idf.transform(counts[:, :max_features].tocsr())
+        return self.sim._stack(X_tfidf, self.sim._extra_features(msgs, X_tfidf))
+
+    # -----------------------------
+    # Cross-validation
+    # -----------------------------
+    def _evaluate(self, X, codes: np.ndarray, y: np.ndarray, fold: np.ndarray,
+                  deadline: Optional[float]) -> Optional[np.ndarray]:
+        """Per alpha and fold: squared-error sum, absolute-error sum; None if out of time.
+
+        Rows sharing a message share a design row, so each fold's Ridge is the weighted
+        Ridge over its m distinct training messages (weight = row count, target = mean
+        CTR). With d features the solve works in the smaller of the two spaces: the d x d
+        centered Gram matrix when d <= m, else the m x m kernel of the weighted, centered
+        rows (w = Z' (ZZ' + alpha I)^-1 t), so a wide TF-IDF grid never builds a d x d
+        matrix. The deadline is checked before each fold's decomposition as well as
+        between folds.
+        """
+        alphas = np.asarray(self.alphas)
+        m, d = X.shape
+        out = np.zeros((len(alphas), self.folds, 2))
+
+        def expired():
+            return deadline is not None and time.monotonic() > deadline
+
+        for k in range(self.folds):
+            if expired():
+                return None
+            held = fold == k
+            w = np.bincount(codes[~held], minlength=m).astype(np.float64)
+            ysum = np.bincount(codes[~held], weights=y[~held], minlength=m)
+            train = np.flatnonzero(w)
+            n = w.sum()
+            mu_x = np.asarray(X.T @ w).ravel() / n
+            mu_y = ysum.sum() / n
+            # predictions are needed for the held-out rows' messages only
+            held_msgs, held_rows = np.unique(codes[held], return_inverse=True)
+            Xh = X[held_msgs]
+
+            if d <= len(train):
+                # centered training statistics: the intercept is not penalized
+                gram = (X.T @ X.multiply(w[:, None]).tocsr()).toarray() - n * np.outer(mu_x, mu_x)
+                rhs = np.asarray(X.T @ ysum).ravel() - n * mu_x * mu_y
+                if expired():
+                    return None
+                evals, evecs = np.linalg.eigh(gram)
+                proj = evecs.T @ rhs
+                W = evecs @ (proj[:, None] / (np.maximum(evals, 0.0)[:, None] + alphas[None, :]))
+                pred = Xh @ W + (mu_y - mu_x @ W)
+            else:
+                Xt, sw = X[train], np.sqrt(w[train])
+                c_t = Xt @ mu_x
+                mm = float(mu_x @ mu_x)
+                # Z = diag(sw) (Xt - 1 mu'), t = diag(sw) (ybar - mu_y)
+                kernel = (Xt @ Xt.T).toarray() - c_t[:, None] - c_t[None, :] + mm
+                kernel *= sw[:, None] * sw[None, :]
+                t = ysum[train] / sw - sw * mu_y
+                if expired():
+                    return None
+                evals, evecs = np.linalg.eigh(kernel)
+                proj = evecs.T @ t
+                A = evecs @ (proj[:, None] / (np.maximum(evals, 0.0)[:, None] + alphas[None, :]))
+                # (x - mu) Z' for the held-out messages
+                cross = (Xh @ Xt.T).toarray() - (Xh @ mu_x)[:, None] - c_t[None, :] + mm
+                pred = (cross * sw[None, :]) @ A + mu_y
+            err = np.clip(pred[held_rows], 0.0, 1.0) - y[held][:, None]
+            out[:, k, 0] = np.square(err).sum(axis=0)
+            out[:, k, 1] = np.abs(err).sum(axis=0)
+        return out
+
+    def _candidate(self, msgs, codes, counts, y, fold, ngram_range, max_features, deadline):
+        if deadline is not None and time.monotonic() > deadline:
+            return None
+        with span("RidgeGridSearch.candidate", ngram_range=list(ngram_range), max_features=max_features):
+            X = self._design(msgs, codes, counts, max_features)
+            errors = self._evaluate(X, codes, y, fold, deadline)
+        if errors is None:
+            return None
+        n_k = np.bincount(fold, minlength=self.folds)
+        sst = float(np.square(y - y.mean()).sum())
+        rows = []
+        for a, alpha in enumerate(self.alphas):
+            fold_rmse = np.sqrt(errors[a, :, 0] / n_k)
+            rows.append({
+                "alpha": alpha,
+                "tfidf_max_features": max_features,
+                "ngram_range": list(ngram_range),
+                "n_features": int(X.shape[1]),
+                "rmse": float(np.sqrt(errors[a, :, 0].sum() / len(y))),
+                "rmse_std": float(fold_rmse.std()),
+                "mae": float(errors[a, :, 1].sum() / len(y)),
+                "r2": 1.0 - float(errors[a, :, 0].sum()) / sst if sst > 0 else None,
+            })
+        return rows
+
+    def search(self, df: pd.DataFrame, message_col="creative_message", ctr_col="ctr",
+               baseline: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Every evaluated setting by CV RMSE, plus the best one and ``baseline`` (current config)."""
+        import joblib
+
+        start = time.monotonic()
+        deadline = start + self.time_budget_s if self.time_budget_s else None
+        # featurize each distinct message once; rows index into them
+        codes, uniques = pd.factorize(as_text_series(df[message_col]))
+        msgs = pd.Series(uniques, dtype=object)
+        y = df[ctr_col].astype(float).values
+        folds = max(2, min(self.folds, len(msgs)))
+        self.folds = folds
+        # folds split distinct messages (GroupKFold on codes): rows sharing a message with a
+        # training row would otherwise be scored against their own mean CTR
+        fold = (np.random.RandomState(self.seed).permutation(len(msgs)) % folds)[codes]
+
+        # the configured featurization goes first and is always scored, whatever the budget
+        order = sorted(
+            ((r, m) for r in self.ngram_ranges for m in self.max_features),
+            key=lambda c: (not baseline or [list(c[0]), c[1]] != [baseline["ngram_range"], baseline["tfidf_max_features"]]),
+        )
+        cleaned = clean_batch(msgs).tolist()
+        weights = np.bincount(codes, minlength=len(msgs)).astype(np.float64)
+        counts: Dict[Tuple[int, int], Any] = {}
+        tasks = []
+        for r, m in order:
+            if tasks and deadline is not None and time.monotonic() > deadline:
+                break
+            if r not in counts:
+                with span("RidgeGridSearch.count", ngram_range=list(r)):
+                    counts[r] = self._counts(cleaned, weights, r)
+            tasks.append((r, m))
+
+        with span("RidgeGridSearch.search", candidates=len(order) * len(self.alphas), folds=folds) as sp:
+            parts = joblib.Parallel(n_jobs=self.n_jobs, prefer="threads")(
+                joblib.delayed(self._candidate)(msgs, codes, counts[r], y, fold, r, m, deadline if i else None)
+                for i, (r, m) in enumerate(tasks)
+            )
+            results = sorted((row for p in parts if p for row in p), key=lambda row: row["rmse"])
+            sp.update(evaluated=len(results))
+
+        def find(params):
+            if not params:
+                return None
+            return next((row for row in results if row["alpha"] == float(params["alpha"])
+                         and row["tfidf_max_features"] == params["tfidf_max_features"]
+                         and row["ngram_range"] == list(params["ngram_range"])), None)
+
+        candidates = len(order) * len(self.alphas)
+        return {
+            "folds": folds,
+            "n_samples": int(len(y)),
+            "candidates": candidates,
+            "evaluated": len(results),
+            "complete": len(results) == candidates,
+            "elapsed_s": round(time.monotonic() - start, 3),
+            "time_budget_s": self.time_budget_s,
+            "best": results[0] if results else None,
+            "baseline": find(baseline),
+            "results": results,
+        }
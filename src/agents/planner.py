@@ -3,15 +3,20 @@ class PlannerAgent:
         self.cfg = cfg
 
     def create_plan(self, query):
+        # stage -> stages whose outputs it consumes; the orchestrator runs this as a DAG
+        dependencies = {
+            "load_data": [],
+            "generate_insights": ["load_data"],
+            "validate_insights": ["load_data", "generate_insights"],
+            "generate_creatives": ["load_data"],
+            "train_simulator": ["load_data"],
+            "simulate_creatives": ["train_simulator", "generate_creatives"],
+            "search_creatives": ["load_data", "train_simulator"],
+            "optimize_budget": ["load_data"],
+            "build_report": ["validate_insights", "simulate_creatives", "search_creatives", "optimize_budget"]
+        }
         return {
             "query": query,
-            "steps": [
-                "load_data",
-                "summarize_data",
-                "generate_insights",
-                "validate_insights",
-                "generate_creatives",
-                "simulate_creatives",
-                "build_report"
-            ]
+            "steps": list(dependencies),
+            "dependencies": dependencies
         }
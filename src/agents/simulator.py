@@ -1,14 +1,185 @@
-from typing import List, Dict, Any
+from typing import TYPE_CHECKING, List, Dict, Any, Iterator, Optional
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
 import numpy as np
 import pandas as pd
 import random
 import re
 
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import Ridge
-from sklearn.model_selection import train_test_split
+# scipy, sklearn and joblib are imported where they are used: a heuristic-only or
+# cached-prediction run never pays their import cost
+if TYPE_CHECKING:
+    from scipy import sparse
 
-from src.utils.text_features import count_exclamations, contains_urgency_words, contains_discount
+from src.agents.model_selection import regression_metrics
+from src.utils.tracing import span
+from src.utils.text_features import (
+    as_text_series,
+    clean_batch,
+    contains_discount_batch,
+    contains_urgency_words_batch,
+    count_exclamations_batch,
+    count_words_batch,
+)
+
+# bump whenever the featurization or artifact layout changes so stale pickles are ignored
+ARTIFACT_VERSION = 3
+
+
+class IncrementalRidge:
+    """Ridge regression re-solved in closed form from accumulated sufficient statistics.
+
+    Only X'X, X'y and the column/target sums are kept, so folding in new rows costs
+    O(new rows) and the result matches a full Ridge fit (unpenalized intercept) on all rows seen.
+    The d x d system is solved lazily, the first time ``coef_`` / ``intercept_`` is read
+    after an update, so a run of ``partial_fit`` calls pays for one solve.
+    """
+
+    def __init__(self, alpha: float = 1.0):
+        self.alpha = alpha
+        self.n_samples_ = 0
+        self._coef = None
+        self._intercept = 0.0
+        self._stale = False
+        self._xtx = None
+        self._xty = None
+        self._sx = None
+        self._sy = 0.0
+
+    def partial_fit(self, X, y) -> "IncrementalRidge":
+        from scipy import sparse
+
+        X = sparse.csr_matrix(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        if self._xtx is None:
+            d = X.shape[1]
+            self._xtx = sparse.csr_matrix((d, d), dtype=np.float64)
+            self._xty = np.zeros(d)
+            self._sx = np.zeros(d)
+        self._xtx = (self._xtx + X.T @ X).tocsr()
+        self._xty += X.T @ y
+        self._sx += np.asarray(X.sum(axis=0)).ravel()
+        self._sy += float(y.sum())
+        self.n_samples_ += X.shape[0]
+        self._stale = True
+        return self
+
+    @property
+    def coef_(self) -> Optional[np.ndarray]:
+        if self._stale:
+            self._solve()
+        return self._coef
+
+    @property
+    def intercept_(self) -> float:
+        if self._stale:
+            self._solve()
+        return self._intercept
+
+    def _solve(self):
+        from scipy import sparse
+        from scipy.sparse.linalg import spsolve
+
+        # augmented normal equations with an unpenalized intercept row/column
+        d = self._xty.shape[0]
+        with span("simulator.solve", features=d, rows=self.n_samples_):
+            sx = sparse.csr_matrix(self._sx.reshape(-1, 1))
+            A = sparse.bmat([
+                [self._xtx + self.alpha * sparse.identity(d, format="csr"), sx],
+                [sx.T, sparse.csr_matrix([[float(self.n_samples_)]])],
+            ], format="csc")
+            b = np.append(self._xty, self._sy)
+            sol = spsolve(A, b)
+        self._coef = sol[:d]
+        self._intercept = float(sol[d])
+        self._stale = False
+
+    @property
+    def seen_features(self) -> np.ndarray:
+        return self._xtx.diagonal() > 0
+
+    def predict(self, X) -> np.ndarray:
+        return np.asarray(X @ self.coef_).ravel() + self.intercept_
+
+
+class PredictionCache:
+    """Bounded LRU of scored messages keyed by (model version, cleaned message)."""
+
+    def __init__(self, max_size: int = 100_000):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# shared by every Simulator in the process with the same prediction_cache_size, so repeated
+# orchestrator runs reuse scores; each size gets its own cache, sized once when first used
+_PREDICTION_CACHES: Dict[int, PredictionCache] = {}
+_PREDICTION_CACHES_LOCK = threading.Lock()
+
+
+def shared_prediction_cache(max_size: int) -> Optional[PredictionCache]:
+    """The process-wide cache for ``max_size`` entries; None when ``max_size`` is 0."""
+    if not max_size:
+        return None
+    with _PREDICTION_CACHES_LOCK:
+        cache = _PREDICTION_CACHES.get(max_size)
+        if cache is None:
+            cache = _PREDICTION_CACHES[max_size] = PredictionCache(max_size)
+        return cache
+
+# per-worker cache of the read-only model snapshot used by parallel scoring
+_WORKER_SIMULATOR: Dict[str, "Simulator"] = {}
+
+
+def _score_shard(artifact_path: Optional[str], cfg: Dict[str, Any], messages: List[str]) -> List[Dict[str, Any]]:
+    sim = _WORKER_SIMULATOR.get(artifact_path)
+    if sim is None:
+        sim = Simulator(cfg)
+        if artifact_path is not None:
+            sim.load(artifact_path)
+        _WORKER_SIMULATOR.clear()
+        _WORKER_SIMULATOR[artifact_path] = sim
+    return sim._predict_uncached(messages)
 
 
 class Simulator:
@@ -18,10 +189,27 @@ class Simulator:
         self.min_train = sim_cfg.get("min_train_samples", 40)
         self.seed = sim_cfg.get("random_seed", 42)
         self.tfidf_max = sim_cfg.get("tfidf_max_features", 2000)
+        self.ngram_range = tuple(sim_cfg.get("ngram_range", (1, 2)))
+        self.alpha = sim_cfg.get("alpha", 1.0)
+        self.solver = sim_cfg.get("solver", "sparse_cg")
+        self.max_train_mb = sim_cfg.get("max_train_mb")
+        self.model_dir = sim_cfg.get("model_dir", "models")
+        self.mode = sim_cfg.get("mode", "full")
+        self.hash_features = sim_cfg.get("hash_features", 2 ** 14)
+        self.n_jobs = sim_cfg.get("n_jobs", 1)
+        self.chunk_size = sim_cfg.get("chunk_size", 50_000)
+        self.model_selection = sim_cfg.get("model_selection") or {}
+        self.cache = shared_prediction_cache(sim_cfg.get("prediction_cache_size", 100_000))
+        self._anon_version = None
         self.model = None
         self.vectorizer = None
         self.vectorizer_fitted = False
         self.feature_names = {}
+        self.model_key = None
+        self.trained_through = None
+        # incremental mode: rows folded so far per day ("" when the frame has no date column)
+        self.folded_rows: Dict[str, int] = {}
+        self.metrics = {}
         random.seed(self.seed)
         np.random.seed(self.seed)
 
@@ -32,83 +220,356 @@ class Simulator:
         s = re.sub(r"\s+", " ", s).strip()
         return s
 
+    def _hyperparams(self) -> Dict[str, Any]:
+        return {
+            "min_train_samples": self.min_train,
+            "random_seed": self.seed,
+            "tfidf_max_features": self.tfidf_max,
+            "ngram_range": list(self.ngram_range),
+            "alpha": self.alpha,
+            "solver": self.solver,
+            "max_train_mb": self.max_train_mb,
+            "mode": self.mode,
+            "hash_features": self.hash_features,
+            "artifact_version": ARTIFACT_VERSION,
+        }
+
+    def fingerprint(self, df: pd.DataFrame, message_col="creative_message", ctr_col="ctr") -> str:
+        h = hashlib.sha256()
+        h.update(pd.util.hash_pandas_object(df[[message_col, ctr_col]], index=False).values.tobytes())
+        h.update(json.dumps(self._hyperparams(), sort_keys=True).encode("utf-8"))
+        return h.hexdigest()[:16]
+
+    def _config_key(self) -> str:
+        return hashlib.sha256(json.dumps(self._hyperparams(), sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+    def _artifact_path(self, key: str) -> str:
+        return os.path.join(self.model_dir, f"simulator_{key}.joblib")
+
+    def save(self, path: Optional[str] = None) -> str:
+        if self.model is None:
+            raise ValueError("Simulator has no fitted model to save")
+        if path is None:
+            if self.model_key is None:
+                raise ValueError("No artifact path given and model has no fingerprint")
+            path = self._artifact_path(self.model_key)
+        import joblib
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        joblib.dump({
+            "artifact_version": ARTIFACT_VERSION,
+            "model_key": self.model_key,
+            "hyperparams": self._hyperparams(),
+            "vectorizer": self.vectorizer,
+            "model": self.model,
+            "feature_names": self.feature_names,
+            "vectorizer_fitted": self.vectorizer_fitted,
+            "trained_through": self.trained_through,
+            "folded_rows": self.folded_rows,
+            "metrics": self.metrics,
+        }, tmp)
+        os.replace(tmp, path)
+        return path
+
+    def load(self, path: str) -> bool:
+        import joblib
+
+        try:
+            art = joblib.load(path)
+        except (OSError, EOFError, ValueError):
+            return False
+        if art.get("artifact_version") != ARTIFACT_VERSION:
+            return False
+        self.vectorizer = art["vectorizer"]
+        self.model = art["model"]
+        self.feature_names = art["feature_names"]
+        self.model_key = art["model_key"]
+        self.vectorizer_fitted = art.get("vectorizer_fitted", True)
+        self.trained_through = art.get("trained_through")
+        self.folded_rows = art.get("folded_rows", {})
+        self.metrics = art.get("metrics", {})
+        return True
+
+    def train_or_load(self, df: pd.DataFrame, message_col="creative_message", ctr_col="ctr") -> Dict[str, Any]:
+        selection = None
+        if self.model_selection.get("enabled"):
+            selection = self.select_hyperparams(df, message_col, ctr_col)
+
+        key = self.fingerprint(df, message_col, ctr_col)
+        path = self._artifact_path(key)
+        info = None
+        if os.path.exists(path):
+            with span("simulator.load"):
+                loaded = self.load(path)
+            if loaded:
+                info = {"status": "loaded", "model_key": key, "path": path, "holdout": self.metrics.get("holdout"),
+                        "subsampled": self.metrics.get("subsampled", False)}
+
+        if info is None:
+            info = self.train_from_dataframe(df, message_col, ctr_col)
+            if info["status"] == "trained":
+                self.model_key = key
+                info["model_key"] = key
+                info["path"] = self.save(path)
+        if selection is not None:
+            info["model_selection"] = selection
+            if selection.get("best") is not None and info.get("holdout"):
+                # the holdout rows were also cross-validated during selection, so these
+                # metrics are optimistic for the chosen setting
+                info["holdout"] = {**info["holdout"], "after_selection": True}
+        return info
+
+    def select_hyperparams(self, df: pd.DataFrame, message_col="creative_message", ctr_col="ctr") -> Dict[str, Any]:
+        """Cross-validate the ``model_selection`` grid and adopt the best alpha /
+        tfidf_max_features / ngram_range. The outcome is stored next to the model
+        artifacts, keyed by data, base config and grid, so unchanged inputs skip the search."""
+        from src.agents.model_selection import RidgeGridSearch
+
+        df = df.dropna(subset=[message_col, ctr_col])
+        search = RidgeGridSearch.from_config(self)
+        # folds split distinct messages, so at least two are needed
+        if len(df) < max(self.min_train, 2 * search.folds) or df[message_col].nunique() < 2:
+            return {"status": "insufficient_data", "n_samples": int(len(df))}
+
+        h = hashlib.sha256(self.fingerprint(df, message_col, ctr_col).encode("utf-8"))
+        h.update(json.dumps(search.grid(), sort_keys=True).encode("utf-8"))
+        path = os.path.join(self.model_dir, f"selection_{h.hexdigest()[:16]}.json")
+        report = None
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    report = json.load(f)
+                report["status"] = "cached"
+            except (OSError, ValueError):
+                report = None
+
+        if report is None:
+            baseline = {"alpha": self.alpha, "tfidf_max_features": self.tfidf_max, "ngram_range": list(self.ngram_range)}
+            sample, _ = self._apply_memory_ceiling(df, message_col)
+            with span("simulator.model_selection", rows=len(sample)):
+                report = search.search(sample, message_col, ctr_col, baseline=baseline)
+            # the full table stays on disk; the summary goes into the training event
+            report["results"] = report["results"][:10]
+            report["status"] = "searched"
+            if report["best"] is not None:
+                os.makedirs(self.model_dir, exist_ok=True)
+                tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(report, f, indent=2)
+                os.replace(tmp, path)
+
+        best = report.get("best")
+        if best is not None:
+            self.alpha = best["alpha"]
+            self.tfidf_max = best["tfidf_max_features"]
+            self.ngram_range = tuple(best["ngram_range"])
+        return report
+
+    def partial_fit(self, df: pd.DataFrame, message_col="creative_message", ctr_col="ctr") -> Dict[str, Any]:
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        df = df.dropna(subset=[message_col, ctr_col])
+        if not isinstance(self.model, IncrementalRidge):
+            self.model = IncrementalRidge(alpha=self.alpha)
+            self.vectorizer = HashingVectorizer(
+                n_features=self.hash_features, ngram_range=self.ngram_range, stop_words="english", alternate_sign=False
+            )
+            self.feature_names = {"tfidf_vocabulary": [], "hash_features": self.hash_features, "extra": []}
+        if len(df):
+            with span("simulator.vectorize", rows=len(df)):
+                msgs = as_text_series(df[message_col])
+                X_hash = self.vectorizer.transform(clean_batch(msgs))
+                extra = self._extra_features(msgs, X_hash)
+                X = self._stack(X_hash, extra)
+            with span("simulator.fit", rows=len(df)):
+                self.model.partial_fit(X, df[ctr_col].astype(float).values)
+            self.feature_names["extra"] = list(extra.columns)
+
+        n_total = self.model.n_samples_
+        self.vectorizer_fitted = n_total >= self.min_train
+        self.model_key = f"incremental_{self._config_key()}_{n_total}"
+        return {
+            "status": "trained" if self.vectorizer_fitted else "insufficient_data",
+            "n_samples": n_total,
+            "n_new": int(len(df)),
+        }
+
+    def update_incremental(self, df: pd.DataFrame, message_col="creative_message", ctr_col="ctr", date_col="date") -> Dict[str, Any]:
+        # appends: per day, the rows past the count already folded are new, so rows arriving
+        # late for a day that was folded before are picked up and nothing is folded twice;
+        # without a date column the frame is one append-only log
+        path = self._artifact_path(f"incremental_{self._config_key()}")
+        if not isinstance(self.model, IncrementalRidge) and os.path.exists(path):
+            self.load(path)
+
+        if date_col in df.columns:
+            days = pd.to_datetime(df[date_col]).dt.strftime("%Y-%m-%d").fillna("")
+        else:
+            days = pd.Series("", index=df.index)
+        rank = days.groupby(days, sort=False).cumcount()
+        new = df[(rank >= days.map(self.folded_rows).fillna(0)).to_numpy()]
+        for day, n in days.value_counts().items():
+            self.folded_rows[day] = max(int(n), self.folded_rows.get(day, 0))
+        dated = [d for d in self.folded_rows if d]
+        self.trained_through = max(dated) if dated else None
+        if isinstance(self.model, IncrementalRidge) and new.empty:
+            return {"status": "up_to_date", "n_samples": self.model.n_samples_, "n_new": 0, "model_key": self.model_key}
+
+        info = self.partial_fit(new, message_col, ctr_col)
+        info["model_key"] = self.model_key
+        info["path"] = self.save(path)
+        return info
+
     def train_from_dataframe(self, df: pd.DataFrame, message_col="creative_message", ctr_col="ctr") -> Dict[str, Any]:
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.linear_model import Ridge
+        from sklearn.model_selection import train_test_split
+
+        self.model_key = None
         df = df.dropna(subset=[message_col, ctr_col])
         if len(df) < self.min_train:
             self.model = None
             self.vectorizer_fitted = False
             return {"status": "insufficient_data", "n_samples": int(len(df))}
 
-        msgs = df[message_col].astype(str).tolist()
+        rows_available = int(len(df))
+        df, subsampled = self._apply_memory_ceiling(df, message_col)
+        msgs = as_text_series(df[message_col])
         y = df[ctr_col].astype(float).values
 
-        self.vectorizer = TfidfVectorizer(max_features=self.tfidf_max, ngram_range=(1, 2), stop_words="english")
-        X_tfidf = self.vectorizer.fit_transform([self._clean(m) for m in msgs])
-
-        extra = pd.DataFrame({
-            "len_chars": [len(m) for m in msgs],
-            "len_words": [len(m.split()) for m in msgs],
-            "exclamations": [count_exclamations(m) for m in msgs],
-            "has_urgency": [1 if contains_urgency_words(m) else 0 for m in msgs],
-            "has_discount": [1 if contains_discount(m) else 0 for m in msgs],
-            "avg_tfidf": X_tfidf.mean(axis=1).A1
-        })
+        with span("simulator.vectorize", rows=len(df)):
+            self.vectorizer = TfidfVectorizer(max_features=self.tfidf_max, ngram_range=self.ngram_range, stop_words="english")
+            X_tfidf = self.vectorizer.fit_transform(clean_batch(msgs))
 
-        X_combined = np.hstack([X_tfidf.toarray(), extra.values])
+            extra = self._extra_features(msgs, X_tfidf)
+            X_combined = self._stack(X_tfidf, extra)
         X_train, X_hold, y_train, y_hold = train_test_split(X_combined, y, test_size=0.15, random_state=self.seed)
-        model = Ridge(alpha=1.0, random_state=self.seed)
-        model.fit(X_train, y_train)
+        with span("simulator.fit", rows=X_train.shape[0]):
+            model = Ridge(alpha=self.alpha, solver=self.solver, random_state=self.seed)
+            model.fit(X_train, y_train)
+        holdout = regression_metrics(y_hold, np.clip(model.predict(X_hold), 0.0, 1.0))
 
         self.model = model
+        # kept with the artifact so a later load still reports that not every row was used
+        self.metrics = {"holdout": holdout, "subsampled": subsampled, "rows_available": rows_available}
         self.vectorizer_fitted = True
+        self._anon_version = uuid.uuid4().hex
         self.feature_names = {
             "tfidf_vocabulary": list(self.vectorizer.get_feature_names_out()),
             "extra": list(extra.columns)
         }
-        return {"status": "trained", "n_samples": int(len(df))}
+        return {"status": "trained", "n_samples": int(len(df)), "rows_available": rows_available,
+                "subsampled": subsampled, "holdout": holdout}
+
+    def _extra_features(self, msgs, X_tfidf) -> pd.DataFrame:
+        msgs = as_text_series(msgs)
+        return pd.DataFrame({
+            "len_chars": msgs.str.len().to_numpy(),
+            "len_words": count_words_batch(msgs),
+            "exclamations": count_exclamations_batch(msgs),
+            "has_urgency": contains_urgency_words_batch(msgs).astype(np.int64),
+            "has_discount": contains_discount_batch(msgs).astype(np.int64),
+            "avg_tfidf": X_tfidf.mean(axis=1).A1
+        })
+
+    def _stack(self, X_tfidf, extra: pd.DataFrame) -> "sparse.csr_matrix":
+        from scipy import sparse
+
+        # keep the design matrix sparse: extra columns are appended as CSR, never densified
+        return sparse.hstack([X_tfidf, sparse.csr_matrix(extra.values.astype(np.float64))], format="csr")
+
+    def _apply_memory_ceiling(self, df: pd.DataFrame, message_col: str):
+        if not self.max_train_mb:
+            return df, False
+        # estimate CSR footprint per row from a sample: unigrams + bigrams + extras,
+        # 8 bytes of data + 4 bytes of column index per non-zero, x2 for the train/holdout copies
+        sample = df[message_col].astype(str).head(1000)
+        words = sample.str.split().str.len().fillna(0).mean() if len(sample) else 0.0
+        bytes_per_row = (2 * words + 6) * 12 * 2 + 8
+        max_rows = int(self.max_train_mb * 1024 * 1024 / max(bytes_per_row, 1.0))
+        if len(df) <= max_rows:
+            return df, False
+        return df.sample(n=max(max_rows, self.min_train), random_state=self.seed), True
 
     def _heuristic_score(self, msg: str) -> float:
+        return float(self._heuristic_scores([msg])[0])
+
+    def _heuristic_scores(self, messages) -> np.ndarray:
         base = 0.01
-        s = self._clean(msg)
-        score = base
-        if contains_urgency_words(s):
-            score += 0.01
-        if contains_discount(s):
-            score += 0.01
-        score += 0.0005 * len(s)
-        score += 0.002 * min(count_exclamations(s), 3)
-        return float(max(0.0, min(0.2, score)))
-
-    def predict(self, messages: List[str]) -> List[Dict[str, Any]]:
+        s = clean_batch(messages)
+        score = np.full(len(s), base)
+        score += 0.01 * contains_urgency_words_batch(s)
+        score += 0.01 * contains_discount_batch(s)
+        score += 0.0005 * s.str.len().to_numpy()
+        score += 0.002 * np.minimum(count_exclamations_batch(s), 3)
+        return np.clip(score, 0.0, 0.2)
+
+    def model_version(self) -> str:
+        if self.model is None or not self.vectorizer_fitted:
+            return "heuristic"
+        return self.model_key or self._anon_version or "unversioned"
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return self.cache.stats() if self.cache is not None else {}
+
+    def predict(self, messages: List[str], n_jobs: Optional[int] = None) -> List[Dict[str, Any]]:
+        if not messages:
+            return []
+        # score each distinct cleaned message once; repeats within the batch and across calls reuse it
+        cleaned = clean_batch(messages).tolist()
+        version = self.model_version()
+        scores = {}
+        missing = []
+        for c in dict.fromkeys(cleaned):
+            hit = self.cache.get((version, c)) if self.cache is not None else None
+            if hit is None:
+                missing.append(c)
+            else:
+                scores[c] = hit
+
+        if missing:
+            fresh = [p for shard in self.predict_parallel(missing, n_jobs) for p in shard]
+            for c, p in zip(missing, fresh):
+                p.pop("message")
+                scores[c] = p
+                if self.cache is not None:
+                    self.cache.put((version, c), p)
+
+        return [{"message": m, **scores[c]} for m, c in zip(messages, cleaned)]
+
+    def _predict_uncached(self, messages: List[str]) -> List[Dict[str, Any]]:
         if not messages:
             return []
         if self.model is None or not self.vectorizer_fitted:
-            out = []
-            for m in messages:
-                sc = self._heuristic_score(m)
-                out.append({"message": m, "predicted_ctr": sc, "confidence": 0.45, "model": "heuristic"})
-            return out
-
-        cleaned = [self._clean(m) for m in messages]
-        X_tfidf = self.vectorizer.transform(cleaned)
-        extra = pd.DataFrame({
-            "len_chars": [len(m) for m in cleaned],
-            "len_words": [len(m.split()) for m in cleaned],
-            "exclamations": [count_exclamations(m) for m in cleaned],
-            "has_urgency": [1 if contains_urgency_words(m) else 0 for m in cleaned],
-            "has_discount": [1 if contains_discount(m) else 0 for m in cleaned],
-            "avg_tfidf": X_tfidf.mean(axis=1).A1
-        })
-        X_combined = np.hstack([X_tfidf.toarray(), extra.values])
-        preds = self.model.predict(X_combined)
-        preds = np.clip(preds, 0.0, 1.0)
+            scores = self._heuristic_scores(messages)
+            return [
+                {"message": m, "predicted_ctr": float(sc), "confidence": 0.45, "model": "heuristic"}
+                for m, sc in zip(messages, scores)
+            ]
 
-        vocab = set(self.feature_names.get("tfidf_vocabulary", []))
+        with span("simulator.predict", rows=len(messages)):
+            cleaned = clean_batch(messages).tolist()
+            X_tfidf = self.vectorizer.transform(cleaned)
+            extra = self._extra_features(cleaned, X_tfidf)
+            preds = self.model.predict(self._stack(X_tfidf, extra))
+            preds = np.clip(preds, 0.0, 1.0)
+
+        with span("simulator.confidence", rows=len(messages)):
+            return self._with_confidence(messages, cleaned, X_tfidf, extra, preds)
+
+    def _with_confidence(self, messages, cleaned, X_tfidf, extra, preds) -> List[Dict[str, Any]]:
+        if isinstance(self.model, IncrementalRidge):
+            overlaps = X_tfidf[:, np.flatnonzero(self.model.seen_features[: X_tfidf.shape[1]])].getnnz(axis=1)
+        else:
+            vocab = set(self.feature_names.get("tfidf_vocabulary", []))
+            overlaps = [len(set(m.split()) & vocab) for m in cleaned]
+        has_urgency = extra["has_urgency"].values
+        has_discount = extra["has_discount"].values
         out = []
         for i, m in enumerate(cleaned):
-            tokens = set(m.split())
-            overlap = len(tokens & vocab)
-            conf = min(0.95, 0.4 + 0.01 * overlap + 0.05 * extra.loc[i, "has_urgency"] + 0.05 * extra.loc[i, "has_discount"])
+            overlap = overlaps[i]
+            conf = min(0.95, 0.4 + 0.01 * overlap + 0.05 * has_urgency[i] + 0.05 * has_discount[i])
             out.append({
                 "message": messages[i],
                 "predicted_ctr": float(preds[i]),
@@ -117,9 +578,33 @@ class Simulator:
             })
         return out
 
-    def simulate_batch(self, candidates_df: pd.DataFrame, message_col="creative_message", baseline_ctr: float = None) -> pd.DataFrame:
+    def predict_parallel(self, messages: List[str], n_jobs: Optional[int] = None) -> Iterator[List[Dict[str, Any]]]:
+        # shards are scored in a process pool and yielded back in input order as they complete
+        n_jobs = self.n_jobs if n_jobs is None else n_jobs
+        shards = [messages[i:i + self.chunk_size] for i in range(0, len(messages), self.chunk_size)]
+        if n_jobs == 1 or len(shards) <= 1:
+            for shard in shards:
+                yield self._predict_uncached(shard)
+            return
+
+        import joblib
+
+        # workers load one snapshot of the fitted model each instead of unpickling it per shard
+        snapshot_dir = tempfile.mkdtemp(prefix="simulator_")
+        try:
+            artifact_path = None
+            if self.model is not None:
+                artifact_path = self.save(os.path.join(snapshot_dir, "model.joblib"))
+            yield from joblib.Parallel(n_jobs=n_jobs, return_as="generator")(
+                joblib.delayed(_score_shard)(artifact_path, self.cfg, shard) for shard in shards
+            )
+        finally:
+            shutil.rmtree(snapshot_dir, ignore_errors=True)
+
+    def simulate_batch(self, candidates_df: pd.DataFrame, message_col="creative_message", baseline_ctr: float = None,
+                       n_jobs: Optional[int] = None) -> pd.DataFrame:
         msgs = candidates_df[message_col].astype(str).tolist()
-        preds = self.predict(msgs)
+        preds = self.predict(msgs, n_jobs=n_jobs)
         res = pd.DataFrame(preds)
         if baseline_ctr is None:
             baseline_ctr = 0.01
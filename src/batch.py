@@ -0,0 +1,229 @@
+import json
+import multiprocessing as mp
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.orchestrator import Orchestrator
+
+# set once per worker process by _init_worker; with the fork start method the campaign-sorted
+# frame is inherited from the parent instead of being pickled
+_STATE: Dict[str, Any] = {}
+
+
+def load_items(path: str) -> List[Dict[str, Any]]:
+    """Batch file: a YAML list (or ``items:`` list) of {name, query, campaign(s)} entries."""
+    import yaml
+
+    spec = yaml.safe_load(open(path, "r")) or []
+    items = spec.get("items", []) if isinstance(spec, dict) else spec
+    out = []
+    for i, item in enumerate(items):
+        if isinstance(item, str):
+            item = {"query": item}
+        campaigns = item.get("campaigns", item.get("campaign"))
+        if isinstance(campaigns, str):
+            campaigns = [campaigns]
+        out.append({
+            "name": item.get("name") or (campaigns[0] if campaigns else f"item_{i + 1}"),
+            "query": item.get("query", "Analyze ROAS drop"),
+            "campaigns": campaigns,
+        })
+    return out
+
+
+def campaign_items(df, query: str = "Analyze ROAS drop") -> List[Dict[str, Any]]:
+    names = df["campaign_name"].dropna().unique()
+    return [{"name": str(n), "query": query, "campaigns": [n]} for n in sorted(names, key=str)]
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", str(name)).strip("_")[:40] or "item"
+
+
+def _init_worker(state: Dict[str, Any]):
+    from src.agents.simulator import Simulator
+
+    _STATE.clear()
+    _STATE.update(state)
+    sim = Simulator(state["cfg"])
+    if state["artifact_path"]:
+        sim.load(state["artifact_path"])
+    _STATE["sim"] = sim
+    _STATE["orchestrator"] = Orchestrator(state["cfg"])
+
+
+def _item_rows(item: Dict[str, Any], bounds: Dict[Any, Tuple[int, int]]):
+    """Rows of an item in the campaign-sorted frame: a slice for one campaign (a view, no
+    copy), sorted positions for several, None for the whole frame."""
+    if not item["campaigns"]:
+        return None
+    spans = [bounds[c] for c in item["campaigns"] if c in bounds]
+    if not spans:
+        raise KeyError(f"no rows for campaign(s) {item['campaigns']}")
+    if len(spans) == 1:
+        return slice(*spans[0])
+    return np.sort(np.concatenate([np.arange(a, b) for a, b in spans]))
+
+
+def _row_count(rows, total: int) -> Optional[int]:
+    """Rows an ``_item_rows`` result selects; None when the item failed to resolve."""
+    if isinstance(rows, Exception):
+        return None
+    if rows is None:
+        return total
+    return rows.stop - rows.start if isinstance(rows, slice) else len(rows)
+
+
+def _run_item(index: int, item: Dict[str, Any], rows) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    df = _STATE["df"]
+    run_id = f"{_STATE['batch_id']}_{index:04d}_{_slug(item['name'])}"
+    try:
+        if isinstance(rows, Exception):
+            raise rows
+        sub = df if rows is None else df.iloc[rows] if isinstance(rows, slice) else df.take(rows)
+        pdf = _STATE["orchestrator"].run_item(
+            sub, _STATE["sim"], run_id,
+            title=f"Agentic FB Performance Report - {item['name']}",
+            query=item["query"],
+            output_dir=_STATE["out_dir"],
+        )
+        return {"index": index, "name": item["name"], "status": "ok", "rows": len(sub), "pdf_path": pdf,
+                "seconds": time.perf_counter() - t0}
+    except Exception as e:
+        return {"index": index, "name": item["name"], "status": "error", "error": f"{type(e).__name__}: {e}",
+                "traceback": traceback.format_exc(), "seconds": time.perf_counter() - t0}
+
+
+class BatchRunner:
+    """One report per item (client query or campaign) from a single load + training.
+
+    The frame is loaded and the Simulator fitted once (``Orchestrator.prepare_batch``), then
+    the frame is sorted by campaign so each campaign is one contiguous block. Workers share
+    that frame (forked copy-on-write) and are sent only an item's row range, which they
+    slice without copying. Per-item analysis and PDF rendering (``Orchestrator.run_item``)
+    run in a process pool of ``batch.workers`` processes; results are reported per item as
+    they finish and failures do not stop the batch. Items with fewer than ``batch.min_rows``
+    rows are skipped.
+    """
+
+    def __init__(self, cfg: Dict[str, Any], orchestrator: Optional[Orchestrator] = None):
+        batch_cfg = cfg.get("batch", {})
+        self.cfg = cfg
+        self.orchestrator = orchestrator or Orchestrator(cfg)
+        self.workers = batch_cfg.get("workers") or os.cpu_count() or 1
+        self.output_dir = batch_cfg.get("output_dir") or cfg.get("report", {}).get("pdf_output_dir", "reports")
+        self.min_rows = batch_cfg.get("min_rows", 3)
+
+    def _mp_context(self):
+        # fork shares the loaded frame copy-on-write; elsewhere the state is pickled once per worker
+        methods = mp.get_all_start_methods()
+        return mp.get_context("fork" if "fork" in methods and sys.platform != "darwin" else "spawn")
+
+    def run(self, items: Optional[List[Dict[str, Any]]] = None, query: str = "Analyze ROAS drop") -> Dict[str, Any]:
+        batch_id = "batch_" + uuid.uuid4().hex[:8]
+        t0 = time.perf_counter()
+
+        memory, df, sim, train_info = self.orchestrator.prepare_batch(batch_id)
+        items = items if items is not None else campaign_items(df, query)
+        df, bounds = self._by_campaign(df)
+        # items below batch.min_rows are skipped: too few rows to test or chart anything
+        todo, results = [], []
+        for i, item in enumerate(items):
+            try:
+                r = _item_rows(item, bounds)
+            except KeyError as e:
+                r = e
+            n = _row_count(r, len(df))
+            if n is not None and n < self.min_rows:
+                results.append(self._report({"index": i, "name": item["name"], "status": "skipped", "rows": n,
+                                             "seconds": 0.0}, len(results) + 1, len(items)))
+            else:
+                todo.append((i, item, r))
+        print(f"> {batch_id}: {len(todo)} reports from {len(df)} rows, {self.workers} workers")
+
+        out_dir = os.path.join(self.output_dir, batch_id)
+        snapshot_dir = tempfile.mkdtemp(prefix="batch_")
+        try:
+            artifact = sim.save(os.path.join(snapshot_dir, "model.joblib")) if sim.model is not None else None
+            state = {"cfg": self.cfg, "out_dir": out_dir, "df": df, "artifact_path": artifact, "batch_id": batch_id}
+
+            if self.workers <= 1:
+                _init_worker(state)
+                outcomes = (_run_item(i, item, r) for i, item, r in todo)
+                for res in outcomes:
+                    results.append(self._report(res, len(results) + 1, len(items)))
+            else:
+                with ProcessPoolExecutor(self.workers, mp_context=self._mp_context(),
+                                         initializer=_init_worker, initargs=(state,)) as pool:
+                    futures = [pool.submit(_run_item, i, item, r) for i, item, r in todo]
+                    for fut in as_completed(futures):
+                        results.append(self._report(fut.result(), len(results) + 1, len(items)))
+        finally:
+            shutil.rmtree(snapshot_dir, ignore_errors=True)
+            # the inline path filled _STATE in this process; do not keep the frame and model alive
+            _STATE.clear()
+
+        results.sort(key=lambda r: r["index"])
+        elapsed = time.perf_counter() - t0
+        failed = [r for r in results if r["status"] == "error"]
+        manifest = {
+            "batch_id": batch_id,
+            "items": len(items),
+            "succeeded": sum(r["status"] == "ok" for r in results),
+            "failed": len(failed),
+            "skipped": sum(r["status"] == "skipped" for r in results),
+            "min_rows": self.min_rows,
+            "seconds": elapsed,
+            "reports_per_second": len(items) / elapsed if elapsed else 0.0,
+            "workers": self.workers,
+            "training": train_info,
+            "results": [{k: v for k, v in r.items() if k != "traceback"} for r in results],
+        }
+        os.makedirs(out_dir, exist_ok=True)
+        manifest["manifest_path"] = os.path.join(out_dir, "manifest.json")
+        with open(manifest["manifest_path"], "w") as f:
+            json.dump(manifest, f, indent=2, default=str)
+        memory.append_event({
+            "type": "batch",
+            "run_id": batch_id,
+            "items": len(items),
+            "failed": len(failed),
+            "skipped": manifest["skipped"],
+            "seconds": elapsed,
+        })
+        print(f"> {batch_id}: {manifest['succeeded']}/{len(items)} reports in {elapsed:.1f}s -> {out_dir}")
+        return manifest
+
+    @staticmethod
+    def _by_campaign(df):
+        """The frame reordered so each campaign's rows are contiguous (original order kept
+        within a campaign), and each campaign's [start, stop) row range."""
+        codes, names = pd.factorize(df["campaign_name"])
+        order = np.argsort(codes, kind="stable")
+        df = df.take(order).reset_index(drop=True)
+        counts = np.bincount(codes[codes >= 0], minlength=len(names))
+        # NaN campaigns (code -1) sort first and belong to no item
+        stops = np.cumsum(counts) + int((codes < 0).sum())
+        return df, {name: (int(stop - n), int(stop)) for name, n, stop in zip(names, counts, stops)}
+
+    @staticmethod
+    def _report(res: Dict[str, Any], done: int, total: int) -> Dict[str, Any]:
+        if res["status"] == "ok":
+            print(f"[{done}/{total}] ok     {res['name']} ({res['rows']} rows, {res['seconds']:.2f}s) -> {res['pdf_path']}")
+        elif res["status"] == "skipped":
+            print(f"[{done}/{total}] skip   {res['name']} ({res['rows']} rows)")
+        else:
+            print(f"[{done}/{total}] FAILED {res['name']}: {res['error']}")
+        return res
@@ -0,0 +1,239 @@
+import json
+import os
+import sqlite3
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # non-POSIX: JSONL appends are not cross-process locked
+    fcntl = None
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+class JsonMemoryBackend:
+    """Original single-document store: every write rewrites the whole JSON file."""
+
+    def __init__(self, path: str, max_events: int = 500):
+        self.path = path
+        self.max_events = max_events
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        if not os.path.exists(self.path):
+            self._init_store()
+        self._load()
+
+    def _init_store(self):
+        with open(self.path, "w") as f:
+            json.dump({"meta": {"created": _now()}, "store": {}, "events": []}, f, indent=2)
+
+    def _load(self):
+        with open(self.path, "r") as f:
+            self._data = json.load(f)
+
+    def _save(self):
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._data, f, indent=2)
+        os.replace(tmp, self.path)
+
+    def remember(self, key: str, value: Any):
+        with self._lock:
+            self._data["store"][key] = {"value": value, "ts": _now()}
+            self._save()
+
+    def recall(self, key: str, default=None):
+        return self._data["store"].get(key, {}).get("value", default)
+
+    def append_event(self, event: Dict):
+        with self._lock:
+            self._data["events"].append(event)
+            if len(self._data["events"]) > self.max_events:
+                self._data["events"] = self._data["events"][-self.max_events:]
+            self._save()
+
+    def list_events(self, limit: int = 50, run_id: Optional[str] = None) -> List[Dict]:
+        events = self._data["events"]
+        if run_id is not None:
+            events = [e for e in events if e.get("run_id") == run_id]
+        return events[-limit:]
+
+
+class SqliteMemoryBackend:
+    """SQLite in WAL mode: O(1) writes, key/run_id indexes, safe across processes."""
+
+    def __init__(self, path: str, max_events: int = 500):
+        self.path = path
+        self.max_events = max_events
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS store (key TEXT PRIMARY KEY, value TEXT NOT NULL, ts TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id TEXT,
+                type TEXT,
+                ts TEXT NOT NULL,
+                payload TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_events_run_id ON events (run_id);
+            """
+        )
+
+    def remember(self, key: str, value: Any):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO store (key, value, ts) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, ts = excluded.ts",
+                (key, json.dumps(value), _now()),
+            )
+
+    def recall(self, key: str, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM store WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def append_event(self, event: Dict):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                cur = self._conn.execute(
+                    "INSERT INTO events (run_id, type, ts, payload) VALUES (?, ?, ?, ?)",
+                    (event.get("run_id"), event.get("type"), event["ts"], json.dumps(event)),
+                )
+                self._conn.execute("DELETE FROM events WHERE id <= ?", (cur.lastrowid - self.max_events,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def list_events(self, limit: int = 50, run_id: Optional[str] = None) -> List[Dict]:
+        with self._lock:
+            if run_id is None:
+                rows = self._conn.execute("SELECT payload FROM events ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT payload FROM events WHERE run_id = ? ORDER BY id DESC LIMIT ?", (run_id, limit)
+                ).fetchall()
+        return [json.loads(r[0]) for r in reversed(rows)]
+
+    def close(self):
+        self._conn.close()
+
+
+class JsonlMemoryBackend:
+    """Append-only JSON-lines log replayed into an in-memory index, compacted when it grows stale.
+
+    Writers append one line while holding an exclusive lock on a sidecar ``.lock`` file; readers
+    tail new lines before each read and reload from scratch when the log has been compacted
+    (replaced) by another process.
+    """
+
+    def __init__(self, path: str, max_events: int = 500, compact_ratio: float = 4.0):
+        self.path = path
+        self.max_events = max_events
+        self.compact_ratio = compact_ratio
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._lock_path = self.path + ".lock"
+        open(self.path, "ab").close()
+        self._reset()
+
+    def _reset(self):
+        self._store: Dict[str, Dict] = {}
+        self._events = deque(maxlen=self.max_events)
+        self._offset = 0
+        self._lines = 0
+        self._inode = None
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool):
+        with self._lock, open(self._lock_path, "ab") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+
+    def _apply(self, rec: Dict):
+        if rec.get("op") == "remember":
+            self._store[rec["key"]] = {"value": rec["value"], "ts": rec["ts"]}
+        elif rec.get("op") == "event":
+            self._events.append(rec["event"])
+
+    def _catch_up(self):
+        with open(self.path, "rb") as f:
+            st = os.fstat(f.fileno())
+            if self._inode != st.st_ino or st.st_size < self._offset:
+                self._reset()
+                self._inode = st.st_ino
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                self._offset += len(line)
+                self._lines += 1
+                self._apply(json.loads(line))
+
+    def _append(self, rec: Dict):
+        line = (json.dumps(rec) + "\n").encode("utf-8")
+        with self._file_lock(exclusive=True):
+            self._catch_up()
+            with open(self.path, "ab") as f:
+                f.write(line)
+            self._offset += len(line)
+            self._lines += 1
+            self._apply(rec)
+            if self._lines > self.compact_ratio * (len(self._store) + len(self._events)) + 1000:
+                self._compact()
+
+    def _compact(self):
+        # caller holds the exclusive lock; other processes see a new inode and replay the snapshot
+        tmp = self.path + ".compact"
+        with open(tmp, "w") as out:
+            for key, entry in self._store.items():
+                out.write(json.dumps({"op": "remember", "key": key, "value": entry["value"], "ts": entry["ts"]}) + "\n")
+            for event in self._events:
+                out.write(json.dumps({"op": "event", "event": event}) + "\n")
+        os.replace(tmp, self.path)
+        self._reset()
+        self._catch_up()
+
+    def compact(self):
+        with self._file_lock(exclusive=True):
+            self._catch_up()
+            self._compact()
+
+    def remember(self, key: str, value: Any):
+        self._append({"op": "remember", "key": key, "value": value, "ts": _now()})
+
+    def recall(self, key: str, default=None):
+        with self._file_lock(exclusive=False):
+            self._catch_up()
+        return self._store.get(key, {}).get("value", default)
+
+    def append_event(self, event: Dict):
+        self._append({"op": "event", "event": event})
+
+    def list_events(self, limit: int = 50, run_id: Optional[str] = None) -> List[Dict]:
+        with self._file_lock(exclusive=False):
+            self._catch_up()
+        events = list(self._events)
+        if run_id is not None:
+            events = [e for e in events if e.get("run_id") == run_id]
+        return events[-limit:]
+
+
+BACKENDS = {
+    "json": JsonMemoryBackend,
+    "sqlite": SqliteMemoryBackend,
+    "jsonl": JsonlMemoryBackend,
+}
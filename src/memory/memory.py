@@ -1,48 +1,37 @@
-import json
-import os
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
+
+from src.memory.backends import BACKENDS
 
 
 class Memory:
-    def __init__(self, path: str = "memory/memory.json", max_events: int = 500):
+    def __init__(self, path: str = "memory/memory.json", max_events: int = 500, backend: str = "json"):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown memory backend '{backend}', expected one of {sorted(BACKENDS)}")
         self.path = path
         self.max_events = max_events
-        os.makedirs(os.path.dirname(self.path), exist_ok=True)
-        if not os.path.exists(self.path):
-            self._init_store()
-        self._load()
-
-    def _init_store(self):
-        with open(self.path, "w") as f:
-            json.dump(
-                {"meta": {"created": datetime.utcnow().isoformat()}, "store": {}, "events": []},
-                f,
-                indent=2,
-            )
-
-    def _load(self):
-        with open(self.path, "r") as f:
-            self._data = json.load(f)
-
-    def _save(self):
-        with open(self.path, "w") as f:
-            json.dump(self._data, f, indent=2)
+        self.backend_name = backend
+        self.backend = BACKENDS[backend](path, max_events)
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any]) -> "Memory":
+        mem_cfg = cfg.get("memory", {})
+        return cls(
+            mem_cfg.get("path", "memory/memory.json"),
+            max_events=mem_cfg.get("max_events", 500),
+            backend=mem_cfg.get("backend", "json"),
+        )
 
     def remember(self, key: str, value: Any):
-        self._data["store"][key] = {"value": value, "ts": datetime.utcnow().isoformat()}
-        self._save()
+        self.backend.remember(key, value)
 
     def recall(self, key: str, default=None):
-        return self._data["store"].get(key, {}).get("value", default)
+        return self.backend.recall(key, default)
 
     def append_event(self, event: Dict):
         event = dict(event)
         event["ts"] = datetime.utcnow().isoformat()
-        self._data["events"].append(event)
-        if len(self._data["events"]) > self.max_events:
-            self._data["events"] = self._data["events"][-self.max_events :]
-        self._save()
+        self.backend.append_event(event)
 
-    def list_events(self, limit: int = 50) -> List[Dict]:
-        return self._data["events"][-limit:]
+    def list_events(self, limit: int = 50, run_id: Optional[str] = None) -> List[Dict]:
+        return self.backend.list_events(limit, run_id=run_id)
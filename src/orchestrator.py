@@ -1,26 +1,65 @@
-import pandas as pd
+import os
+import threading
 import uuid
 from pathlib import Path
 
+import numpy as np
+
 from src.agents.planner import PlannerAgent
 from src.agents.data_agent import DataAgent
 from src.agents.insight_agent import InsightAgent
 from src.agents.evaluator_agent import EvaluatorAgent
 from src.agents.creative_generator import CreativeAgent
 
-from src.agents.simulator import Simulator
 from src.memory.memory import Memory
-from src.utils.report_pdf import PdfReport
+from src.utils.dag import run_dag
+from src.utils.segment_cube import SegmentCube
+from src.utils.stage_cache import StageCache
+from src.utils.tracing import Tracer, activate, span
+
+# Simulator (sklearn/scipy/joblib) and PdfReport (reportlab) are imported inside the
+# stages that use them so CLI startup does not pay for them up front
+
+# config sections each stage reads; they are part of its stage-cache key
+STAGE_CONFIG = {
+    "load_data": ["seed", "data", "evaluation"],
+    "generate_insights": ["thresholds", "insights", "stats", "evaluation", "near_duplicates"],
+    "validate_insights": ["thresholds", "stats", "evaluation", "near_duplicates"],
+    "generate_creatives": ["seed", "thresholds", "near_duplicates"],
+    "train_simulator": ["simulator"],
+    "simulate_creatives": ["simulator"],
+    "search_creatives": ["simulator", "creative_search"],
+    "optimize_budget": ["budget", "evaluation"],
+    "build_report": ["report"],
+}
+# the Simulator persists its own model artifacts, and every run renders its own report
+UNCACHED_STAGES = ["train_simulator", "build_report"]
 
 
 class Orchestrator:
-    def __init__(self, cfg):
+    def __init__(self, cfg, warm: bool = False):
         self.cfg = cfg
         self.planner = PlannerAgent(cfg)
         self.data_agent = DataAgent(cfg)
         self.insight_agent = InsightAgent(cfg)
         self.evaluator = EvaluatorAgent(cfg)
         self.creative_agent = CreativeAgent(cfg)
+        self.max_workers = cfg.get("orchestrator", {}).get("max_workers", 4)
+        trace_cfg = cfg.get("tracing", {})
+        self.tracing = trace_cfg.get("enabled", True)
+        self.trace_dir = trace_cfg.get("chrome_trace_dir")
+        self.log_spans = trace_cfg.get("log_spans", True)
+        # warm mode keeps stage inputs in memory already, so only cold runs use the stage cache
+        self.stage_cache = cfg.get("stage_cache", {}).get("enabled", True) and not warm
+
+        # warm mode (long-running service): keep the frame, fitted Simulator and Memory
+        # handle between runs and reload only when the data file changes
+        self.warm = warm
+        self._warm_lock = threading.Lock()
+        self._warm_train_lock = threading.Lock()
+        self._warm_data = None
+        self._warm_sim = None
+        self._warm_memory = None
 
         Path("logs").mkdir(exist_ok=True)
         Path("reports").mkdir(exist_ok=True)
@@ -30,72 +69,305 @@ class Orchestrator:
     def run(self, query):
         print("\n=== PIPELINE START ===")
 
-        # 1️⃣ Planner: break down tasks
+        # 1️⃣ Planner: break down tasks into a stage dependency graph
         plan = self.planner.create_plan(query)
-        print("Plan:", plan)
+        print("Plan:", plan["steps"])
+
+        run_id = "run_" + uuid.uuid4().hex[:8]
+        memory = self._memory()
+        warm_lam = self._budget_optimizer().warm_lam(memory)
+
+        stages = {
+            # 2️⃣ Data Agent: load + summarize CSV
+            "load_data": lambda r: self._load_data(),
+            # 3️⃣ Insight Agent: generate hypotheses
+            "generate_insights": lambda r: self._generate_insights(r["load_data"][1], r["load_data"][2]),
+            # 4️⃣ Evaluator Agent: validate hypotheses
+            "validate_insights": lambda r: self._validate_insights(r["generate_insights"], r["load_data"][0]),
+            # 5️⃣ Creative Generator: produce low CTR creatives
+            "generate_creatives": lambda r: self._generate_creatives(r["load_data"][0]),
+            # 6️⃣ Tier-3 Simulator + Memory + PDF
+            "train_simulator": lambda r: self._train_simulator(r["load_data"][0], memory, run_id),
+            "simulate_creatives": lambda r: self._simulate(r["train_simulator"][0], r["generate_creatives"]),
+            "search_creatives": lambda r: self._search_creatives(r["train_simulator"][0], r["load_data"][0]),
+            "optimize_budget": lambda r: self._optimize_budget(r["load_data"][0], warm_lam),
+            "build_report": lambda r: self._build_report(
+                run_id, r["validate_insights"], r["simulate_creatives"][0], r["search_creatives"][0], r["optimize_budget"]
+            ),
+        }
+        cache = StageCache.from_config(self.cfg, exclude=UNCACHED_STAGES) if self.stage_cache else None
+        tracer = Tracer(run_id, log_spans=self.log_spans) if self.tracing else None
+        with activate(tracer):
+            results, timings = run_dag(
+                stages, plan["dependencies"], self.max_workers,
+                cache=cache, cache_keys=self._stage_cache_keys() if cache else None
+            )
+        # stage bodies stay free of Memory writes so a cache hit records the same as a run
+        self._remember_results(
+            memory, run_id, results["simulate_creatives"][1], results["search_creatives"], results["optimize_budget"]
+        )
+
+        sim = results["train_simulator"][0]
+        event = {
+            "type": "pipeline_timing",
+            "timings": timings,
+            "run_id": run_id
+        }
+        trace_path = None
+        if cache is not None:
+            event["stage_cache"] = cache.report()
+        if tracer is not None:
+            event["trace"] = tracer.summary()
+            if self.trace_dir:
+                trace_path = event["trace_path"] = tracer.write_chrome_trace(self.trace_dir)
+        memory.append_event(event)
+
+        print("Stage timings:", {k: round(v["seconds"], 3) for k, v in timings.items()})
+        if cache is not None:
+            print("Stage cache:", {k: event["stage_cache"][k] for k in ("hits", "misses")})
+        print("=== PIPELINE COMPLETE ===\n")
+        return {
+            "run_id": run_id,
+            "sim_results": results["simulate_creatives"][0].to_dict(orient="records"),
+            "prediction_cache": sim.cache_stats(),
+            "training": _training_summary(results["train_simulator"][1]),
+            "top_variants": _records(results["search_creatives"][0]),
+            "budget": results["optimize_budget"]["summary"],
+            "pdf_path": results["build_report"],
+            "timings": timings,
+            "stage_cache": event.get("stage_cache"),
+            "trace_path": trace_path
+        }
+
+    def _stage_cache_keys(self):
+        keys = {stage: {s: self.cfg.get(s) for s in sections} for stage, sections in STAGE_CONFIG.items()}
+        # the data file enters by content, so touching it without edits still hits
+        keys["load_data"]["source"] = self.data_agent.source_fingerprint()
+        return keys
+
+    def invalidate_stage_cache(self, stages=None):
+        return StageCache.from_config(self.cfg).invalidate(stages)
+
+    # -----------------------------
+    # Stages
+    # -----------------------------
+    def _memory(self):
+        if not self.warm:
+            return Memory.from_config(self.cfg)
+        with self._warm_lock:
+            if self._warm_memory is None:
+                self._warm_memory = Memory.from_config(self.cfg)
+            return self._warm_memory
+
+    def _data_stamp(self):
+        st = os.stat(self.data_agent.path)
+        return st.st_mtime_ns, st.st_size
 
-        # 2️⃣ Data Agent: load + summarize CSV
-        df, summary = self.data_agent.load_and_summarize()
+    def _load_data(self):
+        # the segment cube is built once here and shared by every insight query
+        if not self.warm:
+            return self._load_for_analysis()
+
+        with self._warm_lock:
+            stamp = self._data_stamp()
+            if self._warm_data is None or self._warm_data[0] != stamp:
+                self._warm_data = (stamp, *self._load_for_analysis())
+            return self._warm_data[1:]
+
+    def _load_for_analysis(self):
+        with span("DataAgent.load_for_analysis") as sp:
+            df, summary, cube = self.data_agent.load_for_analysis()
+            sp.update(rows=len(df), cube_rows=len(cube))
         print("Data loaded:", df.shape)
+        return df, summary, cube
 
-        # 3️⃣ Insight Agent: generate hypotheses
-        insights = self.insight_agent.generate(summary)
+    def _generate_insights(self, summary, cube=None):
+        with span("InsightAgent.generate", rows=len(cube) if cube is not None else 0) as sp:
+            insights = self.insight_agent.generate(summary, cube)
+            sp["hypotheses"] = len(insights["hypotheses"])
         print("Generated hypotheses:", len(insights["hypotheses"]))
+        return insights
 
-        # 4️⃣ Evaluator Agent: validate hypotheses
-        validated = self.evaluator.validate(insights, df)
+    def _validate_insights(self, insights, df):
+        with span("EvaluatorAgent.validate", rows=len(df), hypotheses=len(insights["hypotheses"])):
+            validated = self.evaluator.validate(insights, df)
         print("Validated hypotheses.")
+        return validated
 
-        # 5️⃣ Creative Generator: produce low CTR creatives
-        creative_candidates = self.creative_agent.generate(df)
+    def _generate_creatives(self, df):
+        with span("CreativeAgent.generate", rows=len(df)) as sp:
+            creative_candidates = self.creative_agent.generate(df)
+            sp["candidates"] = len(creative_candidates)
         print("Generated creative candidates:", len(creative_candidates))
+        return creative_candidates
 
-        # 6️⃣ Tier-3 Simulator + Memory + PDF
-        result = self.run_tier3(df, creative_candidates, validated)
+    def _train_simulator(self, df, memory, run_id):
+        if not self.warm:
+            return self._fit_simulator(df, memory, run_id)
+        # single-flight: concurrent queries wait for one fit instead of each training their own
+        with self._warm_train_lock:
+            if self._warm_sim is not None and self._warm_sim[0] is df:
+                warm = self._warm_sim[1]
+                return warm, {"status": "warm", "model_key": warm.model_key,
+                              "subsampled": warm.metrics.get("subsampled", False)}
+            sim, train_info = self._fit_simulator(df, memory, run_id)
+            self._warm_sim = (df, sim)
+            return sim, train_info
 
-        print("=== PIPELINE COMPLETE ===\n")
-        return result
+    def _fit_simulator(self, df, memory, run_id):
+        from src.agents.simulator import Simulator
 
-
-    # -----------------------------
-    # Tier-3 Enhanced Pipeline
-    # -----------------------------
-    def run_tier3(self, df, creative_candidates, validated_insights):
-        run_id = "run_" + uuid.uuid4().hex[:8]
-
-        memory = Memory(self.cfg["memory"]["path"])
         sim = Simulator(self.cfg)
 
-        # Train simulator
-        train_info = sim.train_from_dataframe(df)
+        # Train simulator (reuses the persisted model when data + hyperparams are unchanged;
+        # in incremental mode only rows newer than the stored watermark are folded in)
+        with span("Simulator.train", rows=len(df), mode=sim.mode) as sp:
+            if sim.mode == "incremental":
+                train_info = sim.update_incremental(df)
+            else:
+                train_info = sim.train_or_load(df)
+            sp["status"] = train_info.get("status")
+        if train_info.get("subsampled"):
+            print(f"Simulator trained on a {train_info.get('n_samples')}-row sample of "
+                  f"{train_info.get('rows_available', 'all')} rows (simulator.max_train_mb)")
         memory.append_event({
             "type": "training",
             "info": train_info,
             "run_id": run_id
         })
+        return sim, train_info
 
+    def _simulate(self, sim, creative_candidates):
         # Predict CTR for creative candidates
-        predictions = sim.simulate_batch(creative_candidates)
-        top_preds = predictions.sort_values("predicted_ctr", ascending=False).head(10)
+        with span("Simulator.simulate_batch", rows=len(creative_candidates)):
+            predictions = sim.simulate_batch(creative_candidates)
+        top_preds = predictions.nlargest(10, "predicted_ctr")
+        return predictions, top_preds
+
+    def _search_creatives(self, sim, df):
+        from src.agents.creative_search import CreativeSearch
+
+        search_cfg = self.cfg.get("creative_search", {})
+        if not search_cfg.get("enabled", True):
+            return None, None
+        # variants are generated for the highest-spend campaigns
+        spend = df.groupby("campaign_name", observed=True)["spend"].sum().sort_values(ascending=False)
+        campaigns = spend.index[: search_cfg.get("max_campaigns", 20)].tolist()
+        search = CreativeSearch(sim, self.cfg)
+        with span("CreativeSearch.run", campaigns=len(campaigns)):
+            top = search.search(campaigns)
+        print(f"Searched {search.stats['variants']} creative variants (scored {search.stats['scored']})")
+        return top, search.stats
+
+    def _budget_optimizer(self):
+        from src.agents.budget_optimizer import BudgetOptimizer
+
+        return BudgetOptimizer(self.cfg)
 
+    def _optimize_budget(self, df, warm_lam=None):
+        with span("BudgetOptimizer.optimize", rows=len(df)) as sp:
+            result = self._budget_optimizer().optimize(df, warm_lam=warm_lam)
+            sp.update(units=result["summary"]["units"], iterations=result["summary"].get("iterations"))
+        print("Budget reallocation:", {k: result["summary"].get(k) for k in ("units", "revenue_uplift_pct", "warm_start")})
+        return result
+
+    def _remember_results(self, memory, run_id, top_preds, search=(None, None), budget=None):
         memory.remember(run_id + "_top_predictions", top_preds.to_dict(orient="records"))
+        variants, stats = search
+        if variants is not None:
+            memory.remember(run_id + "_top_variants", {"stats": stats, "variants": variants.to_dict(orient="records")})
+        if budget is not None:
+            self._budget_optimizer().remember(memory, budget)
+            memory.append_event({
+                "type": "budget",
+                "summary": budget["summary"],
+                "run_id": run_id
+            })
 
-        # Build PDF report
-        pdf = PdfReport("reports").build(
-            run_id=run_id,
-            title="Agentic FB Performance Report",
-            executive_summary=validated_insights["summary"],
-            hypotheses=validated_insights["hypotheses"],
-            creatives=top_preds.to_dict(orient="records"),
-            actions=[
-                "A/B Test top creatives",
-                "Shift budget to high CVR placements",
-                "Pause low CTR creatives"
-            ]
-        )
+    def _build_report(self, run_id, validated_insights, predictions, variants=None, budget=None,
+                      title="Agentic FB Performance Report", query=None, output_dir=None):
+        from src.utils.report_pdf import PdfReport
+
+        creatives = _ranked_records(predictions, "predicted_ctr")
+        report_cfg = self.cfg if output_dir is None else {"report": {**self.cfg.get("report", {}), "pdf_output_dir": output_dir}}
+        summary = validated_insights["summary"]
+        with span("PdfReport.build", hypotheses=len(validated_insights["hypotheses"]), rows=len(predictions)):
+            return PdfReport.from_config(report_cfg).build(
+                run_id=run_id,
+                title=title,
+                executive_summary=f"{query}: {summary}" if query else summary,
+                hypotheses=validated_insights["hypotheses"],
+                creatives=creatives,
+                segments=validated_insights.get("segments"),
+                variants=_records(variants),
+                budget=_records(budget["units"]) if budget else None,
+                actions=[
+                    "A/B Test top creatives",
+                    *(budget["actions"] if budget else []),
+                    "Pause low CTR creatives"
+                ]
+            )
+
+    # -----------------------------
+    # Batch entry points (one load + fit, many per-item reports)
+    # -----------------------------
+    def prepare_batch(self, batch_id):
+        """Loads the frame and fits the Simulator once; returns (memory, df, sim, train_info)."""
+        memory = self._memory()
+        df, _, _ = self._load_data()
+        sim, train_info = self._fit_simulator(df, memory, batch_id)
+        return memory, df, sim, train_info
+
+    def run_item(self, df, sim, run_id, title, query, output_dir=None):
+        """Analyses one slice of the frame (e.g. a campaign's rows) with an already fitted
+        Simulator and renders its report; returns the PDF path. Writes nothing to Memory."""
+        summary = self.data_agent.summarize(df)
+        cube = SegmentCube.from_frame(df, self.cfg.get("evaluation", {}).get("window_days", 14))
+        validated = self.evaluator.validate(self.insight_agent.generate(summary, cube), df)
+        candidates = self.creative_agent.generate(df)
+        predictions = sim.simulate_batch(candidates) if len(candidates) else candidates
+        budget = self._budget_optimizer().optimize(df)
+        return self._build_report(run_id, validated, predictions, budget=budget, title=title, query=query,
+                                  output_dir=output_dir)
+
+    # -----------------------------
+    # Tier-3 Enhanced Pipeline
+    # -----------------------------
+    def run_tier3(self, df, creative_candidates, validated_insights):
+        run_id = "run_" + uuid.uuid4().hex[:8]
+        memory = self._memory()
+
+        sim, train_info = self._train_simulator(df, memory, run_id)
+        predictions, top_preds = self._simulate(sim, creative_candidates)
+        budget = self._optimize_budget(df, self._budget_optimizer().warm_lam(memory))
+        self._remember_results(memory, run_id, top_preds, budget=budget)
+        pdf = self._build_report(run_id, validated_insights, predictions, budget=budget)
 
         return {
             "run_id": run_id,
             "sim_results": predictions.to_dict(orient="records"),
+            "prediction_cache": sim.cache_stats(),
+            "training": _training_summary(train_info),
+            "budget": budget["summary"],
             "pdf_path": pdf
         }
+
+
+def _training_summary(train_info):
+    # whether the model saw every row (simulator.max_train_mb subsamples above its ceiling)
+    return {k: train_info.get(k) for k in ("status", "n_samples", "rows_available", "subsampled")}
+
+
+def _records(frame):
+    return frame.to_dict(orient="records") if frame is not None else None
+
+
+def _ranked_records(frame, column, chunk=1000):
+    """Rows as dicts, largest ``column`` first. Only the sort order and one chunk of rows
+    are materialized at a time, not a sorted copy of the frame."""
+    if not len(frame):
+        return
+    order = np.argsort(-frame[column].to_numpy(dtype=np.float64), kind="stable")
+    for start in range(0, len(order), chunk):
+        for row in frame.iloc[order[start:start + chunk]].itertuples(index=False):
+            yield row._asdict()
@@ -0,0 +1,95 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+from src.orchestrator import Orchestrator
+
+
+class AnalystService:
+    """Long-running query endpoint around one warm Orchestrator.
+
+    HTTP handler threads only parse requests; queries are queued onto a fixed pool of
+    ``service.workers`` threads that share the loaded frame, fitted Simulator and Memory.
+    Requests beyond ``service.queue_size`` pending queries are rejected with 503.
+    """
+
+    def __init__(self, cfg: Dict[str, Any], orchestrator: Optional[Orchestrator] = None):
+        svc_cfg = cfg.get("service", {})
+        self.cfg = cfg
+        self.host = svc_cfg.get("host", "127.0.0.1")
+        self.port = svc_cfg.get("port", 8765)
+        self.workers = svc_cfg.get("workers", 4)
+        self.queue_size = svc_cfg.get("queue_size", 64)
+        self.orchestrator = orchestrator or Orchestrator(cfg, warm=True)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="analyst")
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+        self._server = None
+
+    def submit(self, query: str):
+        if not self._slots.acquire(blocking=False):
+            return None
+        fut = self._pool.submit(self.orchestrator.run, query)
+        fut.add_done_callback(lambda _: self._slots.release())
+        return fut
+
+    def _make_handler(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _send(self, status: int, payload: Dict[str, Any]):
+                body = json.dumps(payload, default=str).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path != "/health":
+                    return self._send(404, {"error": "not found"})
+                self._send(200, {"status": "ok", "workers": service.workers})
+
+            def do_POST(self):
+                if self.path != "/query":
+                    return self._send(404, {"error": "not found"})
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                    query = json.loads(self.rfile.read(length) or b"{}").get("query")
+                except (ValueError, AttributeError):
+                    query = None
+                if not query:
+                    return self._send(400, {"error": "body must be JSON with a 'query' field"})
+
+                fut = service.submit(query)
+                if fut is None:
+                    return self._send(503, {"error": "query queue is full"})
+                try:
+                    self._send(200, fut.result())
+                except Exception as e:
+                    self._send(500, {"error": f"{type(e).__name__}: {e}"})
+
+            def log_message(self, fmt, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> ThreadingHTTPServer:
+        self._server = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        self.port = self._server.server_address[1]
+        return self._server
+
+    def serve_forever(self):
+        server = self._server or self.start()
+        print(f"> Serving on http://{self.host}:{self.port} ({self.workers} workers)")
+        try:
+            server.serve_forever()
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        self._pool.shutdown(wait=True)
@@ -0,0 +1,104 @@
+import contextvars
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.utils.tracing import span
+
+
+def topological_order(dependencies: Dict[str, List[str]]) -> List[str]:
+    order, state = [], {}
+
+    def visit(node, path):
+        if state.get(node) == "done":
+            return
+        if state.get(node) == "visiting":
+            raise ValueError(f"Cycle in stage graph: {' -> '.join(path + [node])}")
+        state[node] = "visiting"
+        for dep in dependencies.get(node, []):
+            if dep not in dependencies:
+                raise ValueError(f"Stage '{node}' depends on unknown stage '{dep}'")
+            visit(dep, path + [node])
+        state[node] = "done"
+        order.append(node)
+
+    for node in dependencies:
+        visit(node, [])
+    return order
+
+
+def run_dag(
+    stages: Dict[str, Callable[[Dict[str, Any]], Any]],
+    dependencies: Dict[str, List[str]],
+    max_workers: int = 4,
+    cache=None,
+    cache_keys: Optional[Dict[str, Any]] = None,
+) -> Tuple[Dict[str, Any], Dict[str, Dict[str, float]]]:
+    """Run each stage as soon as its dependencies finish; independent stages overlap.
+
+    Every stage callable receives the results of all stages completed so far and returns
+    its own result. Returns (results, timings) where timings holds start/end offsets from
+    the beginning of the run and the wall-clock seconds of each stage.
+
+    With a ``StageCache``, a stage whose key (its ``cache_keys`` material plus the digests
+    of its dependencies' results) is stored is loaded instead of run. A hit skips the
+    callable entirely, so cached stages should return their payload and leave writes
+    (Memory, files) to the caller.
+    """
+    topological_order(dependencies)
+    missing = set(dependencies) - set(stages)
+    if missing:
+        raise ValueError(f"No callable for stages: {sorted(missing)}")
+
+    results: Dict[str, Any] = {}
+    timings: Dict[str, Dict[str, float]] = {}
+    digests: Dict[str, str] = {}
+    cache_keys = cache_keys or {}
+    pending = dict(dependencies)
+    t0 = time.perf_counter()
+
+    def compute(name, sp):
+        if cache is None:
+            return stages[name](results)
+        key = cache.key(name, cache_keys.get(name), {d: digests[d] for d in dependencies[name]})
+        if not cache.stores(name):
+            digests[name] = key
+            cache.record(name, "off", key)
+            return stages[name](results)
+        hit, out, digest = cache.get(name, key)
+        if not hit:
+            out = stages[name](results)
+            digest = cache.put(name, key, out)
+        digests[name] = digest
+        cache.record(name, "hit" if hit else "miss", key)
+        sp["cache"] = "hit" if hit else "miss"
+        return out
+
+    def timed(name):
+        start = time.perf_counter()
+        with span(f"stage:{name}") as sp:
+            out = compute(name, sp)
+        end = time.perf_counter()
+        timings[name] = {"start": start - t0, "end": end - t0, "seconds": end - start}
+        return out
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        running = {}
+        while pending or running:
+            ready = [n for n, deps in pending.items() if all(d in results for d in deps)]
+            for name in ready:
+                del pending[name]
+                # each stage runs in a copy of the caller's context so the active tracer follows it
+                running[pool.submit(contextvars.copy_context().run, timed, name)] = name
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                name = running.pop(fut)
+                try:
+                    results[name] = fut.result()
+                except Exception:
+                    for other in running:
+                        other.cancel()
+                    raise
+
+    timings["_total"] = {"start": 0.0, "end": time.perf_counter() - t0, "seconds": time.perf_counter() - t0}
+    return results, timings
@@ -0,0 +1,198 @@
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+_SHINGLE_BASE = np.uint64(1099511628211)  # FNV-64 prime, as the rolling-hash base
+_EMPTY = np.uint64(2 ** 64 - 1)
+_ROTATION = 0x9E3779B1
+_BLOCK_TEXTS = 50_000
+
+
+def _mix64(x: np.ndarray) -> np.ndarray:
+    # splitmix64 finalizer: spreads the rolling hash over all 64 bits
+    x = x.copy()
+    x ^= x >> np.uint64(30)
+    x *= np.uint64(0xBF58476D1CE4E5B9)
+    x ^= x >> np.uint64(27)
+    x *= np.uint64(0x94D049BB133111EB)
+    x ^= x >> np.uint64(31)
+    return x
+
+
+def _normalize(text) -> str:
+    return " ".join(str(text).lower().split()) if text is not None else ""
+
+
+def _lsh_shape(num_perm: int, threshold: float, min_recall: float = 0.99) -> Tuple[int, int]:
+    # widest bands (fewest false candidates) that still catch pairs at the threshold
+    # with probability >= min_recall: P = 1 - (1 - s^r)^b
+    for rows in range(num_perm, 0, -1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if 1 - (1 - threshold ** rows) ** bands >= min_recall:
+            return bands, rows
+    return num_perm, 1
+
+
+class NearDuplicateIndex:
+    """MinHash + LSH clustering of near-duplicate messages.
+
+    Messages are lower-cased, split into character ``shingle_size``-grams and summarised
+    by ``num_perm`` MinHash values; two messages agree on a MinHash value with probability
+    close to the Jaccard similarity of their shingle sets. Signatures are banded and each
+    band bucket links its members to the bucket's first message when their estimated
+    similarity is at least ``threshold``; clusters are the connected components. Exact
+    duplicates are collapsed first, so the cost grows with the number of distinct
+    messages, never with the number of pairs.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 64, shingle_size: int = 5, seed: int = 42):
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.seed = seed
+        self.bands, self.rows = _lsh_shape(num_perm, threshold)
+        self.messages: pd.Index = pd.Index([], dtype=object)
+        self.signatures = np.empty((0, num_perm), dtype=np.uint32)
+        self.labels = np.empty(0, dtype=np.int64)
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any]) -> "NearDuplicateIndex":
+        nd_cfg = cfg.get("near_duplicates", {})
+        return cls(
+            threshold=nd_cfg.get("threshold", 0.8),
+            num_perm=nd_cfg.get("num_perm", 64),
+            shingle_size=nd_cfg.get("shingle_size", 5),
+            seed=cfg.get("seed", 42),
+        )
+
+    # -----------------------------
+    # Signatures
+    # -----------------------------
+    def _shingles(self, texts) -> Tuple[np.ndarray, np.ndarray]:
+        """Rolling hashes of every character k-gram, plus each text's offset into them."""
+        k = self.shingle_size
+        # texts shorter than k are padded so every text has at least one shingle
+        encoded = [t.encode("utf-8").ljust(k) for t in texts]
+        lengths = np.fromiter((len(e) for e in encoded), dtype=np.int64, count=len(encoded))
+        buf = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+        n_win = len(buf) - k + 1
+        h = np.zeros(max(n_win, 0), dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            for j in range(k):
+                h = h * _SHINGLE_BASE + buf[j:j + n_win]
+        # keep windows that start and end inside one text
+        starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        counts = lengths - k + 1
+        pos = np.repeat(starts - np.concatenate([[0], np.cumsum(counts)[:-1]]), counts) + np.arange(counts.sum())
+        return h[pos], np.concatenate([[0], np.cumsum(counts)])
+
+    def signatures_of(self, texts: Iterable[str]) -> np.ndarray:
+        """One-permutation MinHash: each shingle is hashed once and lands in one of
+        ``num_perm`` bins; a text's signature is the minimum per bin. Empty bins borrow the
+        next non-empty bin's value (rotation densification), so short texts still compare."""
+        texts = [_normalize(t) for t in texts]
+        if len(texts) <= _BLOCK_TEXTS:
+            return self._signature_block(texts)
+        # blocks bound the per-shingle temporaries (~100 bytes per shingle)
+        return np.concatenate([
+            self._signature_block(texts[i:i + _BLOCK_TEXTS]) for i in range(0, len(texts), _BLOCK_TEXTS)
+        ])
+
+    def _signature_block(self, texts) -> np.ndarray:
+        n, m = len(texts), self.num_perm
+        if not n:
+            return np.empty((0, m), dtype=np.uint32)
+        shingles, offsets = self._shingles(texts)
+        x = _mix64(shingles ^ np.uint64(self.seed))
+        bins = ((x >> np.uint64(32)) % np.uint64(m)).astype(np.int64)
+        text = np.repeat(np.arange(n), np.diff(offsets))
+        flat = np.full(n * m, _EMPTY, dtype=np.uint64)
+        np.minimum.at(flat, text * m + bins, x & np.uint64(0xFFFFFFFF))
+        sig = flat.reshape(n, m)
+
+        rows = np.flatnonzero((sig == _EMPTY).any(axis=1))
+        raw, filled = sig[rows], sig[rows]
+        for d in range(1, m):
+            empty = filled == _EMPTY
+            if not empty.any():
+                break
+            donor = np.roll(raw, -d, axis=1)
+            take = empty & (donor != _EMPTY)
+            # the offset keeps a borrowed value distinct from the donor bin's own
+            filled[take] = (donor[take] + np.uint64(d * _ROTATION)) & np.uint64(0xFFFFFFFF)
+        sig[rows] = filled
+        return sig.astype(np.uint32)
+
+    # -----------------------------
+    # Clustering
+    # -----------------------------
+    def fit(self, messages: Iterable[str]) -> "NearDuplicateIndex":
+        from scipy.sparse import coo_matrix
+        from scipy.sparse.csgraph import connected_components
+
+        codes, uniques = pd.factorize(pd.Series(list(messages) if not isinstance(messages, pd.Series) else messages, dtype=object))
+        self.messages = pd.Index(uniques)
+        n = len(uniques)
+        self.signatures = sig = self.signatures_of(uniques)
+
+        src, dst = [], []
+        for band in range(self.bands):
+            # one uint64 key per band (collisions ~ n^2 / 2^64) instead of row-wise unique
+            key = np.zeros(n, dtype=np.uint64)
+            for j in range(band * self.rows, (band + 1) * self.rows):
+                key = key * _SHINGLE_BASE + sig[:, j]
+            bucket = pd.factorize(key)[0]
+            _, first = np.unique(bucket, return_index=True)
+            rep = first[bucket]
+            member = np.flatnonzero(rep != np.arange(n))
+            # LSH only proposes candidates; keep pairs whose estimated Jaccard passes
+            for i in range(0, len(member), _BLOCK_TEXTS):
+                m = member[i:i + _BLOCK_TEXTS]
+                similar = (sig[rep[m]] == sig[m]).mean(axis=1) >= self.threshold
+                src.append(rep[m][similar])
+                dst.append(m[similar])
+        src = np.concatenate(src) if src else np.empty(0, dtype=np.int64)
+        dst = np.concatenate(dst) if dst else np.empty(0, dtype=np.int64)
+        graph = coo_matrix((np.ones(len(src), dtype=np.int8), (src, dst)), shape=(n, n))
+        _, labels = connected_components(graph, directed=False)
+        # number clusters by first appearance so labels are stable for a given input order
+        self.labels = pd.factorize(labels)[0].astype(np.int64)
+        self._codes = codes
+        return self
+
+    @property
+    def n_clusters(self) -> int:
+        return int(self.labels.max()) + 1 if len(self.labels) else 0
+
+    def cluster_ids(self, messages: Optional[Iterable[str]] = None) -> np.ndarray:
+        """Cluster id per message (the fitted input when ``messages`` is None); -1 if unseen."""
+        if messages is None:
+            codes = self._codes
+        else:
+            codes = self.messages.get_indexer(pd.Index(list(messages) if not isinstance(messages, pd.Series) else messages, dtype=object))
+        out = np.full(len(codes), -1, dtype=np.int64)
+        known = codes >= 0
+        out[known] = self.labels[codes[known]]
+        return out
+
+    def similarity(self, a: str, b: str) -> float:
+        """Estimated Jaccard similarity of two messages' shingle sets."""
+        sig = self.signatures_of([a, b])
+        return float((sig[0] == sig[1]).mean())
+
+
+def dedupe(df: pd.DataFrame, column: str, index: NearDuplicateIndex, by: Optional[str] = None) -> pd.DataFrame:
+    """First row of every near-duplicate cluster of ``column``, in the original order; with
+    ``by``, of every (``by`` value, cluster) pair, so each group keeps its own copy."""
+    if df.empty:
+        return df
+    keys = pd.DataFrame({"cluster": index.fit(df[column]).cluster_ids()}, index=df.index)
+    if by is not None:
+        keys["by"] = df[by].to_numpy()
+    return df[~keys.duplicated()]
+
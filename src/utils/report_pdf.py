@@ -1,81 +1,348 @@
+import hashlib
+import json
 import os
-from datetime import datetime
 import textwrap
+import threading
+from datetime import datetime
+from itertools import chain, islice
+from typing import Any, Dict, Iterable, List, Optional
 
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 from reportlab.lib.units import mm
 
+# bump when chart rendering changes so cached images are not reused
+CHART_VERSION = 1
+# the default chart font has no glyphs for typographic dashes/quotes common in ad copy
+_ASCII_PUNCT = str.maketrans({"\u2014": "-", "\u2013": "-", "\u2011": "-", "\u2019": "'", "\u2018": "'", "\u201c": '"', "\u201d": '"'})
+
+
+def content_hash(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class ChartCache:
+    """Rendered chart PNGs on disk, keyed by a hash of the chart kind, size and data.
+
+    Re-running a report whose chart inputs did not change reuses the image instead of
+    rasterizing it again. Charts are drawn with Pillow (a reportlab dependency).
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def bar_chart(self, labels: List[str], values: List[float], title: str,
+                  size=(1200, 560), value_fmt: str = "{:.4f}") -> Optional[str]:
+        if not self.directory or not values:
+            return None
+        key = content_hash(CHART_VERSION, "hbar", labels, values, title, size, value_fmt)
+        path = os.path.join(self.directory, f"chart_{key[:32]}.png")
+        if os.path.exists(path):
+            self.hits += 1
+            return path
+        self.misses += 1
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        self._render_hbar(labels, values, title, size, value_fmt).save(tmp, format="PNG")
+        os.replace(tmp, path)
+        return path
+
+    @staticmethod
+    def _render_hbar(labels, values, title, size, value_fmt):
+        from PIL import Image, ImageDraw, ImageFont
+
+        def font(px):
+            try:
+                return ImageFont.load_default(size=px)
+            except TypeError:  # Pillow < 10.1 has a single bitmap default font
+                return ImageFont.load_default()
+
+        w, h = size
+        img = Image.new("RGB", size, "white")
+        draw = ImageDraw.Draw(img)
+        draw.text((10, 8), title, fill="black", font=font(26))
+        label_w, top, row_h = int(w * 0.45), 50, (h - 60) / max(len(values), 1)
+        vmax = max(max(values), 1e-12)
+        small = font(max(10, min(18, int(row_h * 0.6))))
+        for i, (label, v) in enumerate(zip(labels, values)):
+            y = top + i * row_h
+            text = label.translate(_ASCII_PUNCT)
+            text = text if len(text) <= 60 else text[:57] + "..."
+            draw.text((10, y + row_h * 0.15), text, fill="black", font=small)
+            bar = max(1, int((w - label_w - 130) * max(v, 0) / vmax))
+            draw.rectangle([label_w, y + row_h * 0.15, label_w + bar, y + row_h * 0.85], fill=(52, 101, 164))
+            draw.text((label_w + bar + 8, y + row_h * 0.15), value_fmt.format(v), fill="black", font=small)
+        return img
+
+
+class _Layout:
+    """Flowing single-column layout on a reportlab canvas.
+
+    Content is drawn top to bottom and a page is emitted (``showPage``) as soon as it is
+    full, so callers can feed rows from iterators. The header/footer rule is a form
+    XObject drawn once and referenced on every page; the table of contents is a form
+    filled in at the end, once section page numbers are known.
+    """
+
+    def __init__(self, c, title: str, run_id: str):
+        self.c = c
+        self.width, self.height = A4
+        self.margin = 20 * mm
+        self.usable = self.width - 2 * self.margin
+        self.x = self.margin
+        self.bottom = self.margin + 10
+        self.title = title
+        self.run_id = run_id
+        self.page = 0
+        self.sections: List[Dict[str, Any]] = []
+        self.repeat_header = None
+        self._static_frame()
+        self.new_page()
+
+    def _static_frame(self):
+        c = self.c
+        c.beginForm("static_frame")
+        c.setLineWidth(0.3)
+        c.line(self.margin, self.height - self.margin + 6, self.width - self.margin, self.height - self.margin + 6)
+        c.line(self.margin, self.margin - 4, self.width - self.margin, self.margin - 4)
+        c.setFont("Helvetica", 7)
+        c.drawString(self.margin, self.margin - 14, f"{self.title} | Run: {self.run_id}")
+        c.endForm()
+
+    def new_page(self):
+        if self.page:
+            self.c.showPage()
+        self.page += 1
+        self.c.doForm("static_frame")
+        self.c.setFont("Helvetica", 7)
+        self.c.drawRightString(self.width - self.margin, self.margin - 14, f"Page {self.page}")
+        self.y = self.height - self.margin
+        if self.repeat_header:
+            self.repeat_header()
+
+    def ensure(self, height: float):
+        if self.y - height < self.bottom:
+            self.new_page()
+
+    def heading(self, text: str, size: int = 12, toc: bool = True):
+        self.ensure(size + 30)
+        self.y -= 6
+        key = f"section_{len(self.sections)}"
+        if toc:
+            self.c.bookmarkPage(key, fit="XYZ", top=self.y + size)
+            self.c.addOutlineEntry(text, key, level=0)
+            self.sections.append({"title": text, "page": self.page})
+        self.c.setFont("Helvetica-Bold", size)
+        self.c.drawString(self.x, self.y, text)
+        self.y -= size + 4
+
+    def lines(self, lines: Iterable[str], size: int = 9, indent: float = 0, font: str = "Helvetica", gap: float = 0):
+        for line in lines:
+            self.ensure(size + 2)
+            self.c.setFont(font, size)
+            self.c.drawString(self.x + indent, self.y, line)
+            self.y -= size + 2
+        self.y -= gap
+
+    def image(self, path: str, width: float, height: float):
+        self.ensure(height + 6)
+        self.c.drawImage(path, self.x, self.y - height, width=width, height=height)
+        self.y -= height + 6
+
+    def table(self, columns: List[Dict[str, Any]], rows: Iterable[Dict[str, Any]], size: int = 8) -> int:
+        """Draws rows as the iterator yields them; the column header is repeated at the top of
+        every continuation page.
+
+        A column with ``width`` None takes what the others leave of the usable width, and
+        its ``chars`` follow from that width.
+        """
+        fixed = sum(col["width"] for col in columns if col.get("width") is not None)
+        columns = [
+            col if col.get("width") is not None
+            else {**col, "width": self.usable - fixed, "chars": int((self.usable - fixed) / 4.4)}
+            for col in columns
+        ]
+
+        def header():
+            self.c.setFont("Helvetica-Bold", size)
+            x = self.x
+            for col in columns:
+                self.c.drawString(x, self.y, col["title"])
+                x += col["width"]
+            self.y -= size + 4
+
+        self.ensure(2 * (size + 4))
+        header()
+        self.repeat_header = header
+        n = 0
+        try:
+            for row in rows:
+                cells = []
+                for col in columns:
+                    value = row.get(col["key"])
+                    text = col.get("fmt", "{}").format(value) if value is not None else ""
+                    cells.append((textwrap.wrap(text, col["chars"]) or [""]) if col.get("wrap") else [text[:col["chars"]]])
+                row_lines = max(len(c) for c in cells)
+                self.ensure(row_lines * (size + 2) + 2)
+                self.c.setFont("Helvetica", size)
+                x = self.x
+                for col, cell in zip(columns, cells):
+                    for i, line in enumerate(cell):
+                        self.c.drawString(x, self.y - i * (size + 2), line)
+                    x += col["width"]
+                self.y -= row_lines * (size + 2) + 2
+                n += 1
+        finally:
+            self.repeat_header = None
+        return n
+
+    def reserve_toc(self):
+        # the rest of this page shows the contents, drawn once all sections are placed
+        self._toc_top = self.y
+        self.c.doForm("toc")
+        self.new_page()
+
+    def finish_toc(self):
+        c = self.c
+        c.beginForm("toc")
+        y = self._toc_top
+        c.setFont("Helvetica-Bold", 14)
+        c.drawString(self.x, y, "Contents")
+        y -= 22
+        c.setFont("Helvetica", 10)
+        for s in self.sections:
+            if y < self.bottom:
+                break
+            c.drawString(self.x, y, s["title"])
+            c.drawRightString(self.width - self.margin, y, str(s["page"]))
+            y -= 14
+        c.endForm()
+
 
 class PdfReport:
-    def __init__(self, output_dir="reports"):
+    def __init__(self, output_dir="reports", toc: bool = True, chart_cache_dir: Optional[str] = None, chart_top: int = 20):
         self.output_dir = output_dir
+        self.toc = toc
+        self.chart_top = chart_top
+        self.charts = ChartCache(chart_cache_dir)
         os.makedirs(self.output_dir, exist_ok=True)
 
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any]) -> "PdfReport":
+        report_cfg = cfg.get("report", {})
+        return cls(
+            report_cfg.get("pdf_output_dir", "reports"),
+            toc=report_cfg.get("toc", True),
+            chart_cache_dir=report_cfg.get("chart_cache_dir"),
+            chart_top=report_cfg.get("chart_top", 20),
+        )
+
     def _wrap(self, text, width_chars=90):
         return textwrap.wrap(text, width=width_chars)
 
-    def build(self, run_id, title, executive_summary, hypotheses, creatives, actions):
+    def build(self, run_id, title, executive_summary, hypotheses, creatives, actions, segments=None, variants=None,
+              budget=None):
+        """Writes the report; ``creatives``, ``segments``, ``variants`` and ``budget`` may be any
+        iterable of dicts (e.g. a generator) and are consumed row by row in the order given.
+        reportlab itself keeps the finished (compressed) pages until ``save``."""
         filename = os.path.join(self.output_dir, f"dashboard_{run_id}.pdf")
-        c = canvas.Canvas(filename, pagesize=A4)
-        width, height = A4
-        margin = 20 * mm
-
-        y = height - margin
-        x = margin
-
-        c.setFont("Helvetica-Bold", 16)
-        c.drawString(x, y, title)
-        c.setFont("Helvetica", 8)
-        c.drawRightString(width - margin, y, f"Run: {run_id} | Generated: {datetime.utcnow().isoformat()}")
-        y -= 20
-
-        # Executive summary
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(x, y, "Executive Summary")
-        y -= 14
-        c.setFont("Helvetica", 9)
-        for line in self._wrap(executive_summary, 110):
-            c.drawString(x, y, line)
-            y -= 11
-
-        y -= 10
-        # Hypotheses
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(x, y, "Top Hypotheses")
-        y -= 14
-        c.setFont("Helvetica", 9)
-        for h in hypotheses[:4]:
+        c = canvas.Canvas(filename, pagesize=A4, pageCompression=1)
+        c.setTitle(title)
+        page = _Layout(c, title, run_id)
+
+        page.c.setFont("Helvetica-Bold", 16)
+        page.c.drawString(page.x, page.y, title)
+        page.y -= 14
+        page.lines([f"Run: {run_id} | Generated: {datetime.utcnow().isoformat()}"], size=8, gap=6)
+
+        if self.toc:
+            page.reserve_toc()
+
+        page.heading("Executive Summary")
+        page.lines(self._wrap(executive_summary, 110), gap=6)
+
+        page.heading("Hypotheses")
+        hypotheses = list(hypotheses)
+        for h in hypotheses:
             text = f"{h['id']} [{h['confidence']:.2f}] - {h['text']}"
-            for line in self._wrap(text, 110):
-                c.drawString(x + 10, y, line)
-                y -= 11
-            y -= 4
-
-        # Creatives on right side
-        rx = width / 2
-        ry = height / 2
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(rx, ry, "Top Simulated Creatives")
-        ry -= 14
-        c.setFont("Helvetica", 9)
-        for cr in creatives[:6]:
-            text = f"{cr.get('campaign_name','?')} | CTR~{cr['predicted_ctr']:.3f} | {cr['message'][:80]}"
-            for line in self._wrap(text, 60):
-                c.drawString(rx, ry, line)
-                ry -= 11
-            ry -= 4
-
-        # Actions
-        ay = margin + 50
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(x, ay, "Recommended Actions")
-        ay -= 14
-        c.setFont("Helvetica", 9)
-        for i, a in enumerate(actions[:5], start=1):
-            for line in self._wrap(f"{i}. {a}", 110):
-                c.drawString(x + 10, ay, line)
-                ay -= 11
+            if h.get("supported") is not None:
+                text += f" ({'supported' if h['supported'] else 'not supported'}"
+                text += f", p={h['p_adjusted']:.3g})" if h.get("p_adjusted") is not None else ")"
+            page.lines(self._wrap(text, 105), indent=10, gap=4)
+
+        # the chart needs the leading rows; they are peeked off and chained back for the table
+        creatives = iter(creatives)
+        head = list(islice(creatives, self.chart_top))
+        chart = self.charts.bar_chart(
+            [str(cr.get("message") or cr.get("creative_message") or "?") for cr in head],
+            [float(cr.get("predicted_ctr") or 0.0) for cr in head],
+            f"Predicted CTR - first {len(head)} creatives",
+        )
+        page.heading("Simulated Creatives")
+        if chart:
+            page.image(chart, page.usable, page.usable * 560 / 1200)
+        n = page.table(
+            [
+                {"key": "campaign_name", "title": "Campaign", "width": 120, "chars": 28},
+                {"key": "predicted_ctr", "title": "Pred. CTR", "width": 50, "chars": 10, "fmt": "{:.4f}"},
+                {"key": "confidence", "title": "Conf.", "width": 35, "chars": 6, "fmt": "{:.2f}"},
+                {"key": "message", "title": "Message", "width": None, "wrap": True},
+            ],
+            ({**cr, "message": cr.get("message") or cr.get("creative_message")} for cr in chain(head, creatives)),
+        )
+        page.lines([f"{n} creatives"], size=7, gap=6)
+
+        if variants is not None:
+            page.heading("Top Generated Variants")
+            n = page.table(
+                [
+                    {"key": "campaign_name", "title": "Campaign", "width": 120, "chars": 28},
+                    {"key": "predicted_ctr", "title": "Pred. CTR", "width": 50, "chars": 10, "fmt": "{:.4f}"},
+                    {"key": "creative_message", "title": "Message", "width": None, "wrap": True},
+                ],
+                variants,
+            )
+            page.lines([f"{n} variants"], size=7, gap=6)
+
+        if segments is not None:
+            segments = iter(segments)
+            first = next(segments, None)
+            page.heading("Segments")
+            if first is not None:
+                # text columns get three times the width of numeric ones and wrap
+                keys = list(first)[:6]
+                weights = [3 if isinstance(first[k], str) else 1 for k in keys]
+                unit = page.usable / sum(weights)
+                cols = [
+                    {"key": k, "title": k, "width": w * unit, "chars": int(w * unit / 4.4), "wrap": w > 1}
+                    for k, w in zip(keys, weights)
+                ]
+                n = page.table(cols, chain([first], segments))
+                page.lines([f"{n} segments"], size=7, gap=6)
+
+        if budget is not None:
+            page.heading("Budget Reallocation")
+            n = page.table(
+                [
+                    {"key": "campaign_name", "title": "Campaign", "width": 120, "chars": 28},
+                    {"key": "adset_name", "title": "Adset", "width": 95, "chars": 22},
+                    {"key": "platform", "title": "Platform", "width": 60, "chars": 12},
+                    {"key": "current_spend", "title": "Spend/day", "width": 55, "chars": 11, "fmt": "{:,.0f}"},
+                    {"key": "recommended_spend", "title": "Recommended", "width": 60, "chars": 11, "fmt": "{:,.0f}"},
+                    {"key": "marginal_roas", "title": "Marg. ROAS", "width": 55, "chars": 8, "fmt": "{:.2f}"},
+                ],
+                budget,
+            )
+            page.lines([f"{n} adset placements, largest increase first"], size=7, gap=6)
+
+        page.heading("Recommended Actions")
+        for i, a in enumerate(actions, start=1):
+            page.lines(self._wrap(f"{i}. {a}", 110), indent=10)
 
+        if self.toc:
+            page.finish_toc()
         c.save()
         return filename
@@ -0,0 +1,114 @@
+from itertools import combinations
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# segment dimensions mined for anomalies; columns missing from the frame are skipped
+SEGMENT_DIMS = ("campaign_name", "adset_name", "creative_type", "audience_type", "platform", "country")
+MEASURES = ("impressions", "clicks", "spend", "revenue")
+PREVIOUS, RECENT = 0, 1
+
+
+def period_labels(dates: pd.Series, window_days: int, end: Optional[pd.Timestamp] = None) -> np.ndarray:
+    """RECENT for the last `window_days` days, PREVIOUS for the window before, -1 otherwise."""
+    end = dates.max() if end is None else end
+    recent = dates > end - pd.Timedelta(days=window_days)
+    previous = (dates > end - pd.Timedelta(days=2 * window_days)) & ~recent
+    return np.where(recent, RECENT, np.where(previous, PREVIOUS, -1))
+
+
+class SegmentCube:
+    """Daily totals per full segment (date x every dim), rolled up on demand.
+
+    The data stage builds the cube once (or merges per-chunk partials in streaming mode).
+    Roll-ups to any subset of dims start from the two-window cuboid rather than the raw
+    rows, and are cached, so mining many dim combinations stays cheap.
+    """
+
+    def __init__(self, daily: pd.DataFrame, dims: Tuple[str, ...], window_days: int = 14):
+        self.daily = daily
+        self.dims = dims
+        self.window_days = window_days
+        self._windows = None
+        self._rollups: Dict[Tuple[str, ...], pd.DataFrame] = {}
+
+    @staticmethod
+    def aggregate(df: pd.DataFrame, dims: Iterable[str] = SEGMENT_DIMS) -> pd.DataFrame:
+        # per-chunk partial: sums by date + dims, dims kept as columns so partials concat cleanly
+        dims = [d for d in dims if d in df.columns]
+        cols = [c for c in MEASURES if c in df.columns]
+        keys = [pd.to_datetime(df["date"]).rename("date")] + [df[d] for d in dims]
+        return df[cols].groupby(keys, observed=True, sort=False).sum().reset_index()
+
+    @staticmethod
+    def fold(running: Optional[pd.DataFrame], partial: pd.DataFrame, window_days: Optional[int] = None) -> pd.DataFrame:
+        """Merge a partial into running totals: one row per (date, dims). With ``window_days``,
+        dates before both windows of the latest date seen so far are dropped, since the end
+        date only moves forward and they can never be counted again."""
+        if running is None or not len(running):
+            daily = partial
+        else:
+            daily = pd.concat([running, partial], ignore_index=True)
+            dims = [d for d in SEGMENT_DIMS if d in daily.columns]
+            daily = daily.groupby(["date", *dims], observed=True, sort=False).sum().reset_index()
+        if window_days is not None and len(daily):
+            daily = daily[daily["date"] > daily["date"].max() - pd.Timedelta(days=2 * window_days)]
+        return daily.reset_index(drop=True)
+
+    @classmethod
+    def from_partials(cls, partials: List[pd.DataFrame], window_days: int = 14) -> "SegmentCube":
+        parts = [p for p in partials if len(p)]
+        if not parts:
+            return cls(pd.DataFrame(columns=["date", *MEASURES]), (), window_days)
+        daily = pd.concat(parts, ignore_index=True)
+        dims = tuple(d for d in SEGMENT_DIMS if d in daily.columns)
+        if len(parts) > 1:
+            daily = daily.groupby(["date", *dims], observed=True, sort=False).sum().reset_index()
+        return cls(daily, dims, window_days)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, window_days: int = 14) -> "SegmentCube":
+        return cls.from_partials([cls.aggregate(df)], window_days)
+
+    def __len__(self):
+        return len(self.daily)
+
+    def windows(self) -> pd.DataFrame:
+        """Full-segment cuboid with the date collapsed into the PREVIOUS/RECENT windows."""
+        if self._windows is None:
+            daily = self.daily
+            period = pd.Series(period_labels(daily["date"], self.window_days), index=daily.index, name="_period")
+            keep = period >= 0
+            measures = [c for c in MEASURES if c in daily.columns]
+            keys = [daily.loc[keep, d] for d in self.dims] + [period[keep]]
+            self._windows = daily.loc[keep, measures].groupby(keys, observed=True, sort=False).sum()
+        return self._windows
+
+    def rollup(self, dims: Tuple[str, ...]) -> pd.DataFrame:
+        """One row per segment over `dims`, with `<measure>_prev` / `<measure>_recent` columns."""
+        if dims not in self._rollups:
+            w = self.windows()
+            if dims:
+                grouped = w.groupby(level=[*dims, "_period"], observed=True).sum()
+            else:
+                grouped = w.groupby(level="_period").sum()
+                grouped.index = pd.MultiIndex.from_product([["all"], grouped.index], names=["_all", "_period"])
+            wide = grouped.unstack("_period", fill_value=0)
+            for m in w.columns:
+                for p in (PREVIOUS, RECENT):
+                    if (m, p) not in wide.columns:
+                        wide[(m, p)] = 0
+            wide.columns = [f"{m}_{'prev' if p == PREVIOUS else 'recent'}" for m, p in wide.columns]
+            self._rollups[dims] = wide
+        return self._rollups[dims]
+
+    def dim_combinations(self, max_depth: int) -> List[Tuple[str, ...]]:
+        # a dim with a single value only repeats its parent segment, so it is left out
+        dims = [d for d in self.dims if self.daily[d].nunique() > 1]
+        return [c for k in range(1, max_depth + 1) for c in combinations(dims, k)]
+
+    @staticmethod
+    def segment_of(dims: Tuple[str, ...], key: Any) -> Dict[str, Any]:
+        values = key if isinstance(key, tuple) else (key,)
+        return {d: (v.item() if hasattr(v, "item") else v) for d, v in zip(dims, values)}
@@ -0,0 +1,146 @@
+import functools
+import glob
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import threading
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# bump when the entry layout changes so old entries are ignored
+CACHE_VERSION = 1
+_DIGEST_LEN = 24
+
+_SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@functools.lru_cache(maxsize=1)
+def code_digest() -> str:
+    """Hash of the package's Python sources: editing any module invalidates every stage."""
+    h = hashlib.sha256()
+    for path in sorted(glob.glob(os.path.join(_SRC_DIR, "**", "*.py"), recursive=True)):
+        h.update(os.path.relpath(path, _SRC_DIR).encode("utf-8"))
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+class StageCache:
+    """Content-addressed on-disk cache of pipeline stage results.
+
+    A stage's key hashes its name, the package sources, the key material the caller
+    passes for it (the config sections it reads, external inputs such as the data file's
+    content hash) and the digests of the results it consumes. A stored result's digest is
+    the SHA-256 of its pickled bytes, so when an upstream stage is recomputed to the same
+    value its dependents still hit. Stages in ``exclude`` always run; their digest is
+    their key. Entries live under ``<directory>/<stage>/<key>.pkl``, at most
+    ``max_entries`` per stage, oldest evicted first.
+
+    ``statuses`` records what each stage did in the current run: hit, miss or off.
+    """
+
+    def __init__(self, directory: str = "cache/stages", enabled: bool = True,
+                 exclude: Iterable[str] = (), max_entries: int = 8):
+        self.directory = directory
+        self.enabled = enabled
+        self.exclude = set(exclude)
+        self.max_entries = max_entries
+        self.statuses: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, cfg: Dict[str, Any], exclude: Iterable[str] = ()) -> "StageCache":
+        cache_cfg = cfg.get("stage_cache", {})
+        return cls(
+            directory=cache_cfg.get("dir", "cache/stages"),
+            enabled=cache_cfg.get("enabled", True),
+            exclude=set(exclude) | set(cache_cfg.get("exclude") or []),
+            max_entries=cache_cfg.get("max_entries", 8),
+        )
+
+    def stores(self, stage: str) -> bool:
+        return self.enabled and stage not in self.exclude
+
+    def key(self, stage: str, material: Any, inputs: Dict[str, str]) -> str:
+        h = hashlib.sha256()
+        h.update(json.dumps({
+            "stage": stage,
+            "version": CACHE_VERSION,
+            "code": code_digest(),
+            "material": material,
+            "inputs": inputs,
+        }, sort_keys=True, default=str).encode("utf-8"))
+        return h.hexdigest()[:24]
+
+    def _path(self, stage: str, key: str) -> str:
+        return os.path.join(self.directory, stage, f"{key}.pkl")
+
+    # -----------------------------
+    # Entries
+    # -----------------------------
+    def get(self, stage: str, key: str) -> Tuple[bool, Any, Optional[str]]:
+        """(hit, value, digest); unreadable entries count as misses."""
+        path = self._path(stage, key)
+        try:
+            with open(path, "rb") as f:
+                digest = f.read(_DIGEST_LEN).decode("ascii")
+                value = pickle.load(f)
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError, AttributeError, ImportError):
+            return False, None, None
+        # reads refresh the entry so eviction drops the least recently used
+        os.utime(path)
+        return True, value, digest
+
+    def put(self, stage: str, key: str, value: Any) -> str:
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        digest = hashlib.sha256(payload).hexdigest()[:_DIGEST_LEN]
+        path = self._path(stage, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        # layout: the value's digest, then its pickle
+        with open(tmp, "wb") as f:
+            f.write(digest.encode("ascii"))
+            f.write(payload)
+        os.replace(tmp, path)
+        self._evict(stage)
+        return digest
+
+    def _evict(self, stage: str):
+        entries = glob.glob(os.path.join(self.directory, stage, "*.pkl"))
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=lambda p: os.stat(p).st_mtime_ns)
+        for path in entries[: len(entries) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def invalidate(self, stages: Optional[Iterable[str]] = None) -> List[str]:
+        """Drop the stored results of ``stages`` (every stage when None); returns the stages cleared."""
+        if not os.path.isdir(self.directory):
+            return []
+        names = sorted(os.listdir(self.directory)) if stages is None else list(stages)
+        cleared = []
+        for name in names:
+            path = os.path.join(self.directory, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+                cleared.append(name)
+        return cleared
+
+    # -----------------------------
+    # Per-run bookkeeping
+    # -----------------------------
+    def record(self, stage: str, status: str, key: str):
+        with self._lock:
+            self.statuses[stage] = {"status": status, "key": key}
+
+    def report(self) -> Dict[str, Any]:
+        by_status: Dict[str, List[str]] = {"hits": [], "misses": [], "off": []}
+        for stage, st in self.statuses.items():
+            by_status[{"hit": "hits", "miss": "misses"}.get(st["status"], "off")].append(stage)
+        return {**by_status, "keys": {s: st["key"] for s, st in self.statuses.items()}}
+
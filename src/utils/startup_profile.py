@@ -0,0 +1,55 @@
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    rows = []
+    for line in stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if m:
+            rows.append({
+                "module": m.group(4),
+                "self_us": int(m.group(1)),
+                "cumulative_us": int(m.group(2)),
+                "depth": (len(m.group(3)) - 1) // 2,
+            })
+    return rows
+
+
+def summarize_importtime(rows: List[Dict], top: int = 15) -> Dict:
+    # group self time by top-level package; cumulative of depth-0 imports gives the total
+    by_package = defaultdict(int)
+    for r in rows:
+        by_package[r["module"].split(".")[0]] += r["self_us"]
+    total = sum(r["cumulative_us"] for r in rows if r["depth"] == 0)
+    packages = sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)[:top]
+    modules = sorted(rows, key=lambda r: r["self_us"], reverse=True)[:top]
+    return {
+        "total_ms": total / 1000.0,
+        "packages": [{"package": k, "ms": v / 1000.0} for k, v in packages],
+        "modules": [{"module": r["module"], "self_ms": r["self_us"] / 1000.0} for r in modules],
+    }
+
+
+def format_summary(summary: Dict) -> str:
+    lines = [f"Import time (whole run): {summary['total_ms']:.1f} ms", "", "By package (self time):"]
+    lines += [f"  {p['ms']:9.1f} ms  {p['package']}" for p in summary["packages"]]
+    lines += ["", "Slowest modules (self time):"]
+    lines += [f"  {m['self_ms']:9.1f} ms  {m['module']}" for m in summary["modules"]]
+    return "\n".join(lines)
+
+
+def profile_startup(argv: List[str], top: int = 15) -> int:
+    # re-run the command under -X importtime; stdout passes through, import timings are summarized
+    proc = subprocess.run([sys.executable, "-X", "importtime"] + argv, stderr=subprocess.PIPE, text=True)
+    rows = parse_importtime(proc.stderr)
+    other = "\n".join(l for l in proc.stderr.splitlines() if not l.startswith("import time:"))
+    if other:
+        print(other, file=sys.stderr)
+    print(format_summary(summarize_importtime(rows, top)), file=sys.stderr)
+    return proc.returncode
@@ -1,9 +1,13 @@
 import math
 from typing import Dict
-from scipy import stats
+
+import numpy as np
 
 
 def two_sample_proportion_test(k1: int, n1: int, k2: int, n2: int) -> Dict:
+    # scipy is imported on first use so importing the agents stays cheap
+    from scipy import stats
+
     if n1 == 0 or n2 == 0:
         return {"p_value": 1.0, "effect": 0.0, "z": 0.0}
     p1 = k1 / n1
@@ -15,3 +19,61 @@ def two_sample_proportion_test(k1: int, n1: int, k2: int, n2: int) -> Dict:
     z = (p2 - p1) / se
     p_value = 2 * (1 - stats.norm.cdf(abs(z)))
     return {"p_value": float(p_value), "effect": float(p2 - p1), "z": float(z)}
+
+
+def two_sample_proportion_test_batch(k1, n1, k2, n2) -> Dict[str, np.ndarray]:
+    # array version of two_sample_proportion_test; same operation order so results match exactly
+    from scipy import stats
+
+    k1, n1, k2, n2 = (np.asarray(a, dtype=np.float64) for a in (k1, n1, k2, n2))
+    valid = (n1 != 0) & (n2 != 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p1 = k1 / n1
+        p2 = k2 / n2
+        p_pool = (k1 + k2) / (n1 + n2)
+        se = np.sqrt(p_pool * (1 - p_pool) * (1 / n1 + 1 / n2))
+        effect = np.where(valid, p2 - p1, 0.0)
+        tested = valid & (se != 0)
+        z = np.where(tested, (p2 - p1) / se, 0.0)
+    p_value = np.where(tested, 2 * (1 - stats.norm.cdf(np.abs(z))), 1.0)
+    return {"p_value": p_value, "effect": effect, "z": z}
+
+
+def adjust_pvalues(p_values, method: str = "bh") -> np.ndarray:
+    """Multiple-comparison adjusted p-values: "bonferroni" or "bh" (Benjamini-Hochberg FDR)."""
+    p = np.asarray(p_values, dtype=np.float64)
+    out = np.full(p.shape, np.nan)
+    mask = ~np.isnan(p)
+    m = int(mask.sum())
+    if m == 0:
+        return out
+    pv = p[mask]
+    if method == "bonferroni":
+        adj = pv * m
+    elif method == "bh":
+        order = np.argsort(pv)
+        ranked = pv[order] * m / np.arange(1, m + 1)
+        ranked = np.minimum.accumulate(ranked[::-1])[::-1]
+        adj = np.empty(m)
+        adj[order] = ranked
+    else:
+        raise ValueError(f"Unknown correction method '{method}', expected 'bonferroni' or 'bh'")
+    out[mask] = np.minimum(adj, 1.0)
+    return out
+
+
+def batch_significance(k1, n1, k2, n2, alpha: float = 0.05, method: str = "bh") -> Dict[str, np.ndarray]:
+    res = two_sample_proportion_test_batch(k1, n1, k2, n2)
+    res["p_adjusted"] = adjust_pvalues(res["p_value"], method)
+    res["significant"] = res["p_adjusted"] < alpha
+    return res
+
+
+def batch_significance_from_config(cfg: Dict, k1, n1, k2, n2) -> Dict[str, np.ndarray]:
+    """batch_significance at the configured stats.significance_alpha and stats.correction."""
+    stats_cfg = cfg.get("stats", {})
+    return batch_significance(
+        k1, n1, k2, n2,
+        alpha=stats_cfg.get("significance_alpha", 0.05),
+        method=stats_cfg.get("correction", "bh"),
+    )
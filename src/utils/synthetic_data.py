@@ -0,0 +1,136 @@
+import os
+from itertools import product
+from typing import Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+# same columns and order as data/facebook_ads.csv
+COLUMNS = [
+    "campaign_name", "adset_name", "date", "spend", "impressions", "clicks", "ctr", "purchases",
+    "revenue", "roas", "creative_type", "creative_message", "audience_type", "platform", "country",
+]
+
+CREATIVE_TYPES = ["Image", "Video", "UGC", "Carousel"]
+AUDIENCE_TYPES = ["Broad", "Lookalike", "Retargeting"]
+ADSET_SUFFIXES = ["Retarget", "LAL1", "LAL2", "ATC", "Broad"]
+PLATFORMS = ["Facebook", "Instagram"]
+COUNTRIES = ["US", "IN", "UK"]
+
+_GENDERS = ["men", "women"]
+_PRODUCTS = ["briefs", "boxers", "trunks", "inner vests", "athletic briefs", "sports bras", "wire-free bras", "panties", "boyshorts"]
+_FABRICS = ["organic cotton", "modal", "microfiber", "bamboo", "cotton stretch"]
+_LINES = ["ComfortMax", "Studio Sports", "Seamless Everyday", "Cotton Classics", "AirFlex", "Everyday Essentials"]
+_TEMPLATES = [
+    "Breathable {fabric} that moves with you — limited offer on {gender} {product}.",
+    "No ride-up guarantee — best-selling {gender} {product} back in stock.",
+    "Seamless confidence for every day — new {gender} {product}.",
+    "Summer-ready essentials — sweat-wicking {gender} {product}.",
+    "Cooling mesh panels for workouts — {gender} {product} you'll actually love.",
+    "Confidence starts inside — elevate with {gender} {product}.",
+    "3-pack deal ends tonight — upgrade your {gender} drawer with {product}.",
+    "Hot & comfy: {gender} {product} now {pct}% off — feel the difference.",
+    "Doctors recommend breathable {fabric} — meet our {gender} {product}.",
+    "Ultra-soft waistband, no marks — premium {gender} {product}.",
+]
+# urgency / discount cues (see src/utils/text_features.py) lift CTR, so the simulator has signal to learn
+_CLOSERS = ["", " Shop now!", " Free delivery.", " Only today.", " Hurry, last sizes left."]
+_CUE_LIFT = {"limited": 1.15, "ends": 1.2, "off": 1.25, "deal": 1.1, "now": 1.1, "today": 1.1, "hurry": 1.15}
+
+
+def message_vocabulary(n_messages: int = 500, seed: int = 42) -> pd.DataFrame:
+    """Distinct creative messages (at most the template space) with a multiplicative CTR lift each."""
+    rng = np.random.default_rng(seed)
+    space = sorted({
+        (t.format(fabric=f, gender=g, product=p, pct=pct) + c).strip()
+        for t, f, g, p, pct, c in product(_TEMPLATES, _FABRICS, _GENDERS, _PRODUCTS, (10, 20, 30), _CLOSERS)
+    })
+    msgs = [space[i] for i in rng.choice(len(space), size=min(n_messages, len(space)), replace=False)]
+    lifts = [
+        float(np.prod([v for k, v in _CUE_LIFT.items() if f" {k} " in f" {m.lower().rstrip('.!')} "] or [1.0]))
+        for m in msgs
+    ]
+    return pd.DataFrame({"creative_message": msgs, "lift": np.array(lifts) * rng.lognormal(0, 0.1, len(msgs))})
+
+
+def generate_ads(
+    n_rows: int,
+    n_campaigns: int = 50,
+    n_days: int = 90,
+    start_date: str = "2025-01-01",
+    n_messages: int = 500,
+    missing_rate: float = 0.0,
+    seed: int = 42,
+    vocabulary: Optional[pd.DataFrame] = None,
+    campaign_seed: Optional[int] = None,
+) -> pd.DataFrame:
+    """Synthetic ad rows matching the facebook_ads.csv schema.
+
+    Each campaign has a base CTR, a ROAS level and 5 adsets; each message a CTR lift.
+    ``missing_rate`` blanks that share of spend/clicks/revenue/roas like the real export.
+    """
+    rng = np.random.default_rng(seed)
+    vocab = message_vocabulary(n_messages, seed) if vocabulary is None else vocabulary
+
+    # campaign traits come from their own seed so every chunk of one dataset agrees on them
+    camp_rng = np.random.default_rng(seed + 1 if campaign_seed is None else campaign_seed + 1)
+    camp_names = np.array([f"{camp_rng.choice(_GENDERS).title()} {camp_rng.choice(_LINES)} {i:04d}" for i in range(n_campaigns)])
+    camp_ctr = camp_rng.uniform(0.007, 0.018, n_campaigns)
+    camp_roas = camp_rng.lognormal(1.5, 0.5, n_campaigns)
+
+    camp = rng.integers(0, n_campaigns, n_rows)
+    adset = rng.integers(0, len(ADSET_SUFFIXES), n_rows)
+    msg = rng.integers(0, len(vocab), n_rows)
+    day = rng.integers(0, n_days, n_rows)
+
+    impressions = rng.integers(5_000, 520_000, n_rows)
+    ctr = np.clip(camp_ctr[camp] * vocab["lift"].to_numpy()[msg] * rng.lognormal(0, 0.15, n_rows), 0.001, 0.05)
+    clicks = np.round(impressions * ctr)
+    spend = np.round(impressions / 1000 * rng.uniform(1.0, 3.0, n_rows), 2)
+    roas = np.round(camp_roas[camp] * rng.lognormal(0, 0.3, n_rows), 2)
+    revenue = np.round(spend * roas, 2)
+    purchases = np.maximum(0, np.round(revenue / rng.uniform(25, 60, n_rows))).astype(np.int64)
+
+    df = pd.DataFrame({
+        "campaign_name": camp_names[camp],
+        "adset_name": np.array([f"Adset-{a + 1} {s}" for a, s in enumerate(ADSET_SUFFIXES)])[adset],
+        "date": pd.date_range(start_date, periods=n_days, freq="D").strftime("%Y-%m-%d").to_numpy()[day],
+        "spend": spend,
+        "impressions": impressions,
+        "clicks": clicks,
+        "ctr": np.round(ctr, 4),
+        "purchases": purchases,
+        "revenue": revenue,
+        "roas": roas,
+        "creative_type": np.array(CREATIVE_TYPES)[rng.integers(0, len(CREATIVE_TYPES), n_rows)],
+        "creative_message": vocab["creative_message"].to_numpy()[msg],
+        "audience_type": np.array(AUDIENCE_TYPES)[rng.integers(0, len(AUDIENCE_TYPES), n_rows)],
+        "platform": np.array(PLATFORMS)[rng.integers(0, len(PLATFORMS), n_rows)],
+        "country": np.array(COUNTRIES)[rng.integers(0, len(COUNTRIES), n_rows)],
+    }, columns=COLUMNS)
+
+    if missing_rate > 0:
+        for col in ("spend", "clicks", "revenue", "roas"):
+            df.loc[rng.random(n_rows) < missing_rate, col] = np.nan
+    return df
+
+
+def iter_ads(n_rows: int, chunk_rows: int = 500_000, seed: int = 42, **kwargs) -> Iterator[pd.DataFrame]:
+    # chunks share the campaign/message vocabulary; each chunk gets its own row seed
+    vocab = message_vocabulary(kwargs.pop("n_messages", 500), seed)
+    seeds = np.random.SeedSequence(seed).generate_state(max(1, -(-n_rows // chunk_rows)))
+    for i, start in enumerate(range(0, n_rows, chunk_rows)):
+        yield generate_ads(
+            min(chunk_rows, n_rows - start), seed=int(seeds[i]) if i else seed,
+            vocabulary=vocab, campaign_seed=seed, **kwargs,
+        )
+
+
+def write_csv(path: str, n_rows: int, chunk_rows: int = 500_000, seed: int = 42, **kwargs) -> str:
+    """Writes ``n_rows`` synthetic rows to ``path`` chunk by chunk (memory stays ~one chunk)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    for i, chunk in enumerate(iter_ads(n_rows, chunk_rows, seed, **kwargs)):
+        chunk.to_csv(tmp, mode="w" if i == 0 else "a", header=i == 0, index=False)
+    os.replace(tmp, path)
+    return path
@@ -1,22 +1,59 @@
 import re
+from typing import Iterable, Union
+
+import numpy as np
+import pandas as pd
 
 URGENCY_WORDS = {"now", "today", "limited", "only", "hurry", "ends", "ending", "last", "soon"}
 DISCOUNT_PATTERNS = [r"\d+% off", r"off", r"discount", r"sale", r"deal"]
 
+# precompiled once; token boundaries mirror the [^a-z0-9 ] -> " " split used by the scalar check
+_URGENCY_RE = re.compile(r"(?<![a-z0-9])(?:" + "|".join(sorted(URGENCY_WORDS)) + r")(?![a-z0-9])")
+_DISCOUNT_RE = re.compile("|".join(DISCOUNT_PATTERNS))
+_WHITESPACE_RE = re.compile(r"\s+")
+_WORD_RE = re.compile(r"\S+")
+
+Messages = Union[pd.Series, Iterable[str]]
+
 
 def count_exclamations(s: str) -> int:
     return (s or "").count("!")
 
 
 def contains_urgency_words(s: str) -> bool:
-    s2 = re.sub(r"[^a-z0-9 ]", " ", (s or "").lower())
-    tokens = set(s2.split())
-    return len(tokens & URGENCY_WORDS) > 0
+    return _URGENCY_RE.search((s or "").lower()) is not None
 
 
 def contains_discount(s: str) -> bool:
-    s2 = (s or "").lower()
-    for p in DISCOUNT_PATTERNS:
-        if re.search(p, s2):
-            return True
-    return False
+    return _DISCOUNT_RE.search((s or "").lower()) is not None
+
+
+# -----------------------------
+# Batch APIs (whole Series / list of messages -> NumPy arrays)
+# -----------------------------
+def as_text_series(messages: Messages) -> pd.Series:
+    if isinstance(messages, pd.Series):
+        s = messages.reset_index(drop=True)
+    else:
+        s = pd.Series(list(messages), dtype=object)
+    return s.fillna("").astype(str)
+
+
+def clean_batch(messages: Messages) -> pd.Series:
+    return as_text_series(messages).str.lower().str.replace(_WHITESPACE_RE, " ", regex=True).str.strip()
+
+
+def count_exclamations_batch(messages: Messages) -> np.ndarray:
+    return as_text_series(messages).str.count("!").to_numpy(dtype=np.int64)
+
+
+def count_words_batch(messages: Messages) -> np.ndarray:
+    return as_text_series(messages).str.count(_WORD_RE).to_numpy(dtype=np.int64)
+
+
+def contains_urgency_words_batch(messages: Messages) -> np.ndarray:
+    return as_text_series(messages).str.lower().str.contains(_URGENCY_RE).to_numpy(dtype=bool)
+
+
+def contains_discount_batch(messages: Messages) -> np.ndarray:
+    return as_text_series(messages).str.lower().str.contains(_DISCOUNT_RE).to_numpy(dtype=bool)
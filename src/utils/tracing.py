@@ -0,0 +1,156 @@
+import contextvars
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger("kasparro.trace")
+
+_ACTIVE: contextvars.ContextVar[Optional["Tracer"]] = contextvars.ContextVar("kasparro_tracer", default=None)
+_PARENT: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("kasparro_span", default=None)
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, memory fields are left out
+    resource = None
+
+_PAGE_MB = (os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096) / (1024 * 1024)
+# ru_maxrss is KiB on Linux, bytes on macOS
+_MAXRSS_MB = 1 / (1024 * 1024) if sys.platform == "darwin" else 1 / 1024
+
+
+def _rss_mb() -> Optional[float]:
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * _PAGE_MB
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _MAXRSS_MB
+
+
+class Tracer:
+    """Collects spans for one pipeline run.
+
+    A span records wall time, CPU time of its thread, process RSS at exit, growth of the
+    RSS high-water mark while it was open, and any attributes set on it (e.g. ``rows``).
+    Spans nest through a context variable, which ``run_dag`` carries into its worker
+    threads, so agent calls and Simulator phases land under the stage that ran them.
+    """
+
+    def __init__(self, run_id: str, log_spans: bool = True):
+        self.run_id = run_id
+        self.log_spans = log_spans
+        self.spans: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+        self._next_id = 0
+
+    @contextmanager
+    def span(self, name: str, **attrs) -> Iterator[Dict[str, Any]]:
+        with self._lock:
+            self._next_id += 1
+            span_id = f"s{self._next_id}"
+        record: Dict[str, Any] = dict(attrs)
+        parent = _PARENT.set(span_id)
+        peak0 = _peak_rss_mb()
+        cpu0 = time.thread_time()
+        start = time.perf_counter()
+        error = None
+        try:
+            yield record
+        except BaseException as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            end = time.perf_counter()
+            cpu = time.thread_time() - cpu0
+            _PARENT.reset(parent)
+            peak1 = _peak_rss_mb()
+            span = {
+                "name": name,
+                "id": span_id,
+                "parent": _PARENT.get(),
+                "thread": threading.current_thread().name,
+                "start": start - self._t0,
+                "wall_s": end - start,
+                "cpu_s": cpu,
+                "rss_mb": _rss_mb(),
+                "peak_rss_mb": peak1,
+                "peak_rss_growth_mb": (peak1 - peak0) if peak1 is not None else None,
+                **record,
+            }
+            if error:
+                span["error"] = error
+            with self._lock:
+                self.spans.append(span)
+            if self.log_spans and logger.isEnabledFor(logging.INFO):
+                logger.info(json.dumps({"event": "span", "run_id": self.run_id, **span}, default=str))
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Compact per-span rows for the Memory run event, in start order."""
+        keys = ("name", "parent", "start", "wall_s", "cpu_s", "peak_rss_mb", "peak_rss_growth_mb", "rows", "error")
+        rows = []
+        for s in sorted(self.spans, key=lambda s: s["start"]):
+            row = {k: s[k] for k in keys if s.get(k) is not None}
+            for k in ("start", "wall_s", "cpu_s"):
+                row[k] = round(row[k], 6)
+            rows.append(row)
+        return rows
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        # Trace Event Format: opens in chrome://tracing, Perfetto and speedscope
+        tids = {}
+        events = []
+        for s in sorted(self.spans, key=lambda s: s["start"]):
+            tid = tids.setdefault(s["thread"], len(tids) + 1)
+            args = {k: v for k, v in s.items() if k not in ("name", "start", "wall_s", "thread")}
+            events.append({
+                "name": s["name"], "ph": "X", "pid": os.getpid(), "tid": tid,
+                "ts": s["start"] * 1e6, "dur": s["wall_s"] * 1e6, "args": args,
+            })
+        events += [
+            {"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": thread}}
+            for thread, tid in tids.items()
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"run_id": self.run_id}}
+
+    def write_chrome_trace(self, directory: str) -> str:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"trace_{self.run_id}.json")
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f, default=str)
+        return path
+
+
+@contextmanager
+def activate(tracer: Optional[Tracer]) -> Iterator[Optional[Tracer]]:
+    token = _ACTIVE.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _ACTIVE.reset(token)
+
+
+@contextmanager
+def span(name: str, **attrs) -> Iterator[Dict[str, Any]]:
+    """Span on the active tracer; without one it is a no-op that still accepts attributes."""
+    tracer = _ACTIVE.get()
+    if tracer is None:
+        yield dict(attrs)
+        return
+    with tracer.span(name, **attrs) as record:
+        yield record
+
+
+def configure_logging(cfg: Dict[str, Any]):
+    level = str(cfg.get("logging", {}).get("level", "INFO")).upper()
+    logging.basicConfig(level=getattr(logging, level, logging.INFO), format="%(asctime)s %(levelname)s %(name)s %(message)s")
@@ -0,0 +1,73 @@
+import json
+import os
+import shutil
+
+import pandas as pd
+import pytest
+import yaml
+
+from src import batch
+from src.batch import BatchRunner, _item_rows, load_items
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _cfg(tmp_path, workers):
+    csv = tmp_path / "ads.csv"
+    shutil.copy(os.path.join(ROOT, "data", "facebook_ads.csv"), csv)
+    cfg = yaml.safe_load(open(os.path.join(ROOT, "config", "config.yaml")))
+    cfg["data"].update({"path": str(csv), "cache_dir": None})
+    cfg["simulator"]["model_dir"] = str(tmp_path / "models")
+    cfg["memory"]["path"] = str(tmp_path / "memory" / "memory.json")
+    cfg["report"].update({"pdf_output_dir": str(tmp_path / "reports"), "chart_cache_dir": None})
+    cfg["batch"] = {"workers": workers}
+    return cfg
+
+
+@pytest.mark.filterwarnings("error::RuntimeWarning")
+@pytest.mark.parametrize("workers", [1, 2])
+def test_batch_renders_one_report_per_item_and_isolates_failures(tmp_path, monkeypatch, workers):
+    monkeypatch.chdir(tmp_path)
+    cfg = _cfg(tmp_path, workers)
+    sizes = pd.read_csv(cfg["data"]["path"], usecols=["campaign_name"])["campaign_name"].value_counts()
+    # the two largest campaigns, and one below batch.min_rows
+    campaigns = sizes.index[:2].tolist()
+    tiny = sizes[sizes < 3].index[0]
+    spec = tmp_path / "items.yaml"
+    spec.write_text(yaml.safe_dump([
+        {"name": "first", "query": "Why did ROAS drop?", "campaign": campaigns[0]},
+        {"name": "both", "campaigns": campaigns},
+        {"name": "missing", "campaign": "No Such Campaign"},
+        {"name": "tiny", "campaign": tiny},
+    ]))
+
+    manifest = BatchRunner(cfg).run(load_items(str(spec)))
+
+    assert (manifest["items"], manifest["succeeded"], manifest["failed"], manifest["skipped"]) == (4, 2, 1, 1)
+    ok, both, missing, skipped = manifest["results"]
+    assert ok["status"] == "ok" and os.path.exists(ok["pdf_path"])
+    assert both["rows"] > ok["rows"]
+    assert missing["status"] == "error" and "No Such Campaign" in missing["error"]
+    assert skipped["status"] == "skipped" and skipped["rows"] < 3
+    # the inline path does not keep the frame alive after the run
+    assert not batch._STATE
+    assert json.load(open(manifest["manifest_path"]))["batch_id"] == manifest["batch_id"]
+
+    events = json.load(open(cfg["memory"]["path"]))["events"]
+    assert [e["type"] for e in events].count("training") == 1
+    assert events[-1]["type"] == "batch" and events[-1]["failed"] == 1
+
+
+def test_items_slice_the_campaign_sorted_frame_without_copying():
+    df = pd.DataFrame({"campaign_name": ["B", "A", None, "B", "A", "C"], "spend": [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]})
+    sorted_df, bounds = BatchRunner._by_campaign(df)
+
+    for name in ["A", "B", "C"]:
+        rows = _item_rows({"campaigns": [name]}, bounds)
+        assert isinstance(rows, slice)
+        assert sorted_df.iloc[rows]["spend"].tolist() == df.loc[df["campaign_name"] == name, "spend"].tolist()
+    both = sorted_df.take(_item_rows({"campaigns": ["A", "C"]}, bounds))
+    assert sorted(both["spend"]) == [2.0, 5.0, 6.0]
+    assert _item_rows({"campaigns": None}, bounds) is None
+    with pytest.raises(KeyError):
+        _item_rows({"campaigns": ["Z"]}, bounds)
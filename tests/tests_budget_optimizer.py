@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+from src.agents.budget_optimizer import MEMORY_KEY, BudgetOptimizer
+from src.memory.memory import Memory
+
+CFG = {"evaluation": {"window_days": 7}, "budget": {"max_change": 0.5, "shrinkage": 0.0}}
+
+
+def _frame(n_units=4, days=28, seed=0):
+    # unit i earns a_i * spend^0.5: unit 0 has the steepest curve, the last the flattest
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i in range(n_units):
+        a = 40.0 / (i + 1)
+        for day in range(days):
+            spend = 100 * rng.uniform(0.5, 1.5)
+            revenue = a * spend ** 0.5
+            rows.append({
+                "campaign_name": f"C{i % 2}", "adset_name": f"A{i}", "platform": "Facebook",
+                "date": pd.Timestamp("2025-01-01") + pd.Timedelta(days=day),
+                "spend": spend, "revenue": revenue, "roas": revenue / spend, "purchases": revenue / 50,
+            })
+    return pd.DataFrame(rows)
+
+
+def test_curves_recover_diminishing_returns():
+    opt = BudgetOptimizer(CFG)
+    curves = opt.fit_curves(opt.daily(_frame()))
+    assert np.allclose(curves["beta"], 0.5)
+    a = np.exp(curves["log_a"]).droplevel(["campaign_name", "platform"]).sort_index()
+    assert np.allclose(a, [40.0, 20.0, 40 / 3, 10.0])
+
+
+def test_allocation_keeps_budget_and_equalizes_marginal_roas():
+    out = BudgetOptimizer(CFG).optimize(_frame())
+    units, summary = out["units"], out["summary"]
+
+    assert np.isclose(units["recommended_spend"].sum(), units["current_spend"].sum())
+    assert summary["predicted_revenue"] > summary["current_revenue"]
+    # budget moves toward the steep curve, within the +/-50% box
+    by_adset = units.set_index("adset_name")
+    assert by_adset.loc["A0", "change"] > 0 > by_adset.loc["A3", "change"]
+    assert (units["recommended_spend"] <= 1.5 * units["current_spend"] + 1e-9).all()
+    free = units[(units["recommended_spend"] < 1.5 * units["current_spend"] - 1e-6)
+                 & (units["recommended_spend"] > 0.5 * units["current_spend"] + 1e-6)]
+    assert np.allclose(free["marginal_roas"], summary["marginal_roas"])
+    assert out["actions"][0].startswith("Shift $")
+
+
+def test_missing_revenue_falls_back_to_spend_times_roas():
+    df = _frame()
+    df.loc[::3, "revenue"] = np.nan
+    opt = BudgetOptimizer(CFG)
+    assert np.allclose(opt.fit_curves(opt.daily(df))["beta"], 0.5)
+
+
+def test_warm_start_from_memory(tmp_path):
+    memory = Memory(str(tmp_path / "memory.json"))
+    opt = BudgetOptimizer(CFG)
+    cold = opt.optimize(_frame(200), memory)["summary"]
+    assert memory.recall(MEMORY_KEY)["lam"] == cold["marginal_roas"]
+
+    warm = opt.optimize(_frame(200, seed=1), memory)["summary"]
+    assert warm["warm_start"] and not cold["warm_start"]
+    assert np.isclose(warm["marginal_roas"], cold["marginal_roas"], rtol=0.2)
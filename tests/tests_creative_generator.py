@@ -0,0 +1,32 @@
+import pandas as pd
+
+from src.agents.creative_generator import CreativeGenerator
+
+
+def test_creative_generator_groups_campaigns_in_one_pass():
+    df = pd.DataFrame(
+        [
+            {"campaign_name": "Low", "creative_message": "m1", "creative_type": "Video", "impressions": 100, "clicks": 1, "ctr": 0.005},
+            {"campaign_name": "Low", "creative_message": "m2", "creative_type": "Image", "impressions": 100, "clicks": 1, "ctr": 0.005},
+            {"campaign_name": "Low", "creative_message": "m1", "creative_type": "Image", "impressions": 100, "clicks": 1, "ctr": 0.005},
+            {"campaign_name": "Low", "creative_message": "m3", "creative_type": "Video", "impressions": 100, "clicks": 1, "ctr": 0.005},
+            {"campaign_name": "Low", "creative_message": "m4", "creative_type": "UGC", "impressions": 100, "clicks": 1, "ctr": 0.005},
+            {"campaign_name": "Low2", "creative_message": "m1", "creative_type": "Video", "impressions": 100, "clicks": 1, "ctr": 0.004},
+            {"campaign_name": "High", "creative_message": "h1", "creative_type": "Video", "impressions": 100, "clicks": 5, "ctr": 0.05},
+            {"campaign_name": "NoType", "creative_message": None, "creative_type": None, "impressions": 100, "clicks": 0, "ctr": 0.001},
+        ]
+    )
+    out = CreativeGenerator({"thresholds": {"low_ctr": 0.01}}).generate(df, {})
+    recs = {r["campaign_name"]: r for r in out["campaign_recommendations"]}
+
+    assert set(recs) == {"Low", "Low2", "NoType"}
+    assert recs["Low"]["original_messages"] == ["m1", "m2", "m3"]
+    # Image and Video tie at 2 rows each; the smaller value wins, as with Series.mode()
+    assert recs["Low"]["creative_type"] == "Image"
+    assert recs["NoType"]["creative_type"] == "unknown"
+    assert recs["NoType"]["original_messages"] == []
+    # every low-CTR campaign with messages keeps a candidate, though all share one templated body;
+    # Low's three identical candidates are scored once
+    with_messages = {name for name, r in recs.items() if r["original_messages"]}
+    assert set(out["creatives_df"]["campaign_name"]) == with_messages == {"Low", "Low2"}
+    assert len(out["creatives_df"]) == 2
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+
+from src.agents.creative_search import DISCOUNT_PHRASES, URGENCY_PHRASES, CreativeSearch
+from src.agents.simulator import Simulator
+from src.utils.text_features import contains_discount, contains_urgency_words
+
+CAMPAIGNS = ["Men ComfortMax", "Women Studio Sports", "Cotton Classics"]
+
+
+def _sim():
+    rng = np.random.default_rng(0)
+    words = ["today", "off", "deal", "comfort", "seamless", "briefs", "stock", "shop", "now", "range", "order", "soft"]
+    rows = []
+    for _ in range(400):
+        msg = " ".join(rng.choice(words, size=6))
+        ctr = 0.01 + 0.004 * ("off" in msg) + 0.003 * ("today" in msg) - 0.002 * ("range" in msg) + rng.normal(0, 5e-4)
+        rows.append({"creative_message": msg, "ctr": ctr})
+    sim = Simulator({"simulator": {"min_train_samples": 5, "tfidf_max_features": 200, "prediction_cache_size": 0}})
+    sim.train_from_dataframe(pd.DataFrame(rows))
+    return sim
+
+
+def test_phrases_carry_the_text_feature_cues():
+    assert all(contains_urgency_words(p) for p in URGENCY_PHRASES if p)
+    assert all(contains_discount(p) for p in DISCOUNT_PHRASES if p)
+
+
+def test_pruned_search_matches_exhaustive_scoring_with_fewer_predictions():
+    search = CreativeSearch(_sim(), {"creative_search": {"top_k": 15}})
+    pruned = search.search(CAMPAIGNS)
+    stats = dict(search.stats)
+    exhaustive = search.search(CAMPAIGNS, prune=False)
+
+    assert stats["variants"] == len(list(search.iter_variants(CAMPAIGNS)))
+    assert stats["scored"] < stats["variants"] and stats["pruned_prefixes"] > 0
+    assert pruned["creative_message"].tolist() == exhaustive["creative_message"].tolist()
+    assert pruned["predicted_ctr"].is_monotonic_decreasing
+    # the reported scores are the Simulator's own predictions
+    direct = [p["predicted_ctr"] for p in search.sim.predict(pruned["creative_message"].tolist())]
+    assert np.allclose(pruned["predicted_ctr"], direct)
+
+
+def test_bounds_cover_every_completion():
+    search = CreativeSearch(_sim(), {})
+    heads = [t.format(campaign=c) for c in CAMPAIGNS for t in search.templates]
+    search._prepare_bounds(heads)
+    bounds = search._upper_bounds(heads, 0)
+    scores = search.score([m for _, m in search.iter_variants(CAMPAIGNS)]).reshape(len(heads), -1)
+    assert (bounds + 1e-12 >= scores.max(axis=1)).all()
+
+
+def test_untrained_simulator_falls_back_to_heuristic_scan():
+    search = CreativeSearch(Simulator({}), {"creative_search": {"top_k": 3}})
+    top = search.search(CAMPAIGNS[:1])
+    assert len(top) == 3 and (top["model"] == "heuristic").all()
+    assert search.stats["scored"] == search.stats["variants"]
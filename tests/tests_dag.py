@@ -0,0 +1,112 @@
+import time
+
+import pytest
+
+from src.agents.planner import PlannerAgent
+from src.utils.dag import run_dag, topological_order
+
+
+def test_run_dag_overlaps_independent_stages():
+    def slow(value):
+        def stage(results):
+            time.sleep(0.2)
+            return value
+        return stage
+
+    stages = {
+        "load": lambda r: 1,
+        "a": slow(2),
+        "b": slow(3),
+        "join": lambda r: r["load"] + r["a"] + r["b"],
+    }
+    deps = {"load": [], "a": ["load"], "b": ["load"], "join": ["a", "b"]}
+    results, timings = run_dag(stages, deps, max_workers=2)
+
+    assert results["join"] == 6
+    assert timings["a"]["start"] < timings["b"]["end"] and timings["b"]["start"] < timings["a"]["end"]
+    assert timings["join"]["start"] >= max(timings["a"]["end"], timings["b"]["end"])
+
+
+def test_topological_order_rejects_cycles():
+    with pytest.raises(ValueError):
+        topological_order({"a": ["b"], "b": ["a"]})
+
+
+def test_planner_plan_is_a_valid_dag():
+    plan = PlannerAgent({}).create_plan("Analyze ROAS drop")
+    order = topological_order(plan["dependencies"])
+    assert order.index("load_data") < order.index("train_simulator") < order.index("build_report")
+
+
+def test_run_dag_stage_cache_reruns_only_changed_stages(tmp_path):
+    from src.utils.stage_cache import StageCache
+
+    calls = []
+
+    def stage(name, fn):
+        def run(results):
+            calls.append(name)
+            return fn(results)
+        return run
+
+    deps = {"load": [], "parity": ["load"], "report": ["parity"]}
+
+    def run(value, **kwargs):
+        calls.clear()
+        cache = StageCache(str(tmp_path), **kwargs)
+        stages = {
+            "load": stage("load", lambda r: value),
+            "parity": stage("parity", lambda r: r["load"] % 2),
+            "report": stage("report", lambda r: f"parity={r['parity']}"),
+        }
+        results, _ = run_dag(stages, deps, max_workers=1, cache=cache, cache_keys={"load": {"source": value}})
+        return results, cache.report()
+
+    first, report = run(3)
+    assert calls == ["load", "parity", "report"] and report["misses"] == ["load", "parity", "report"]
+
+    again, report = run(3)
+    assert again == first and calls == [] and report["hits"] == ["load", "parity", "report"]
+
+    # new input: parity is recomputed to the same value, so report's key is unchanged
+    _, report = run(5)
+    assert calls == ["load", "parity"] and report["hits"] == ["report"]
+
+    assert StageCache(str(tmp_path)).invalidate(["parity"]) == ["parity"]
+    _, report = run(5, exclude=["report"])
+    assert calls == ["parity", "report"] and report["off"] == ["report"]
+
+
+def test_orchestrator_cache_hit_still_records_stage_results_in_memory(tmp_path, monkeypatch):
+    import os
+    import shutil
+
+    import yaml
+
+    from src.agents.budget_optimizer import MEMORY_KEY
+    from src.memory.memory import Memory
+    from src.orchestrator import Orchestrator
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    monkeypatch.chdir(tmp_path)
+    shutil.copy(os.path.join(root, "data", "facebook_ads.csv"), tmp_path / "ads.csv")
+    cfg = yaml.safe_load(open(os.path.join(root, "config", "config.yaml")))
+    cfg["data"].update({"path": str(tmp_path / "ads.csv"), "cache_dir": None})
+    cfg["simulator"]["model_dir"] = str(tmp_path / "models")
+    cfg["memory"]["path"] = str(tmp_path / "memory.json")
+    cfg["report"].update({"pdf_output_dir": str(tmp_path / "reports"), "chart_cache_dir": None})
+    cfg["stage_cache"] = {"dir": str(tmp_path / "stages")}
+    cfg["creative_search"]["max_campaigns"] = 2
+
+    Orchestrator(cfg).run("Why did ROAS drop?")
+    Memory.from_config(cfg).remember(MEMORY_KEY, None)
+    second = Orchestrator(cfg).run("What changed?")
+    assert "simulate_creatives" in second["stage_cache"]["hits"]
+    assert {"search_creatives", "optimize_budget"} <= set(second["stage_cache"]["hits"])
+
+    memory = Memory.from_config(cfg)
+    run_id = second["run_id"]
+    assert memory.recall(run_id + "_top_predictions")
+    assert memory.recall(run_id + "_top_variants")["variants"] == second["top_variants"]
+    assert memory.recall(MEMORY_KEY)["lam"] == second["budget"]["marginal_roas"]
+    assert [e["type"] for e in memory.list_events(run_id=run_id)].count("budget") == 1
@@ -0,0 +1,97 @@
+import os
+
+import pandas as pd
+
+from src.agents.data_agent import DataAgent
+
+
+def _write_csv(path):
+    pd.DataFrame(
+        [
+            {"campaign_name": "A", "date": "2025-01-01", "impressions": 1000, "ctr": 0.01, "roas": 2.0, "platform": "Facebook"},
+            {"campaign_name": "B", "date": "2025-01-02", "impressions": 2000, "ctr": 0.02, "roas": 3.0, "platform": "Instagram"},
+        ]
+    ).to_csv(path, index=False)
+
+
+def test_data_agent_typed_schema(tmp_path):
+    csv = tmp_path / "ads.csv"
+    _write_csv(csv)
+    df, summary = DataAgent({"data": {"path": str(csv)}}).load_and_summarize()
+    assert isinstance(df["campaign_name"].dtype, pd.CategoricalDtype)
+    assert pd.api.types.is_datetime64_any_dtype(df["date"])
+    assert df["impressions"].dtype.itemsize < 8
+    assert summary["campaigns"] == 2
+
+
+def test_data_agent_cache_reused_until_source_changes(tmp_path):
+    csv = tmp_path / "ads.csv"
+    _write_csv(csv)
+    agent = DataAgent({"data": {"path": str(csv), "cache_dir": str(tmp_path / "cache")}})
+    first = agent.load()
+    data_path, _ = agent._cache_paths()
+    assert os.path.exists(data_path)
+
+    # touching the file without changing content keeps the cache valid via the hash check
+    os.utime(csv, (0, 0))
+    pd.testing.assert_frame_equal(agent.load(), first)
+
+    df = pd.read_csv(csv)
+    df.loc[0, "impressions"] = 5000
+    df.to_csv(csv, index=False)
+    assert agent.load()["impressions"].iloc[0] == 5000
+
+
+def test_data_agent_streaming_summary_and_stratified_sample(tmp_path):
+    csv = tmp_path / "ads.csv"
+    rows = [
+        {"campaign_name": f"C{i % 5}", "date": "2025-01-01", "impressions": 1000 + i, "ctr": 0.01 + (i % 7) * 1e-3, "roas": 1.0 + i % 3}
+        for i in range(1000)
+    ]
+    rows += [{"campaign_name": "Rare", "date": "2025-01-02", "impressions": 10, "ctr": 0.05, "roas": 4.0}]
+    pd.DataFrame(rows).to_csv(csv, index=False)
+
+    cfg = {"data": {"path": str(csv), "sample_mode": True, "sample_rows": 60, "chunksize": 97}}
+    sample, summary = DataAgent(cfg).load_and_summarize()
+    full = pd.read_csv(csv)
+
+    assert summary["rows"] == len(full)
+    assert abs(summary["avg_ctr"] - full["ctr"].mean()) < 1e-12
+    assert summary["campaigns"] == 6
+    assert len(sample) <= 60
+    assert "Rare" in set(sample["campaign_name"])
+    assert sample["campaign_name"].value_counts().max() == 10
+
+
+def test_data_agent_stratified_sample_stays_within_sample_rows_with_many_strata(tmp_path):
+    csv = tmp_path / "ads.csv"
+    rows = [
+        {"campaign_name": f"C{i % 40}", "date": "2025-01-01", "impressions": 100 + i, "ctr": 0.02, "roas": 1.5}
+        for i in range(400)
+    ]
+    pd.DataFrame(rows).to_csv(csv, index=False)
+
+    cfg = {"data": {"path": str(csv), "sample_mode": True, "sample_rows": 25, "chunksize": 53}}
+    sample, _ = DataAgent(cfg).load_and_summarize()
+
+    assert len(sample) == 25
+    # one row per stratum before any stratum gets a second
+    assert sample["campaign_name"].value_counts().max() == 1
+
+
+def test_stratified_sample_picks_strata_evenly_and_independent_of_chunking(tmp_path):
+    csv = tmp_path / "ads.csv"
+    # 10 large campaigns and 90 single-row ones, more strata than sample_rows
+    names = [f"Big{i % 10}" for i in range(1000)] + [f"Solo{i}" for i in range(90)]
+    pd.DataFrame({"campaign_name": names, "date": "2025-01-01", "impressions": range(len(names)),
+                  "ctr": 0.02, "roas": 1.5}).to_csv(csv, index=False)
+
+    samples = []
+    for chunksize in (97, 10_000):
+        cfg = {"data": {"path": str(csv), "sample_mode": True, "sample_rows": 20, "chunksize": chunksize}}
+        samples.append(DataAgent(cfg).load_and_summarize()[0])
+
+    assert sorted(samples[0]["impressions"]) == sorted(samples[1]["impressions"])
+    assert len(samples[0]) == 20 and samples[0]["campaign_name"].is_unique
+    # each stratum has the same chance of a slot, whatever its size (smallest keys would pick all 10 big ones)
+    assert samples[0]["campaign_name"].str.startswith("Big").sum() < 10
@@ -0,0 +1,64 @@
+import pandas as pd
+
+from src.agents.evaluator_agent import EvaluatorAgent, HypothesisEngine
+
+CFG = {"stats": {"significance_alpha": 0.05}, "evaluation": {"window_days": 7, "fatigue_days": 7}}
+
+
+def _frame():
+    rows = []
+    for day in range(28):
+        for adset, roas in (("A", 4.0), ("B", 1.0)):
+            # CTR falls in the last week and the weak adset B gains delivery
+            recent = day >= 21
+            impressions = 10_000 if adset == "A" or not recent else 30_000
+            ctr = 0.02 if not recent else 0.012
+            rows.append({
+                "date": pd.Timestamp("2025-01-01") + pd.Timedelta(days=day),
+                "campaign_name": "C",
+                "adset_name": adset,
+                "creative_message": f"msg {adset}",
+                "impressions": impressions,
+                "clicks": impressions * ctr,
+                "ctr": ctr,
+                "spend": impressions / 100,
+                "revenue": impressions / 100 * roas,
+                "roas": roas,
+            })
+    return pd.DataFrame(rows)
+
+
+def test_evaluator_tests_hypotheses_against_data():
+    insights = {
+        "summary": "s",
+        "hypotheses": [
+            {"id": "H1", "text": "CTR decline may be causing ROAS drop", "confidence": 0.5},
+            {"id": "H2", "text": "Audience fatigue due to repetitive creatives", "confidence": 0.5},
+            {"id": "H3", "text": "Spend shifted into low-performing adsets", "confidence": 0.5},
+            {"id": "H4", "text": "Something unmeasurable", "confidence": 0.42},
+        ],
+    }
+    out = {h["id"]: h for h in EvaluatorAgent(CFG).validate(insights, _frame())["hypotheses"]}
+
+    assert out["H1"]["test"] == "ctr_change" and out["H1"]["supported"] and out["H1"]["effect"] < 0
+    assert out["H2"]["test"] == "creative_fatigue" and out["H2"]["supported"]
+    # spend shift is reported as evidence, without an impression-level p-value
+    assert out["H3"]["test"] == "spend_shift" and out["H3"]["supported"] is None and "p_value" not in out["H3"]
+    assert out["H3"]["evidence"]["spend_share_shift"] > 0.2 and out["H3"]["confidence"] == 0.5
+    assert out["H1"]["confidence"] > 0.95
+    assert out["H4"]["test"] is None and out["H4"]["confidence"] == 0.42
+
+    # significance follows stats.significance_alpha / stats.correction across the whole batch
+    strict = dict(CFG, stats={"significance_alpha": 0.0, "correction": "bonferroni"})
+    out = {h["id"]: h for h in EvaluatorAgent(strict).validate(insights, _frame())["hypotheses"]}
+    assert not any(out[i]["supported"] for i in ("H1", "H2"))
+    assert all(out[i]["p_adjusted"] == min(1.0, 2 * out[i]["p_value"]) for i in ("H1", "H2"))
+
+
+def test_engine_reuses_aggregates_across_segments():
+    engine = HypothesisEngine(_frame(), CFG)
+    a = engine.evaluate({"text": "CTR", "segment": {"adset_name": "A"}})
+    b = engine.evaluate({"text": "CTR", "segment": {"adset_name": "B"}})
+    assert a["evidence"]["previous_ctr"] == b["evidence"]["previous_ctr"] == 0.02
+    assert sum(1 for k in engine._cache if isinstance(k, tuple) and k[0] == "totals") == 1
+    assert engine.evaluate({"text": "CTR", "segment": {"adset_name": "missing"}})["supported"] is None
@@ -0,0 +1,72 @@
+import pandas as pd
+
+from src.agents.insight_agent import InsightAgent
+from src.utils.segment_cube import SegmentCube
+
+CFG = {
+    "thresholds": {"low_ctr": 0.01, "roas_drop_pct": 0.15, "min_impressions": 1000},
+    "insights": {"max_depth": 2, "max_hypotheses": 8},
+}
+
+
+def _frame():
+    rows = []
+    for day in range(28):
+        recent = day >= 14
+        for platform in ("Facebook", "Instagram"):
+            for country in ("US", "IN"):
+                # only Instagram/US loses ROAS; Facebook/IN has a persistently low CTR
+                roas = 1.0 if recent and (platform, country) == ("Instagram", "US") else 4.0
+                ctr = 0.005 if (platform, country) == ("Facebook", "IN") else 0.02
+                rows.append({
+                    "date": pd.Timestamp("2025-01-01") + pd.Timedelta(days=day),
+                    "campaign_name": "C",
+                    "platform": platform,
+                    "country": country,
+                    "impressions": 10_000,
+                    "clicks": 10_000 * ctr,
+                    "spend": 100.0,
+                    "revenue": 100.0 * roas,
+                })
+    return pd.DataFrame(rows)
+
+
+def test_cube_rollups_match_raw_groupby():
+    df = _frame()
+    cube = SegmentCube.from_frame(df, window_days=14)
+    by_platform = cube.rollup(("platform",))
+    raw = df[df["date"] >= "2025-01-15"].groupby("platform")["revenue"].sum()
+    assert by_platform["revenue_recent"].to_dict() == raw.to_dict()
+
+    # chunk partials merge to the same cube
+    merged = SegmentCube.from_partials([SegmentCube.aggregate(df.iloc[:50]), SegmentCube.aggregate(df.iloc[50:])], 14)
+    pd.testing.assert_frame_equal(merged.rollup(("platform", "country")), cube.rollup(("platform", "country")))
+
+    # folding chunk by chunk keeps one row per segment-day, and only days inside the windows
+    history = pd.concat([df.assign(date=df["date"] - pd.Timedelta(days=28)), df], ignore_index=True)
+    running = None
+    for start in range(0, len(history), 30):
+        running = SegmentCube.fold(running, SegmentCube.aggregate(history.iloc[start:start + 30]), 14)
+    assert not running.duplicated(["date", "platform", "country"]).any()
+    assert len(running) == len(df) and running["date"].min() == df["date"].min()
+    folded = SegmentCube.from_partials([running], 14)
+    pd.testing.assert_frame_equal(folded.rollup(("platform", "country")), cube.rollup(("platform", "country")))
+
+
+def test_insights_mined_from_cube_and_ranked_by_impact():
+    cube = SegmentCube.from_frame(_frame(), window_days=14)
+    out = InsightAgent(CFG).generate({"rows": 112}, cube)
+    hyps = out["hypotheses"]
+
+    assert hyps[0]["test"] == "ctr_change"
+    # the account-wide drop is drilled down to the one segment that causes it
+    assert hyps[0]["segment"] == {"platform": "Instagram", "country": "US"}
+    assert any(h["test"] == "creative_fatigue" and h["segment"] == {"platform": "Facebook", "country": "IN"} for h in hyps)
+    impacts = [h["impact"] for h in hyps]
+    assert impacts == sorted(impacts, reverse=True)
+    assert [h["id"] for h in hyps] == [f"H{i}" for i in range(1, len(hyps) + 1)]
+
+
+def test_insights_fall_back_without_cube():
+    out = InsightAgent(CFG).generate({"rows": 0})
+    assert [h["id"] for h in out["hypotheses"]] == ["H1", "H2", "H3"]
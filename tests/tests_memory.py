@@ -0,0 +1,59 @@
+import multiprocessing
+
+import pytest
+
+from src.memory.memory import Memory
+
+BACKEND_FILES = {"json": "memory.json", "sqlite": "memory.sqlite", "jsonl": "memory.jsonl"}
+
+
+@pytest.mark.parametrize("backend", sorted(BACKEND_FILES))
+def test_memory_backends_share_api(tmp_path, backend):
+    path = str(tmp_path / BACKEND_FILES[backend])
+    mem = Memory(path, max_events=3, backend=backend)
+    mem.remember("k", {"a": 1})
+    mem.remember("k", {"a": 2})
+    for i in range(5):
+        mem.append_event({"type": "training", "run_id": f"run_{i % 2}", "i": i})
+
+    reopened = Memory(path, max_events=3, backend=backend)
+    assert reopened.recall("k") == {"a": 2}
+    assert reopened.recall("missing", "d") == "d"
+    assert [e["i"] for e in reopened.list_events()] == [2, 3, 4]
+    assert [e["i"] for e in reopened.list_events(run_id="run_0")] == [2, 4]
+
+
+def _write_events(path, backend, worker, n):
+    mem = Memory(path, max_events=10_000, backend=backend)
+    for i in range(n):
+        mem.append_event({"type": "w", "run_id": f"w{worker}", "i": i})
+        mem.remember(f"w{worker}", i)
+
+
+@pytest.mark.parametrize("backend", ["sqlite", "jsonl"])
+def test_memory_concurrent_writers_do_not_lose_writes(tmp_path, backend):
+    path = str(tmp_path / BACKEND_FILES[backend])
+    procs = [multiprocessing.Process(target=_write_events, args=(path, backend, w, 50)) for w in range(3)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+
+    mem = Memory(path, max_events=10_000, backend=backend)
+    assert len(mem.list_events(limit=1000)) == 150
+    assert all(mem.recall(f"w{w}") == 49 for w in range(3))
+
+
+def test_jsonl_compaction_keeps_live_state(tmp_path):
+    path = str(tmp_path / "memory.jsonl")
+    mem = Memory(path, max_events=5, backend="jsonl")
+    for i in range(20):
+        mem.remember("k", i)
+        mem.append_event({"type": "e", "i": i})
+    mem.backend.compact()
+
+    with open(path) as f:
+        assert len(f.readlines()) == 6
+    reopened = Memory(path, max_events=5, backend="jsonl")
+    assert reopened.recall("k") == 19
+    assert [e["i"] for e in reopened.list_events()] == [15, 16, 17, 18, 19]
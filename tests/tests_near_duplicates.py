@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+from src.agents.evaluator_agent import HypothesisEngine
+from src.utils.near_duplicates import NearDuplicateIndex, dedupe
+
+
+def test_index_clusters_near_copies_and_keeps_distinct_messages_apart():
+    msgs = [
+        "Limited offer: 20% off men's briefs today",
+        "Totally different message about socks",
+        "limited  offer: 20% OFF men's briefs today",
+        "Limited offer: 30% off men's briefs today",
+        "Limited offer: 20% off men's briefs today",
+        "",
+    ]
+    index = NearDuplicateIndex(threshold=0.7).fit(msgs)
+    ids = index.cluster_ids()
+
+    assert ids[0] == ids[2] == ids[3] == ids[4]
+    assert len({ids[0], ids[1], ids[5]}) == 3
+    assert len(index.messages) == 5  # exact copies are hashed once
+    assert index.cluster_ids(["Totally different message about socks", "unseen"]).tolist() == [ids[1], -1]
+    assert index.similarity(msgs[0], msgs[1]) < 0.2
+
+
+def test_dedupe_and_exposure():
+    df = pd.DataFrame({
+        "creative_message": ["Shop now - 20% off", "Shop now - 20% off!", "Free delivery on boxers", "shop now - 20% off"],
+        "impressions": [100, 300, 50, 100],
+    })
+    index = NearDuplicateIndex()
+    assert dedupe(df, "creative_message", index).index.tolist() == [0, 2]
+
+    # grouped: the same text in another campaign is kept
+    df["campaign_name"] = ["A", "A", "A", "B"]
+    assert dedupe(df, "creative_message", index, by="campaign_name").index.tolist() == [0, 2, 3]
+
+    exposure = HypothesisEngine(df, {}).cluster_exposure(())
+    assert sorted(exposure["sum"].tolist()) == [50, 500]
+    assert sorted(exposure["size"].tolist()) == [1, 3]
+
+
+def test_signatures_scale_with_distinct_messages():
+    rng = np.random.default_rng(0)
+    msgs = [f"Seamless comfort for every day - code {rng.integers(10 ** 6)}" for _ in range(20_000)]
+    index = NearDuplicateIndex().fit(msgs)
+    assert index.signatures.shape == (len(set(msgs)), 64)
+    # only the code differs, so the variants collapse into a handful of clusters
+    assert index.n_clusters < len(set(msgs)) / 10
+
+
+def test_fatigue_uses_clusters_and_reports_exposure():
+    days = pd.date_range("2025-01-01", periods=14)
+    # the reworded copy launched on day 7 inherits the original's age
+    df = pd.DataFrame({
+        "date": list(days[:7]) + list(days[7:]),
+        "campaign_name": "C",
+        "creative_message": ["Seamless confidence for every day - new men briefs."] * 7 + ["Seamless confidence for every day - new men briefs!"] * 7,
+        "impressions": 1000,
+        "clicks": 10,
+    })
+    engine = HypothesisEngine(df, {"evaluation": {"fatigue_days": 7}})
+    assert engine.days_active().iloc[-1] == 13
+    evidence = engine.evaluate({"test": "creative_fatigue", "segment": {"campaign_name": "C"}})["evidence"]
+    assert evidence["creative_clusters"] == 1 and evidence["top_cluster_impression_share"] == 1.0
+
+    off = HypothesisEngine(df, {"evaluation": {"fatigue_days": 7}, "near_duplicates": {"enabled": False}})
+    assert off.days_active().iloc[-1] == 6
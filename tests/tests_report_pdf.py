@@ -0,0 +1,55 @@
+import re
+
+from src.utils.report_pdf import PdfReport
+
+
+def _creatives(n):
+    for i in range(n):
+        yield {"campaign_name": f"C{i}", "message": f"Limited offer {i}% off — shop now", "predicted_ctr": 0.02 - i * 1e-6, "confidence": 0.5}
+
+
+def _pages(path):
+    return len(re.findall(rb"/Type /Page\b", open(path, "rb").read()))
+
+
+def test_report_paginates_streamed_rows_and_reuses_cached_charts(tmp_path):
+    report = PdfReport(str(tmp_path), toc=True, chart_cache_dir=str(tmp_path / "charts"))
+    hypotheses = [{"id": f"H{i}", "text": "CTR decline may be causing ROAS drop", "confidence": 0.7} for i in range(40)]
+    segments = ({"issue": "low_ctr", "segment": f"platform=Facebook, country=C{i}", "impact": float(i)} for i in range(500))
+
+    path = report.build("r1", "Report", "Summary", hypotheses, _creatives(3000), ["Act"] * 12, segments=segments)
+    data = open(path, "rb").read()
+    assert _pages(path) > 50
+    assert b"/Outlines" in data
+    assert report.charts.misses == 1 and report.charts.hits == 0
+
+    # same leading creatives -> chart comes from the cache
+    report.build("r2", "Report", "Summary", hypotheses[:2], _creatives(50), ["Act"])
+    assert report.charts.hits == 1
+
+
+def test_report_without_toc_or_charts_still_builds_short_reports(tmp_path):
+    path = PdfReport(str(tmp_path), toc=False).build("r", "Report", "Summary", [], [], [])
+    assert _pages(path) == 1
+
+
+def test_report_tables_stay_inside_the_right_margin(tmp_path, monkeypatch):
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    from reportlab.pdfgen.canvas import Canvas
+
+    right_edges = []
+    draw = Canvas.drawString
+
+    def recording(self, x, y, text, *args, **kwargs):
+        right_edges.append(x + stringWidth(text, self._fontname, self._fontsize))
+        return draw(self, x, y, text, *args, **kwargs)
+
+    monkeypatch.setattr(Canvas, "drawString", recording)
+    variants = ({"campaign_name": f"Campaign {i}", "predicted_ctr": 0.01, "creative_message": "20251231 " * 24} for i in range(200))
+    path = PdfReport(str(tmp_path), toc=False).build("r", "Report", "Summary", [], _creatives(200), [], variants=variants)
+
+    width, margin = 595.2755905511812, 56.69291338582677
+    assert max(right_edges) <= width - margin
+    # pageCompression=1 deflates every page stream
+    data = open(path, "rb").read()
+    assert data.count(b"/FlateDecode") >= _pages(path)
@@ -0,0 +1,55 @@
+import json
+import os
+import shutil
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import yaml
+
+from src.service import AnalystService
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _post(port, query):
+    req = urllib.request.Request(
+        f"http://127.0.0.1:{port}/query",
+        data=json.dumps({"query": query}).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(req, timeout=60) as resp:
+        return json.loads(resp.read())
+
+
+def test_service_answers_concurrent_queries_with_warm_state(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    csv = tmp_path / "ads.csv"
+    shutil.copy(os.path.join(ROOT, "data", "facebook_ads.csv"), csv)
+    cfg = yaml.safe_load(open(os.path.join(ROOT, "config", "config.yaml")))
+    cfg["data"].update({"path": str(csv), "cache_dir": None})
+    cfg["memory"]["path"] = str(tmp_path / "memory" / "memory.json")
+    cfg["report"]["pdf_output_dir"] = str(tmp_path / "reports")
+    cfg["service"].update({"port": 0, "workers": 2})
+
+    svc = AnalystService(cfg)
+    server = svc.start()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            results = list(pool.map(lambda q: _post(svc.port, q), ["q1", "q2", "q3"]))
+        assert len({r["run_id"] for r in results}) == 3
+        assert all(os.path.exists(r["pdf_path"]) for r in results)
+
+        df_before = svc.orchestrator._warm_data[1]
+        _post(svc.port, "q4")
+        assert svc.orchestrator._warm_data[1] is df_before
+
+        # touching the data file triggers a reload on the next query
+        os.utime(csv, None)
+        st = os.stat(csv)
+        os.utime(csv, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+        _post(svc.port, "q5")
+        assert svc.orchestrator._warm_data[1] is not df_before
+    finally:
+        svc.shutdown()
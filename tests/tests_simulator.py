@@ -20,3 +20,227 @@ def test_simulator_train_and_predict():
     res = sim.predict(["Huge 30% OFF today", "Just browse our catalog"])
     assert len(res) == 2
     assert all(0.0 <= r["predicted_ctr"] <= 1.0 for r in res)
+
+
+def test_simulator_keeps_features_sparse_and_respects_memory_ceiling(tmp_path):
+    from scipy import sparse
+
+    cfg = {"simulator": {"min_train_samples": 5, "tfidf_max_features": 100, "random_seed": 42, "max_train_mb": 0.01,
+                         "model_dir": str(tmp_path)}}
+    data = pd.DataFrame(
+        [{"creative_message": f"Shop now {i}% off limited deal", "ctr": 0.01 + i * 1e-4} for i in range(400)]
+    )
+    sim = Simulator(cfg)
+    info = sim.train_or_load(data)
+    assert info["status"] == "trained"
+    assert info["subsampled"] is True
+    assert info["n_samples"] < info["rows_available"] == len(data)
+    assert Simulator(cfg).train_or_load(data)["subsampled"] is True
+
+    msgs = ["Shop now 5% off"]
+    X = sim.vectorizer.transform(msgs)
+    assert sparse.isspmatrix_csr(sim._stack(X, sim._extra_features(msgs, X)))
+
+
+def test_simulator_train_or_load_reuses_artifact(tmp_path):
+    cfg = {"simulator": {"min_train_samples": 5, "tfidf_max_features": 100, "model_dir": str(tmp_path)}}
+    data = pd.DataFrame(
+        [{"creative_message": f"Limited deal {i}% off today", "ctr": 0.01 + i * 1e-4} for i in range(50)]
+    )
+    first = Simulator(cfg).train_or_load(data)
+    assert first["status"] == "trained"
+
+    sim = Simulator(cfg)
+    second = sim.train_or_load(data)
+    assert second["status"] == "loaded"
+    assert second["model_key"] == first["model_key"]
+    assert sim.predict(["Limited deal"])[0]["model"] == "ml"
+
+    cfg["simulator"]["alpha"] = 2.0
+    assert Simulator(cfg).train_or_load(data)["status"] == "trained"
+
+
+def test_incremental_ridge_matches_full_fit():
+    import numpy as np
+    from scipy import sparse
+    from sklearn.linear_model import Ridge
+
+    from src.agents.simulator import IncrementalRidge
+
+    rng = np.random.default_rng(0)
+    X = sparse.random(120, 30, density=0.2, random_state=0, format="csr")
+    y = rng.normal(size=120)
+
+    inc = IncrementalRidge(alpha=0.5).partial_fit(X[:70], y[:70]).partial_fit(X[70:], y[70:])
+    # updates only accumulate; the system is solved when the coefficients are read
+    assert inc._stale and inc._coef is None
+    full = Ridge(alpha=0.5).fit(X.toarray(), y)
+    assert np.allclose(inc.coef_, full.coef_, atol=1e-8)
+    assert np.isclose(inc.intercept_, full.intercept_)
+
+
+def test_simulator_update_incremental_folds_only_new_days(tmp_path):
+    cfg = {"simulator": {"min_train_samples": 5, "mode": "incremental", "hash_features": 256, "model_dir": str(tmp_path)}}
+    data = pd.DataFrame(
+        [
+            {"date": f"2025-01-{d:02d}", "creative_message": f"Limited deal {i}% off today", "ctr": 0.01 + i * 1e-4}
+            for d in range(1, 4)
+            for i in range(10)
+        ]
+    )
+    first = Simulator(cfg).update_incremental(data[data["date"] < "2025-01-03"])
+    assert first["n_new"] == 20
+
+    sim = Simulator(cfg)
+    second = sim.update_incremental(data)
+    assert second["n_new"] == 10 and second["n_samples"] == 30
+    assert sim.update_incremental(data)["status"] == "up_to_date"
+    assert sim.predict(["Limited deal"])[0]["model"] == "ml"
+
+    # rows arriving late for an already folded day are folded once
+    late = data[data["date"] == "2025-01-02"].head(3).assign(ctr=0.02)
+    third = sim.update_incremental(pd.concat([data, late], ignore_index=True))
+    assert third["n_new"] == 3 and third["n_samples"] == 33
+
+    # without a date column, rows are counted rather than refolded
+    undated = data.drop(columns="date")
+    nodate = Simulator({"simulator": {**cfg["simulator"], "model_dir": str(tmp_path / "undated")}})
+    assert nodate.update_incremental(undated)["n_new"] == 30
+    assert nodate.update_incremental(undated)["status"] == "up_to_date"
+    assert nodate.update_incremental(pd.concat([undated, undated.head(4)]))["n_samples"] == 34
+
+
+def test_simulate_batch_parallel_matches_serial():
+    cfg = {"simulator": {"min_train_samples": 5, "tfidf_max_features": 100, "chunk_size": 7, "prediction_cache_size": 0}}
+    data = pd.DataFrame(
+        [{"creative_message": f"Limited deal {i}% off today", "ctr": 0.01 + i * 1e-4} for i in range(50)]
+    )
+    candidates = pd.DataFrame({"creative_message": [f"Shop now {i}% off!" for i in range(40)]})
+    sim = Simulator(cfg)
+    sim.train_from_dataframe(data)
+
+    serial = sim.simulate_batch(candidates, n_jobs=1)
+    parallel = sim.simulate_batch(candidates, n_jobs=2)
+    pd.testing.assert_frame_equal(serial, parallel)
+
+
+def test_predict_dedupes_and_caches_by_model_version():
+    cfg = {"simulator": {"min_train_samples": 5, "tfidf_max_features": 100}}
+    data = pd.DataFrame(
+        [{"creative_message": f"Limited deal {i}% off today", "ctr": 0.01 + i * 1e-4} for i in range(50)]
+    )
+    sim = Simulator(cfg)
+    sim.cache.clear()
+    sim.train_from_dataframe(data)
+
+    first = sim.predict(["Shop NOW", "shop  now", "Free returns"])
+    assert first[0]["predicted_ctr"] == first[1]["predicted_ctr"]
+    assert first[1]["message"] == "shop  now"
+    assert sim.cache_stats()["misses"] == 2
+
+    sim.predict(["Free returns"])
+    assert sim.cache_stats()["hits"] == 1
+
+    # retraining bumps the model version, so earlier entries are not reused
+    sim.train_from_dataframe(data)
+    sim.predict(["Free returns"])
+    assert sim.cache_stats()["misses"] == 3
+
+
+def test_prediction_cache_size_of_one_simulator_does_not_change_another():
+    sized = Simulator({"simulator": {"prediction_cache_size": 50}})
+    same = Simulator({"simulator": {"prediction_cache_size": 50}})
+    assert Simulator({"simulator": {"prediction_cache_size": 0}}).cache is None
+    other = Simulator({"simulator": {"prediction_cache_size": 7}})
+
+    assert sized.cache is same.cache and sized.cache is not other.cache
+    assert sized.cache.max_size == 50 and other.cache.max_size == 7
+
+
+def test_grid_search_matches_ridge_per_alpha():
+    import numpy as np
+    from sklearn.linear_model import Ridge
+
+    from src.agents.model_selection import RidgeGridSearch
+
+    rng = np.random.RandomState(0)
+    words = ["sale", "shop", "now", "limited", "free", "delivery", "new", "deal", "today", "off"]
+    data = pd.DataFrame({
+        "creative_message": [" ".join(rng.choice(words, 4)) for _ in range(120)],
+        "ctr": rng.uniform(0.005, 0.05, 120),
+    })
+    sim = Simulator({"simulator": {"min_train_samples": 5}})
+    search = RidgeGridSearch(sim, alphas=[0.1, 1.0], max_features=[20], ngram_ranges=[(1, 2)], folds=3)
+    report = search.search(data, baseline={"alpha": 1.0, "tfidf_max_features": 20, "ngram_range": [1, 2]})
+    assert report["complete"] and report["evaluated"] == 2
+    assert report["baseline"]["alpha"] == 1.0
+
+    # the eigendecomposition path agrees with a direct Ridge fit on each fold
+    codes, uniques = pd.factorize(data["creative_message"])
+    counts = search._counts(uniques.tolist(), np.bincount(codes).astype(float), (1, 2))
+    X = search._design(pd.Series(uniques, dtype=object), codes, counts, 20)[codes]
+    y = data["ctr"].values
+    fold = (np.random.RandomState(42).permutation(len(uniques)) % 3)[codes]
+    sse = 0.0
+    for k in range(3):
+        model = Ridge(alpha=1.0, solver="sparse_cg", tol=1e-12, max_iter=10_000).fit(X[fold != k], y[fold != k])
+        sse += np.square(np.clip(model.predict(X[fold == k]), 0, 1) - y[fold == k]).sum()
+    assert np.isclose(report["baseline"]["rmse"], np.sqrt(sse / len(y)))
+
+
+def test_grid_search_kernel_path_matches_ridge_when_features_outnumber_messages():
+    import numpy as np
+    from sklearn.linear_model import Ridge
+
+    from src.agents.model_selection import RidgeGridSearch
+
+    rng = np.random.RandomState(1)
+    words = [f"w{i}" for i in range(60)]
+    messages = [" ".join(rng.choice(words, 6)) for _ in range(12)]
+    # 12 distinct messages, each repeated, against ~100 unigram + bigram features
+    data = pd.DataFrame({
+        "creative_message": [messages[i % 12] for i in range(90)],
+        "ctr": rng.uniform(0.005, 0.05, 90),
+    })
+    sim = Simulator({"simulator": {"min_train_samples": 5}})
+    search = RidgeGridSearch(sim, alphas=[0.3], max_features=[500], ngram_ranges=[(1, 2)], folds=3, n_jobs=1)
+    report = search.search(data)
+
+    codes, uniques = pd.factorize(data["creative_message"])
+    counts = search._counts(uniques.tolist(), np.bincount(codes).astype(float), (1, 2))
+    X = search._design(pd.Series(uniques, dtype=object), codes, counts, 500)
+    assert X.shape[1] > X.shape[0]
+    X = X[codes]
+    y = data["ctr"].values
+    fold = (np.random.RandomState(42).permutation(len(uniques)) % 3)[codes]
+    sse = 0.0
+    for k in range(3):
+        model = Ridge(alpha=0.3, solver="sparse_cg", tol=1e-12, max_iter=10_000).fit(X[fold != k], y[fold != k])
+        sse += np.square(np.clip(model.predict(X[fold == k]), 0, 1) - y[fold == k]).sum()
+    assert np.isclose(report["best"]["rmse"], np.sqrt(sse / len(y)))
+
+
+def test_train_or_load_selects_hyperparams_and_reports_holdout(tmp_path):
+    grid = {"enabled": True, "folds": 3, "alphas": [0.01, 100.0], "tfidf_max_features": [5, 50], "ngram_ranges": [[1, 1], [1, 2]]}
+    cfg = {"simulator": {"min_train_samples": 5, "model_dir": str(tmp_path), "model_selection": grid}}
+    data = pd.DataFrame(
+        [{"creative_message": f"Limited deal {i % 7} off today {'shop' if i % 2 else 'now'}", "ctr": 0.01 + (i % 7) * 1e-3} for i in range(60)]
+    )
+    sim = Simulator(cfg)
+    info = sim.train_or_load(data)
+    sel = info["model_selection"]
+    assert info["status"] == "trained" and sel["status"] == "searched"
+    assert sel["evaluated"] == sel["candidates"] == 8
+    assert (sim.alpha, sim.tfidf_max, list(sim.ngram_range)) == (
+        sel["best"]["alpha"], sel["best"]["tfidf_max_features"], sel["best"]["ngram_range"])
+    assert info["holdout"]["rmse"] is not None and info["holdout"]["after_selection"]
+
+    again = Simulator(cfg).train_or_load(data)
+    assert again["status"] == "loaded" and again["model_selection"]["status"] == "cached"
+    assert again["holdout"] == info["holdout"]
+
+    # an exhausted budget still scores the first featurization
+    grid.update({"time_budget_s": 1e-9})
+    cfg["simulator"]["model_dir"] = str(tmp_path / "budget")
+    sel = Simulator(cfg).select_hyperparams(data)
+    assert not sel["complete"] and sel["evaluated"] == 2 and sel["best"] is not None
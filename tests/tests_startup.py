@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+
+from src.utils.startup_profile import parse_importtime, summarize_importtime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_cli_help_loads_no_heavy_dependencies():
+    # asserted on what gets imported, not wall-clock time, so loaded CI hosts do not flake
+    code = (
+        "import runpy, sys; sys.argv = ['run.py', '--help']\n"
+        "try:\n    runpy.run_path('run.py', run_name='__main__')\n"
+        "except SystemExit:\n    pass\n"
+        "print(','.join(m for m in ('numpy', 'pandas', 'sklearn', 'scipy', 'reportlab', 'joblib', 'src.orchestrator')"
+        " if m in sys.modules), file=sys.stderr)"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stderr.strip() == ""
+
+
+def test_orchestrator_import_defers_heavy_dependencies():
+    code = (
+        "import sys, src.orchestrator; "
+        "print(','.join(m for m in ('sklearn', 'scipy', 'reportlab', 'joblib') if m in sys.modules))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == ""
+
+
+def test_importtime_summary_groups_by_package():
+    stderr = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       100 |        100 |   pandas.core",
+        "import time:        50 |        150 | pandas",
+        "import time:        20 |         20 | yaml",
+    ])
+    summary = summarize_importtime(parse_importtime(stderr))
+    assert summary["total_ms"] == 0.17
+    assert summary["packages"][0] == {"package": "pandas", "ms": 0.15}
@@ -6,3 +6,43 @@ def test_two_sample_proportion_direction():
     r = two_sample_proportion_test(540, 12000, 231, 11000)
     assert r["p_value"] < 0.05
     assert r["effect"] < 0
+
+
+def test_batch_proportion_test_matches_scalar_exactly():
+    import numpy as np
+
+    from src.utils.stats import two_sample_proportion_test_batch
+
+    rng = np.random.default_rng(0)
+    n1 = rng.integers(0, 50_000, 500)
+    n2 = rng.integers(0, 50_000, 500)
+    k1 = (n1 * rng.uniform(0, 0.05, 500)).astype(int)
+    k2 = (n2 * rng.uniform(0, 0.05, 500)).astype(int)
+    n1[:3] = 0
+    k1[3], k2[3], n1[3], n2[3] = 0, 0, 100, 100  # zero pooled variance
+
+    batch = two_sample_proportion_test_batch(k1, n1, k2, n2)
+    for i in range(len(n1)):
+        r = two_sample_proportion_test(int(k1[i]), int(n1[i]), int(k2[i]), int(n2[i]))
+        assert batch["p_value"][i] == r["p_value"]
+        assert batch["effect"][i] == r["effect"]
+        assert batch["z"][i] == r["z"]
+
+
+def test_adjust_pvalues_bonferroni_and_bh():
+    import numpy as np
+
+    from src.utils.stats import adjust_pvalues, batch_significance
+
+    p = [0.01, 0.04, 0.03, 0.005]
+    assert np.allclose(adjust_pvalues(p, "bonferroni"), [0.04, 0.16, 0.12, 0.02])
+    assert np.allclose(adjust_pvalues(p, "bh"), [0.02, 0.04, 0.04, 0.02])
+
+    res = batch_significance([540, 10], [12000, 1000], [231, 11], [11000, 1000], alpha=0.05, method="bonferroni")
+    assert res["significant"].tolist() == [True, False]
+
+    from src.utils.stats import batch_significance_from_config
+
+    cfg = {"stats": {"significance_alpha": 0.05, "correction": "bonferroni"}}
+    configured = batch_significance_from_config(cfg, [540, 10], [12000, 1000], [231, 11], [11000, 1000])
+    assert np.array_equal(configured["p_adjusted"], res["p_adjusted"])
@@ -0,0 +1,30 @@
+import os
+
+import pandas as pd
+
+from src.agents.data_agent import DataAgent
+from src.utils.synthetic_data import COLUMNS, generate_ads, write_csv
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_synthetic_data_matches_csv_schema():
+    real = pd.read_csv(os.path.join(ROOT, "data", "facebook_ads.csv"), nrows=5)
+    assert list(real.columns) == COLUMNS
+
+    df = generate_ads(2_000, n_campaigns=7, missing_rate=0.05, seed=1)
+    assert list(df.columns) == COLUMNS
+    assert df["campaign_name"].nunique() == 7
+    assert df["spend"].isna().any() and not df["impressions"].isna().any()
+    assert ((df["ctr"] > 0) & (df["ctr"] < 0.06)).all()
+    pd.testing.assert_frame_equal(df, generate_ads(2_000, n_campaigns=7, missing_rate=0.05, seed=1))
+
+
+def test_chunked_write_loads_through_data_agent(tmp_path):
+    path = str(tmp_path / "synthetic.csv")
+    write_csv(path, 2_500, chunk_rows=1_000, n_campaigns=5)
+    df, summary = DataAgent({"data": {"path": path}}).load_and_summarize()
+    assert summary["rows"] == 2_500
+    # every chunk shares the same campaigns
+    assert summary["campaigns"] == 5
+    assert isinstance(df["platform"].dtype, pd.CategoricalDtype)
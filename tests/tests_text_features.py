@@ -0,0 +1,42 @@
+import re
+
+import numpy as np
+
+from src.utils.text_features import (
+    DISCOUNT_PATTERNS,
+    URGENCY_WORDS,
+    clean_batch,
+    contains_discount_batch,
+    contains_urgency_words_batch,
+    count_exclamations_batch,
+    count_words_batch,
+)
+
+MESSAGES = [
+    "Buy NOW — 20% OFF!!",
+    "Limited-time: ends soon",
+    "Nowhere else offers this",
+    "Shop\ttoday\n only",
+    "Coffee deals and a sale",
+    "",
+    None,
+    "last call!",
+]
+
+
+def _urgency_reference(s):
+    tokens = set(re.sub(r"[^a-z0-9 ]", " ", (s or "").lower()).split())
+    return len(tokens & URGENCY_WORDS) > 0
+
+
+def _discount_reference(s):
+    return any(re.search(p, (s or "").lower()) for p in DISCOUNT_PATTERNS)
+
+
+def test_batch_text_features_match_per_message_reference():
+    assert contains_urgency_words_batch(MESSAGES).tolist() == [_urgency_reference(m) for m in MESSAGES]
+    assert contains_discount_batch(MESSAGES).tolist() == [_discount_reference(m) for m in MESSAGES]
+    assert count_exclamations_batch(MESSAGES).tolist() == [(m or "").count("!") for m in MESSAGES]
+    assert count_words_batch(MESSAGES).tolist() == [len((m or "").split()) for m in MESSAGES]
+    assert clean_batch(MESSAGES).tolist() == [re.sub(r"\s+", " ", (m or "").lower()).strip() for m in MESSAGES]
+    assert isinstance(contains_discount_batch(MESSAGES), np.ndarray)
@@ -0,0 +1,41 @@
+import json
+
+from src.utils.dag import run_dag
+from src.utils.tracing import Tracer, activate, span
+
+
+def test_spans_nest_across_dag_worker_threads(tmp_path):
+    def load(_):
+        with span("DataAgent.load", rows=3) as sp:
+            sp["cols"] = 2
+            return [1, 2, 3]
+
+    def count(r):
+        with span("count", rows=len(r["load"])):
+            return len(r["load"])
+
+    tracer = Tracer("run_test", log_spans=False)
+    with activate(tracer):
+        results, _ = run_dag({"load": load, "count": count}, {"load": [], "count": ["load"]}, max_workers=2)
+    assert results["count"] == 3
+
+    by_name = {s["name"]: s for s in tracer.spans}
+    assert by_name["DataAgent.load"]["parent"] == by_name["stage:load"]["id"]
+    assert by_name["count"]["parent"] == by_name["stage:count"]["id"]
+    assert by_name["stage:load"]["parent"] is None
+    assert by_name["DataAgent.load"]["rows"] == 3 and by_name["DataAgent.load"]["cols"] == 2
+    assert all(s["wall_s"] >= 0 and s["cpu_s"] >= 0 for s in tracer.spans)
+
+    summary = tracer.summary()
+    assert [s["name"] for s in summary][0] == "stage:load"
+    json.dumps(summary)
+
+    trace = json.load(open(tracer.write_chrome_trace(str(tmp_path))))
+    complete = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+    assert len(complete) == 4 and all(e["dur"] >= 0 for e in complete)
+
+
+def test_span_without_tracer_is_a_noop():
+    with span("anything", rows=5) as sp:
+        sp["extra"] = 1
+    assert sp == {"rows": 5, "extra": 1}